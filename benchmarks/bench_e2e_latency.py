@@ -0,0 +1,183 @@
+"""
+End-to-end telemetry-to-pixel latency of the GUI, headless.
+
+A DroneModel is driven by FakeSystem, the full MainWindow is built on the offscreen Qt platform and each
+rendering stage is wrapped to measure, for every update it renders, the age of the telemetry it shows
+(stage completion time minus the monotonic receive time of the sample):
+
+    labels  VehicleDirection / VehicleCondition widgets updated
+    map     update_map_on_drone_move done and the page has executed it (JS round trip)
+    3d      3D model attitude set
+    logger  logger sample appended and plot redrawn
+
+With --windows main the auxiliary windows stay closed and with --windows none the main window is hidden
+too, their stages render nothing and the process CPU is what a hidden GUI costs (logging still runs).
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_e2e_latency.py --rate 50 --duration 20 --output e2e.json
+
+Needs the compiled Qt resources (pyrcc5 ./resources.qrc -o ./src/resources_rc.py) for the map page.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+
+STAGES = ("labels", "map", "3d", "logger")
+
+
+class StageRecorder:
+    def __init__(self, model):
+        self._model = model
+        self.latencies = {stage: [] for stage in STAGES}
+        self.seqs = {stage: set() for stage in STAGES}
+        self.started = None
+
+    def record(self, stage: str, receive_time: float, seq: int):
+        if self.started is None or receive_time <= 0.0:
+            return
+        self.latencies[stage].append(time.monotonic() - receive_time)
+        self.seqs[stage].add(seq)
+
+    def wrap(self, obj, attr: str, stage: str, time_field: str, after=None):
+        original = getattr(obj, attr)
+
+        def wrapper(*args, **kwargs):
+            status = self._model.get_vehicle_status()
+            result = original(*args, **kwargs)
+            receive_time = getattr(status, time_field)
+            if after is None:
+                self.record(stage, receive_time, status.seq)
+            else:
+                after(lambda: self.record(stage, receive_time, status.seq))
+            return result
+
+        setattr(obj, attr, wrapper)
+
+    def report(self, duration: float) -> dict:
+        stages = {}
+        for stage in STAGES:
+            samples = np.asarray(self.latencies[stage]) * 1000
+            if len(samples) == 0:
+                stages[stage] = {"count": 0}
+                continue
+            stages[stage] = {
+                "count": int(len(samples)),
+                "distinct_samples": len(self.seqs[stage]),
+                "throughput_hz": len(samples) / duration,
+                "mean_ms": float(samples.mean()),
+                "p50_ms": float(np.percentile(samples, 50)),
+                "p95_ms": float(np.percentile(samples, 95)),
+                "p99_ms": float(np.percentile(samples, 99)),
+                "max_ms": float(samples.max()),
+            }
+        return stages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=50.0, help="rate of every telemetry stream (Hz)")
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds before measuring (map page load)")
+    parser.add_argument("--waypoints", type=int, default=20)
+    parser.add_argument("--windows", choices=("all", "main", "none"), default="all",
+                        help="windows open while measuring: all, the main window only, or none")
+    parser.add_argument("--output", default="bench_e2e_latency.json")
+    args = parser.parse_args()
+
+    from MapDisplay.MapScheme import register_map_scheme, install_map_scheme
+    register_map_scheme()
+    app = QApplication(sys.argv)
+    # No tile store or network, the measurement is about the telemetry path
+    install_map_scheme(tiles_file=None, tile_source=None)
+
+    # noinspection PyUnresolvedReferences
+    import resources_rc
+    from DroneModel import DroneModel
+    from FakeSystem import FakeSystem, FakeScenario
+    from MainWindow.MainWindow import MainWindow, MainWindowUI
+    from TelemetryRates import TelemetryProfile
+    from VehicleStatus import Position
+
+    rate = args.rate
+    system = FakeSystem(FakeScenario.uniform(rate))
+    model = DroneModel("fake://", telemetry_profile=TelemetryProfile(rate, rate, rate, rate, rate, rate),
+                       system=system)
+
+    recorder = StageRecorder(model)
+    view = MainWindowUI()
+    controller = MainWindow(view=view, model=model)
+
+    page = view.map_display_window.map_widget.page()
+    recorder.wrap(view.vehicle_condition_widget, "set_condition_values", "labels", "timestamp")
+    recorder.wrap(controller.map_display_window_controller, "update_map_on_drone_move", "map", "position_time",
+                  after=lambda done: page.runJavaScript("0", lambda _: done()))
+    recorder.wrap(controller.drone_visualization_controller, "update_drone_3d_model", "3d", "attitude_time")
+    recorder.wrap(view.data_logging_window, "update_plot", "logger", "timestamp")
+
+    if args.windows != "none":
+        view.show()
+    if args.windows == "all":
+        view.map_display_window.show()
+        view.data_logging_window.show()
+    controller.data_logging_controller.log_data()
+
+    model.start()
+
+    def add_waypoints(_):
+        home = system.vehicle
+        for i in range(args.waypoints):
+            model.add_waypoint_to_end(Position(home.latitude + 0.0005 * (i % 5), home.longitude + 0.0005 * (i // 5),
+                                               10.0))
+
+    def fly():
+        model.commands.arm(on_done=lambda _: model.commands.takeoff(10.0, on_done=add_waypoints))
+
+    def start_measuring():
+        recorder.started = time.monotonic()
+        process_start[0] = time.process_time()
+
+    process_start = [0.0]
+    QTimer.singleShot(1000, fly)
+    QTimer.singleShot(int(args.warmup * 1000), start_measuring)
+    QTimer.singleShot(int((args.warmup + args.duration) * 1000), app.quit)
+    app.exec_()
+
+    cpu = time.process_time() - process_start[0]
+    model.stop()
+
+    result = {
+        "benchmark": "e2e_latency",
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "cpu_percent": cpu / args.duration * 100,
+        "ui_scheduler": model.ui_scheduler.stats(),
+        "stages": recorder.report(args.duration),
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print(f"{'stage':<8} {'count':>7} {'Hz':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for stage, r in result["stages"].items():
+        if r["count"]:
+            print(f"{stage:<8} {r['count']:>7} {r['throughput_hz']:>7.1f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+                  f"{r['p99_ms']:>8.2f}")
+        else:
+            print(f"{stage:<8} {0:>7}")
+    print(f"cpu {result['cpu_percent']:.1f}% with {args.windows} windows open")
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
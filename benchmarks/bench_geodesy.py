@@ -0,0 +1,101 @@
+"""
+Cost of the per-position-message geodesy: the NumPy-scalar DroneModel.haversine versus the plain
+math haversine and the cached local-tangent-plane arrival check, plus look-ahead against a whole
+mission (per-waypoint haversine loop versus the WaypointProximity arrays). Also reports the
+worst-case plane error against haversine.
+
+    python benchmarks/bench_geodesy.py --waypoints 1000 --number 100000
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from DroneModel import DroneModel
+from Geodesy import LocalTangentPlane, ArrivalTarget, WaypointProximity, haversine
+from VehicleStatus import Position
+
+HOME_LATITUDE = 47.397971
+HOME_LONGITUDE = 8.546164
+
+
+def per_call(statement, number: int) -> float:
+    # Best of 5, in nanoseconds per call
+    return min(timeit.repeat(statement, number=number, repeat=5)) / number * 1e9
+
+
+def random_positions(count: int, radius_deg: float) -> list['Position']:
+    rng = random.Random(1)
+    return [Position(HOME_LATITUDE + rng.uniform(-radius_deg, radius_deg),
+                     HOME_LONGITUDE + rng.uniform(-radius_deg, radius_deg), rng.uniform(5, 50))
+            for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=100_000, help="calls per single-point measurement")
+    parser.add_argument("--waypoints", type=int, default=1000, help="mission size for the look-ahead")
+    args = parser.parse_args()
+
+    plane = LocalTangentPlane(HOME_LATITUDE, HOME_LONGITUDE)
+    waypoint = Position(HOME_LATITUDE + 0.001, HOME_LONGITUDE + 0.001, 10.0)
+    target = ArrivalTarget(plane, waypoint, 1.0, 1.0)
+    lat, lon, alt = HOME_LATITUDE + 0.0009, HOME_LONGITUDE + 0.0011, 10.2
+
+    def numpy_arrival():
+        return DroneModel.haversine(lat, lon, waypoint.latitude, waypoint.longitude) < 1.0 and abs(
+            alt - waypoint.altitude) < 1.0
+
+    def math_arrival():
+        return haversine(lat, lon, waypoint.latitude, waypoint.longitude) < 1.0 and abs(alt - waypoint.altitude) < 1.0
+
+    def plane_arrival():
+        return target.reached(lat, lon, alt)
+
+    print(f"{'arrival check':<34} {'ns/call':>10} {'speedup':>8}")
+    baseline = per_call(numpy_arrival, args.number)
+    for name, fn in (("DroneModel.haversine (numpy)", numpy_arrival), ("Geodesy.haversine (math)", math_arrival),
+                     ("ArrivalTarget.reached (plane)", plane_arrival)):
+        ns = baseline if fn is numpy_arrival else per_call(fn, args.number)
+        print(f"{name:<34} {ns:>10.0f} {baseline / ns:>7.1f}x")
+
+    mission = random_positions(args.waypoints, 0.02)
+    proximity = WaypointProximity(plane, mission)
+    number = max(1, args.number // args.waypoints)
+
+    def loop_lookahead():
+        return [i for i, w in enumerate(mission) if DroneModel.haversine(lat, lon, w.latitude, w.longitude) < 200.0]
+
+    def array_lookahead():
+        return proximity.within(lat, lon, alt, 200.0)
+
+    print()
+    print(f"{f'look-ahead, {args.waypoints} waypoints':<34} {'us/call':>10} {'speedup':>8}")
+    loop_us = per_call(loop_lookahead, number) / 1000
+    array_us = per_call(array_lookahead, number) / 1000
+    build_us = per_call(lambda: WaypointProximity(plane, mission), number) / 1000
+    print(f"{'haversine per waypoint (numpy)':<34} {loop_us:>10.1f} {1.0:>7.1f}x")
+    print(f"{'WaypointProximity.within':<34} {array_us:>10.1f} {loop_us / array_us:>7.1f}x")
+    print(f"{'WaypointProximity build (once)':<34} {build_us:>10.1f}")
+    assert sorted(loop_lookahead()) == array_lookahead().tolist()
+
+    print()
+    print(f"{'plane error vs haversine':<34} {'max m':>10} {'max rel':>8}")
+    for radius_m in (100, 1000, 5000, 20000):
+        radius_deg = radius_m / 111_000
+        worst_m = worst_rel = 0.0
+        for p in random_positions(2000, radius_deg):
+            east, north = plane.to_en(p.latitude, p.longitude)
+            exact = haversine(HOME_LATITUDE, HOME_LONGITUDE, p.latitude, p.longitude)
+            error = abs(math.hypot(east, north) - exact)
+            worst_m = max(worst_m, error)
+            worst_rel = max(worst_rel, error / exact if exact else 0.0)
+        print(f"{f'within {radius_m} m':<34} {worst_m:>10.4f} {worst_rel:>8.1e}")
+
+
+if __name__ == "__main__":
+    main()
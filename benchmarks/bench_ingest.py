@@ -0,0 +1,57 @@
+"""
+Stress test of the DroneModel telemetry ingestion path (the _monitor_* coroutines, snapshot publisher,
+UI scheduler) against FakeSystem, no PX4 needed.
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_ingest.py --rate 1000 --duration 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from PyQt5.QtCore import QCoreApplication, QTimer
+
+from DroneModel import DroneModel, CHANNEL_STATUS, CHANNEL_POSITION, CHANNEL_ATTITUDE, CHANNEL_VELOCITY, \
+    CHANNEL_BATTERY
+from FakeSystem import FakeSystem, FakeScenario
+from TelemetryRates import TelemetryProfile
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=1000.0, help="rate of every telemetry stream (Hz)")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--ui-rate", type=float, default=10.0, help="max rate of the dummy UI consumer (Hz)")
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+
+    rate = args.rate
+    profile = TelemetryProfile(rate, rate, rate, rate, rate, rate)
+    model = DroneModel("fake://", telemetry_profile=profile, system=FakeSystem(FakeScenario.uniform(rate)))
+    model.ui_scheduler.register("bench", lambda _: model.get_vehicle_status(),
+                                (CHANNEL_STATUS, CHANNEL_POSITION, CHANNEL_ATTITUDE, CHANNEL_VELOCITY,
+                                 CHANNEL_BATTERY), args.ui_rate)
+
+    cpu_start = time.process_time()
+    model.start()
+    QTimer.singleShot(int(args.duration * 1000), app.quit)
+    app.exec_()
+    cpu = time.process_time() - cpu_start
+    model.stop()
+
+    rates = model.get_stream_rates()
+    total = sum(r.count for r in rates.values())
+
+    print(f"{'stream':<12} {'count':>8} {'rate Hz':>10} {'jitter ms':>10}")
+    for stream, r in rates.items():
+        print(f"{stream:<12} {r.count:>8} {r.rate_hz:>10.1f} {r.jitter_ms:>10.3f}")
+    print(f"messages/s  {total / args.duration:,.0f}")
+    print(f"cpu         {cpu / args.duration * 100:.0f}% of one core, {cpu / max(total, 1) * 1e6:.1f} us/message")
+    print(f"ui          {model.ui_scheduler.stats()['bench']}")
+
+
+if __name__ == "__main__":
+    main()
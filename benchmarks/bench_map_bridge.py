@@ -0,0 +1,267 @@
+"""
+Per-update cost of pushing map frames to the page: the previous runJavaScript path (a script built
+around the JSON of each MapUpdateBatcher message, parsed and compiled by the page) against the
+MapBridge web channel signals. The frames come from a flight along a mission with the track
+growing: the drone moves every frame, the mission advances every --advance-every frames.
+
+Always measured, in process: the Python cost of one frame and the bytes it puts on the wire (the
+channel is connected to a transport that serialises its messages the way the web engine one does).
+
+With --page, also through a real QWebEnginePage (needs a working Qt WebEngine): frames sent back to
+back until the page has handled them all (throughput), and one at a time waiting for the page to
+acknowledge each (round trip).
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_map_bridge.py --frames 2000 --waypoints 100 --page
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt5.QtCore import QObject, QUrl, QJsonDocument, pyqtSignal, pyqtSlot
+from PyQt5.QtWebChannel import QWebChannel, QWebChannelAbstractTransport
+
+from FlightTrack import FlightTrack
+from MapDisplay.MapBridge import MapBridge
+from MapDisplay.MapUpdateBatcher import MapUpdateBatcher
+from MissionStore import MissionStore
+from VehicleStatus import Position
+
+HOME_LATITUDE = 47.397971
+HOME_LONGITUDE = 8.546164
+
+BRIDGE_SIGNALS = ("reset", "drone_moved", "mission_changed", "waypoint_selected", "track_changed", "fleet_moved")
+
+# Stand-in for map.js: the same entry points, each only counts, so what is measured is the delivery
+PAGE = """<html><head><script src="qrc:///qtwebchannel/qwebchannel.js"></script><script>
+let received = 0, expected = -1, acknowledge = false;
+function count() {
+    received++;
+    if (acknowledge || received === expected) {
+        window.handler.received(received);
+    }
+}
+function applyMapUpdate(update) { count(); }
+new QWebChannel(qt.webChannelTransport, channel => {
+    window.handler = channel.objects.handler;
+    for (const name of %s) {
+        channel.objects.bridge[name].connect(count);
+    }
+    window.handler.ready();
+});
+</script></head><body></body></html>""" % json.dumps(BRIDGE_SIGNALS)
+
+
+def flight_frames(count: int, waypoints: int, advance_every: int) -> list[dict]:
+    store = MissionStore()
+    store.extend(Position(HOME_LATITUDE + 1e-4 * (i % 10), HOME_LONGITUDE + 1e-4 * (i // 10), 10.0)
+                 for i in range(waypoints))
+    track = FlightTrack()
+    batcher = MapUpdateBatcher()
+    batcher.set_track(track)
+
+    frames = []
+    for i in range(count):
+        if i and i % advance_every == 0 and len(store):
+            store.advance()
+            batcher.set_selected(store.snapshot().current_id)
+        # Circling, so the simplified track keeps gaining vertices
+        latitude = HOME_LATITUDE + 2e-4 * np.sin(i / 50)
+        longitude = HOME_LONGITUDE + 3e-4 * np.cos(i / 50)
+        track.append(latitude, longitude)
+        batcher.set_drone(Position(latitude, longitude, 10.0))
+        batcher.set_waypoints(store.snapshot())
+        frames.append(batcher.take())
+    return frames
+
+
+def script(update: dict) -> str:
+    # What MapDisplayWindowUI.apply_map_update handed to runJavaScript
+    return f"applyMapUpdate({json.dumps(update)});"
+
+
+def signals_per_frame(frames: list[dict]) -> list[int]:
+    # Counted on a bridge of its own, the page counts signals rather than frames
+    bridge = MapBridge()
+    emitted = [0]
+    for name in BRIDGE_SIGNALS:
+        getattr(bridge, name).connect(lambda *_: emitted.__setitem__(0, emitted[0] + 1))
+    counts = []
+    for update in frames:
+        emitted[0] = 0
+        bridge.publish(update)
+        counts.append(emitted[0])
+    return counts
+
+
+class CaptureTransport(QWebChannelAbstractTransport):
+    def __init__(self):
+        super().__init__()
+        self.messages = 0
+        self.bytes = 0
+
+    def sendMessage(self, message):
+        self.messages += 1
+        self.bytes += len(QJsonDocument(message).toJson(QJsonDocument.Compact))
+
+
+def connect_client(transport: 'CaptureTransport', bridge: 'MapBridge'):
+    # What qwebchannel.js sends: init, a connect per signal, then idle
+    transport.messageReceived.emit({"type": 3, "id": 0}, transport)
+    meta = bridge.metaObject()
+    for name in BRIDGE_SIGNALS:
+        index = next(i for i in range(meta.methodCount()) if bytes(meta.method(i).name()).decode() == name)
+        transport.messageReceived.emit({"type": 7, "object": "bridge", "signal": index}, transport)
+    transport.messageReceived.emit({"type": 4}, transport)
+
+
+def measure_in_process(frames: list[dict]) -> dict:
+    start = time.perf_counter()
+    scripts = [script(update) for update in frames]
+    script_us = (time.perf_counter() - start) / len(frames) * 1e6
+    script_bytes = sum(len(text.encode()) for text in scripts) / len(frames)
+
+    bridge = MapBridge()
+    channel = QWebChannel()
+    channel.registerObject("bridge", bridge)
+    transport = CaptureTransport()
+    channel.connectTo(transport)
+    connect_client(transport, bridge)
+    transport.messages = transport.bytes = 0
+
+    start = time.perf_counter()
+    for update in frames:
+        bridge.publish(update)
+    bridge_us = (time.perf_counter() - start) / len(frames) * 1e6
+    return {"script_us": script_us, "script_bytes": script_bytes, "bridge_us": bridge_us,
+            "bridge_bytes": transport.bytes / len(frames), "bridge_messages": transport.messages / len(frames)}
+
+
+class BenchHandler(QObject):
+    ready_signal = pyqtSignal()
+    received_signal = pyqtSignal(int)
+
+    @pyqtSlot()
+    def ready(self):
+        self.ready_signal.emit()
+
+    @pyqtSlot(int)
+    def received(self, count):
+        self.received_signal.emit(count)
+
+
+def measure_page(app, frames: list[dict], round_trips: int) -> dict:
+    from PyQt5.QtWebEngineWidgets import QWebEnginePage
+
+    page = QWebEnginePage()
+    channel = QWebChannel(page)
+    handler = BenchHandler()
+    bridge = MapBridge()
+    channel.registerObject("handler", handler)
+    channel.registerObject("bridge", bridge)
+    page.setWebChannel(channel)
+
+    state = {"ready": False, "received": 0, "result": None}
+    handler.ready_signal.connect(lambda: state.update(ready=True))
+    handler.received_signal.connect(lambda count: state.update(received=count))
+
+    def wait(predicate, timeout: float = 60.0):
+        end = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() > end:
+                raise TimeoutError("the page did not answer")
+            app.processEvents()
+
+    def run_js(source: str):
+        state["result"] = None
+        page.runJavaScript(source, lambda result: state.update(result=result if result is not None else True))
+        wait(lambda: state["result"] is not None)
+
+    page.setHtml(PAGE, QUrl("qrc:///bench/"))
+    wait(lambda: state["ready"])
+
+    signals = signals_per_frame(frames)
+
+    def reset_page(expected: int, acknowledge: bool):
+        run_js(f"received = 0; expected = {expected}; acknowledge = {'true' if acknowledge else 'false'}; 1")
+        state["received"] = 0
+
+    result = {}
+
+    # Throughput: everything sent at once, until the page has handled the last one
+    reset_page(len(frames), False)
+    start = time.perf_counter()
+    for update in frames:
+        page.runJavaScript(script(update))
+    wait(lambda: state["received"] == len(frames))
+    result["script_throughput_us"] = (time.perf_counter() - start) / len(frames) * 1e6
+
+    reset_page(sum(signals), False)
+    start = time.perf_counter()
+    for update in frames:
+        bridge.publish(update)
+    wait(lambda: state["received"] == sum(signals))
+    result["bridge_throughput_us"] = (time.perf_counter() - start) / len(frames) * 1e6
+
+    # Round trip: one frame at a time
+    samples = frames[:round_trips]
+    reset_page(-1, True)
+    start = time.perf_counter()
+    for i, update in enumerate(samples, 1):
+        page.runJavaScript(script(update))
+        wait(lambda: state["received"] == i)
+    result["script_round_trip_us"] = (time.perf_counter() - start) / len(samples) * 1e6
+
+    reset_page(-1, True)
+    target = 0
+    start = time.perf_counter()
+    for update, count in zip(samples, signals):
+        target += count
+        bridge.publish(update)
+        wait(lambda: state["received"] == target)
+    result["bridge_round_trip_us"] = (time.perf_counter() - start) / len(samples) * 1e6
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--waypoints", type=int, default=100)
+    parser.add_argument("--advance-every", type=int, default=20, help="frames between two waypoints reached")
+    parser.add_argument("--page", action="store_true", help="also measure through a QWebEnginePage")
+    parser.add_argument("--round-trips", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.page:
+        # Must be imported before the application is created
+        import PyQt5.QtWebEngineWidgets
+        from PyQt5.QtWidgets import QApplication
+        app = QApplication(sys.argv)
+    else:
+        from PyQt5.QtCore import QCoreApplication
+        app = QCoreApplication(sys.argv)
+
+    frames = flight_frames(args.frames, args.waypoints, args.advance_every)
+    local = measure_in_process(frames)
+    print(f"{args.frames} frames, {args.waypoints} waypoints, one reached every {args.advance_every} frames")
+    print()
+    print(f"{'path':<14} {'python us/frame':>16} {'bytes/frame':>12}")
+    print(f"{'runJavaScript':<14} {local['script_us']:>16.1f} {local['script_bytes']:>12.1f}")
+    print(f"{'MapBridge':<14} {local['bridge_us']:>16.1f} {local['bridge_bytes']:>12.1f}   "
+          f"({local['bridge_messages']:.2f} channel messages per frame)")
+
+    if args.page:
+        page = measure_page(app, frames, args.round_trips)
+        print()
+        print(f"{'path':<14} {'throughput us/frame':>20} {'round trip us':>14}")
+        print(f"{'runJavaScript':<14} {page['script_throughput_us']:>20.1f} {page['script_round_trip_us']:>14.1f}")
+        print(f"{'MapBridge':<14} {page['bridge_throughput_us']:>20.1f} {page['bridge_round_trip_us']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Python-side cost of one map frame while the drone moves, against mission size: the old pair of
+renderPolyLine / renderMarkers scripts (full waypoint list serialised twice per tick) versus one
+MapUpdateBatcher delta. Reports the time to build the script text and its size; the JavaScript side
+follows the same shape (every marker touched before, only the drone and the first leg now).
+
+    python benchmarks/bench_map_updates.py --sizes 10 100 1000 5000
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from MapDisplay.MapUpdateBatcher import MapUpdateBatcher
+from MissionStore import MissionStore
+from VehicleStatus import Position
+
+HOME_LATITUDE = 47.397971
+HOME_LONGITUDE = 8.546164
+
+
+def full_scripts(drone: 'Position', waypoints) -> list[str]:
+    # What render_map_polylines_ui + render_map_waypoints_ui sent every tick
+    waypoint_js_repr = [[waypoint.latitude, waypoint.longitude] for waypoint in waypoints]
+    drone_js_repr = [drone.latitude, drone.longitude]
+    return [f"renderPolyLine({json.dumps(drone_js_repr)}, {json.dumps(waypoint_js_repr)});",
+            f"renderMarkers({json.dumps(drone_js_repr)}, {json.dumps(waypoint_js_repr)}, -1);"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--number", type=int, default=200, help="frames per measurement")
+    args = parser.parse_args()
+
+    print(f"{'waypoints':>9} {'full us':>9} {'full bytes':>11} {'delta us':>9} {'delta bytes':>12}")
+    for count in args.sizes:
+        store = MissionStore()
+        store.extend(Position(HOME_LATITUDE + 1e-5 * i, HOME_LONGITUDE + 1e-5 * i, 10.0) for i in range(count))
+        waypoints = store.snapshot()
+
+        batcher = MapUpdateBatcher()
+        batcher.set_waypoints(waypoints)
+        batcher.take()
+        step = [0]
+
+        def drone():
+            step[0] += 1
+            return Position(HOME_LATITUDE + 1e-7 * step[0], HOME_LONGITUDE, 10.0)
+
+        def full_frame():
+            return full_scripts(drone(), waypoints)
+
+        def delta_frame():
+            batcher.set_drone(drone())
+            batcher.set_waypoints(waypoints)
+            return f"applyMapUpdate({json.dumps(batcher.take())});"
+
+        full_us = min(timeit.repeat(full_frame, number=args.number, repeat=5)) / args.number * 1e6
+        delta_us = min(timeit.repeat(delta_frame, number=args.number, repeat=5)) / args.number * 1e6
+        full_bytes = sum(len(script) for script in full_frame())
+        delta_bytes = len(delta_frame())
+        print(f"{count:>9} {full_us:>9.1f} {full_bytes:>11} {delta_us:>9.1f} {delta_bytes:>12}")
+
+
+if __name__ == "__main__":
+    main()
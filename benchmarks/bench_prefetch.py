@@ -0,0 +1,104 @@
+"""
+Route-corridor tile prefetch against a local tile server stand-in (http.server answering every
+{z}/{x}/{y} with a small PNG after --latency-ms). Times the vectorised corridor computation, a cold
+prefetch per worker count, and a warm run where every tile is already in the store.
+
+    python benchmarks/bench_prefetch.py --waypoints 50 --zooms 10 18 --buffer 250 --workers 1 4 16
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from MapDisplay.TilePrefetcher import TilePrefetcher, corridor_tiles
+from MapDisplay.TileStore import MBTilesStore
+from bench_tile_store import solid_png
+
+HOME_LATITUDE = 47.397971
+HOME_LONGITUDE = 8.546164
+
+
+def start_tile_server(latency_s: float) -> tuple['ThreadingHTTPServer', list[str]]:
+    png = solid_png((120, 180, 120))
+    requests = []
+
+    class TileHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            time.sleep(latency_s)
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(png)))
+            self.end_headers()
+            self.wfile.write(png)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TileHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, requests
+
+
+def survey_route(count: int, seed: int) -> np.ndarray:
+    rng = random.Random(seed)
+    return np.array([(HOME_LATITUDE + rng.uniform(-0.01, 0.01), HOME_LONGITUDE + rng.uniform(-0.015, 0.015))
+                     for _ in range(count)])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--waypoints", type=int, default=50)
+    parser.add_argument("--zooms", type=int, nargs=2, default=[10, 18], metavar=("MIN", "MAX"))
+    parser.add_argument("--buffer", type=float, default=250.0, help="corridor half-width in metres")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="per-tile server latency")
+    args = parser.parse_args()
+
+    route = survey_route(args.waypoints, 1)
+    zooms = range(args.zooms[0], args.zooms[1] + 1)
+
+    start = time.perf_counter()
+    tiles = corridor_tiles(route, zooms, args.buffer)
+    corridor_ms = (time.perf_counter() - start) * 1e3
+    total = sum(len(xy) for xy in tiles.values())
+    print(f"corridor: {args.waypoints} waypoints, zooms {args.zooms[0]}-{args.zooms[1]}, "
+          f"{total} tiles in {corridor_ms:.1f} ms")
+    print("  " + ", ".join(f"z{z}: {len(xy)}" for z, xy in tiles.items()))
+
+    server, requests = start_tile_server(args.latency_ms / 1000)
+    source = f"http://127.0.0.1:{server.server_address[1]}/{{z}}/{{x}}/{{y}}.png"
+
+    print()
+    print(f"{'workers':>7} {'tiles':>7} {'requests':>9} {'seconds':>8} {'tiles/s':>8} {'MB on disk':>11}")
+    for workers in args.workers:
+        path = os.path.join(tempfile.mkdtemp(), "tiles.mbtiles")
+        store = MBTilesStore(path)
+        prefetcher = TilePrefetcher(store, source, workers=workers)
+
+        requests.clear()
+        cold = prefetcher.prefetch(route, zooms, args.buffer)
+        assert cold.downloaded == total and store.count() == total, cold
+        print(f"{workers:>7} {cold.total:>7} {len(requests):>9} {cold.seconds:>8.2f} "
+              f"{cold.downloaded / cold.seconds:>8.0f} {cold.store_bytes / 1e6:>11.2f}")
+
+        requests.clear()
+        warm = prefetcher.prefetch(route, zooms, args.buffer)
+        assert warm.skipped == total and not requests
+        store.close()
+
+    print(f"warm run (everything cached): {len(requests)} requests, {warm.seconds * 1e3:.1f} ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
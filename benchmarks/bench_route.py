@@ -0,0 +1,52 @@
+"""
+Route optimiser on random survey missions: route cost in click order versus nearest neighbour plus
+2-opt / Or-opt, and the time it takes. The budget is one second for 1000 waypoints.
+
+    python benchmarks/bench_route.py --sizes 10 100 500 1000 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from RouteOptimizer import TIME_LIMIT_S, optimise_route
+
+HOME_LATITUDE = 47.397971
+HOME_LONGITUDE = 8.546164
+
+
+def random_mission(count: int, radius_deg: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.column_stack((HOME_LATITUDE + rng.uniform(-radius_deg, radius_deg, count),
+                            HOME_LONGITUDE + rng.uniform(-radius_deg, radius_deg, count),
+                            rng.uniform(10, 60, count)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500, 1000, 2000])
+    parser.add_argument("--radius", type=float, default=0.01, help="mission half-width in degrees")
+    parser.add_argument("--time-limit", type=float, default=TIME_LIMIT_S)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    start = (HOME_LATITUDE, HOME_LONGITUDE, 0.0)
+    print(f"{'waypoints':>9} {'click order m':>14} {'optimised m':>12} {'saved':>7} {'passes':>7} {'seconds':>8}")
+    for count in args.sizes:
+        coords = random_mission(count, args.radius, args.seed)
+        wall = time.perf_counter()
+        result = optimise_route(coords, start, time_limit=args.time_limit)
+        wall = time.perf_counter() - wall
+        assert np.array_equal(np.sort(result.order), np.arange(count))
+
+        saved = 1 - result.length_after / result.length_before if result.length_before else 0.0
+        print(f"{count:>9} {result.length_before:>14.0f} {result.length_after:>12.0f} {saved:>6.0%} "
+              f"{result.passes:>7} {wall:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
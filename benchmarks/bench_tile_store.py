@@ -0,0 +1,100 @@
+"""
+Generates a local MBTiles tileset around the SITL home (flat-colour PNG tiles, one colour per zoom)
+and measures tile lookups the way MapSchemeHandler does them: from the MBTiles store, and from the
+LRU memory layer in front of it. ``--output`` keeps the tileset, e.g. to run the GCS fully offline
+with MAP_TILES_FILE=<file> MAP_TILE_SOURCE= .
+
+    python benchmarks/bench_tile_store.py --zooms 10 17 --radius-km 2 --output test_tiles.mbtiles
+"""
+import argparse
+import math
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from MapDisplay.TileStore import MBTilesStore, TileCache
+
+HOME_LATITUDE = 47.397971
+HOME_LONGITUDE = 8.546164
+
+
+def solid_png(rgb: tuple[int, int, int], size: int = 256) -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    row = b"\x00" + bytes(rgb) * size
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)) +
+            chunk(b"IDAT", zlib.compress(row * size, 9)) + chunk(b"IEND", b""))
+
+
+def tile_range(z: int, radius_km: float) -> tuple[range, range]:
+    n = 1 << z
+    d_lat = radius_km / 111.32
+    d_lon = d_lat / math.cos(math.radians(HOME_LATITUDE))
+
+    def x_of(lon):
+        return int((lon + 180.0) / 360.0 * n)
+
+    def y_of(lat):
+        lat = math.radians(lat)
+        return int((1.0 - math.asinh(math.tan(lat)) / math.pi) / 2.0 * n)
+
+    return (range(x_of(HOME_LONGITUDE - d_lon), x_of(HOME_LONGITUDE + d_lon) + 1),
+            range(y_of(HOME_LATITUDE + d_lat), y_of(HOME_LATITUDE - d_lat) + 1))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--zooms", type=int, nargs=2, default=[10, 17], metavar=("MIN", "MAX"))
+    parser.add_argument("--radius-km", type=float, default=2.0)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--output", help="keep the generated tileset here")
+    args = parser.parse_args()
+
+    path = args.output or os.path.join(tempfile.mkdtemp(), "tiles.mbtiles")
+    store = MBTilesStore(path, name="generated test tileset")
+
+    start = time.perf_counter()
+    keys = []
+    for z in range(args.zooms[0], args.zooms[1] + 1):
+        png = solid_png((40 * z % 256, 90, 255 - 12 * z % 256))
+        xs, ys = tile_range(z, args.radius_km)
+        tiles = [(z, x, y, png) for x in xs for y in ys]
+        store.put_many(tiles)
+        keys.extend(tile[:3] for tile in tiles)
+    store.set_metadata(minzoom=args.zooms[0], maxzoom=args.zooms[1],
+                       center=f"{HOME_LONGITUDE},{HOME_LATITUDE},{args.zooms[1]}")
+    print(f"generated {len(keys)} tiles in {time.perf_counter() - start:.2f} s, "
+          f"{store.size_bytes() / 1e6:.1f} MB -> {path}")
+
+    rng = random.Random(1)
+    # A viewport's worth of tiles is requested over and over while panning around
+    working_set = rng.sample(keys, min(len(keys), 200))
+    lookups = [rng.choice(working_set) for _ in range(args.lookups)]
+
+    start = time.perf_counter()
+    for z, x, y in lookups:
+        assert store.get(z, x, y) is not None
+    store_us = (time.perf_counter() - start) / len(lookups) * 1e6
+
+    cache = TileCache()
+    start = time.perf_counter()
+    for key in lookups:
+        data = cache.get(key)
+        if data is None:
+            cache.put(key, store.get(*key))
+    cached_us = (time.perf_counter() - start) / len(lookups) * 1e6
+
+    print(f"{'MBTiles store':<24} {store_us:>8.1f} us/tile")
+    print(f"{'LRU + store on miss':<24} {cached_us:>8.1f} us/tile ({len(cache)} tiles, {cache.size / 1e6:.2f} MB)")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Flight breadcrumb track on a synthetic survey flight at 10 Hz (lawnmower legs with GPS noise, then
+a hover): the per-fix cost of FlightTrack.append, the per-frame cost and size of the "track" key of
+a MapUpdateBatcher message against sending every fix, the vertex count and rebuild time per zoom
+level, and the largest gap between a fix and the line the page draws (the simplified vertices, then
+the drone), in screen pixels. Hover jitter inside that last, live segment can exceed the tolerance
+until the segment is committed.
+
+    python benchmarks/bench_track.py --minutes 60 --zooms 12 14 16 18 20
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from FlightTrack import FlightTrack
+from MapDisplay.MapUpdateBatcher import MapUpdateBatcher, pixel_size_m, TRACK_TOLERANCE_PX
+from VehicleStatus import Position
+
+HOME_LATITUDE = 47.397971
+HOME_LONGITUDE = 8.546164
+RATE_HZ = 10
+# Position messages per UI frame (UiUpdateScheduler coalesces to ~30 Hz)
+FIXES_PER_FRAME = 1
+
+
+def survey_flight(minutes: float, speed: float, seed: int) -> list[tuple[float, float]]:
+    rng = random.Random(seed)
+    north_per_deg = math.radians(1.0) * 6371000
+    east_per_deg = north_per_deg * math.cos(math.radians(HOME_LATITUDE))
+    count = int(minutes * 60 * RATE_HZ)
+    # 400 m survey lines 30 m apart, the last tenth of the flight hovering
+    line, spacing = int(400 / speed * RATE_HZ), int(30 / speed * RATE_HZ)
+
+    fixes = []
+    east = north = 0.0
+    for i in range(count):
+        lap, phase = divmod(i, line + spacing)
+        if i > count * 0.9:
+            step = (0.0, 0.0)
+        elif phase < line:
+            step = (speed / RATE_HZ * (1.0 if lap % 2 == 0 else -1.0), 0.0)
+        else:
+            step = (0.0, speed / RATE_HZ)
+        east += step[0] + rng.gauss(0.0, 0.05)
+        north += step[1] + rng.gauss(0.0, 0.05)
+        fixes.append((HOME_LATITUDE + north / north_per_deg, HOME_LONGITUDE + east / east_per_deg))
+    return fixes
+
+
+def max_gap(points: np.ndarray, line: np.ndarray) -> float:
+    # Largest distance from a point to the polyline, vectorised over the points, one pass per segment
+    best = np.full(len(points), np.inf)
+    for start, end in zip(line[:-1], line[1:]):
+        segment = end - start
+        offsets = points - start
+        length_sq = segment @ segment
+        t = np.clip(offsets @ segment / length_sq, 0.0, 1.0) if length_sq > 0.0 else np.zeros(len(points))
+        best = np.minimum(best, np.hypot(*(offsets - t[:, None] * segment).T))
+    return float(best.max()) if len(line) > 1 else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=float, default=60.0)
+    parser.add_argument("--speed", type=float, default=8.0, help="ground speed in m/s")
+    parser.add_argument("--zooms", type=int, nargs="+", default=[12, 14, 16, 18, 20])
+    args = parser.parse_args()
+
+    fixes = survey_flight(args.minutes, args.speed, 1)
+
+    track = FlightTrack()
+    start = time.perf_counter()
+    for latitude, longitude in fixes:
+        track.append(latitude, longitude)
+    append_us = (time.perf_counter() - start) / len(fixes) * 1e6
+    print(f"{len(fixes)} fixes ({args.minutes:.0f} min at {RATE_HZ} Hz), {len(track)} kept after radial "
+          f"decimation, {append_us:.2f} us per append")
+
+    rows = track.since(0)
+    east, north = track.plane.to_en_array(rows[:, 0], rows[:, 1])
+    points = np.column_stack((east, north))
+    naive_bytes = len(json.dumps(rows.tolist()))
+
+    print()
+    print(f"{'zoom':>4} {'tol m':>6} {'vertices':>9} {'rebuild ms':>11} {'frame us':>9} {'bytes/frame':>12} "
+          f"{'gap px':>7}")
+    for zoom in args.zooms:
+        tolerance = pixel_size_m(zoom, HOME_LATITUDE) * TRACK_TOLERANCE_PX
+
+        # Streamed as the flight goes, one take() per frame
+        batcher = MapUpdateBatcher()
+        batcher.set_zoom(zoom)
+        live = FlightTrack()
+        batcher.set_track(live)
+        vertices = []
+        message_bytes = 0
+        frames = 0
+        start = time.perf_counter()
+        for i, (latitude, longitude) in enumerate(fixes):
+            live.append(latitude, longitude)
+            if i % FIXES_PER_FRAME == 0:
+                batcher.set_drone(Position(latitude, longitude, 10.0))
+                update = batcher.take()
+                frames += 1
+                track_update = update.get("track") if update else None
+                if track_update is not None:
+                    vertices = [] if track_update["reset"] else vertices
+                    vertices.extend(track_update["add"])
+                    message_bytes += len(json.dumps(track_update))
+        frame_us = (time.perf_counter() - start) / frames * 1e6
+
+        # And rebuilt whole, as on a zoom change
+        batcher.set_zoom(zoom + 1)
+        batcher.take()
+        batcher.set_zoom(zoom)
+        start = time.perf_counter()
+        rebuilt = batcher.take()["track"]
+        rebuild_ms = (time.perf_counter() - start) * 1e3
+        assert rebuilt["reset"]
+
+        line = np.array(vertices + [fixes[-1]])
+        line_east, line_north = track.plane.to_en_array(line[:, 0], line[:, 1])
+        gap = max_gap(points, np.column_stack((line_east, line_north))) / pixel_size_m(zoom, HOME_LATITUDE)
+        print(f"{zoom:>4} {tolerance:>6.2f} {len(vertices):>9} {rebuild_ms:>11.1f} {frame_us:>9.1f} "
+              f"{message_bytes / frames:>12.1f} {gap:>7.2f}")
+
+    print(f"\nevery fix as a polyline: {len(rows)} vertices, {naive_bytes / 1e6:.2f} MB of JSON")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Reader/writer throughput of the VehicleStatus snapshot publisher versus the old
+"mutable object behind a threading.Lock" pattern.
+
+    python benchmarks/bench_vehicle_status.py --readers 4 --duration 2
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from VehicleStatus import VehicleStatusPublisher, Position, Attitude
+
+
+class _MutableVec:
+    def __init__(self):
+        self.a = 0.0
+        self.b = 0.0
+        self.c = 0.0
+
+
+class LockedStatus:
+    # Mirrors the previous DroneModel: one shared object, every access under a lock
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.position = _MutableVec()
+        self.attitude = _MutableVec()
+
+    def write(self, i):
+        with self.lock:
+            self.position.a = i
+            self.position.b = i
+            self.position.c = i
+
+    def read(self):
+        with self.lock:
+            return self.position.a, self.position.b, self.position.c, self.attitude.a
+
+
+class SnapshotStatus:
+    def __init__(self):
+        self.publisher = VehicleStatusPublisher()
+
+    def write(self, i):
+        self.publisher.publish(position=Position(i, i, i))
+
+    def read(self):
+        status = self.publisher.latest()
+        return status.position.latitude, status.position.longitude, status.position.altitude, status.attitude.roll
+
+
+def run(store, readers: int, duration: float):
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0]
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            store.write(float(i))
+            i += 1
+        writes[0] = i
+
+    def reader(idx):
+        n = 0
+        while not stop.is_set():
+            store.read()
+            n += 1
+        reads[idx] = n
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    return writes[0] / duration, sum(reads) / duration
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'store':<10} {'writes/s':>14} {'reads/s':>14}")
+    for name, store in (("lock", LockedStatus()), ("snapshot", SnapshotStatus())):
+        write_rate, read_rate = run(store, args.readers, args.duration)
+        print(f"{name:<10} {write_rate:>14,.0f} {read_rate:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
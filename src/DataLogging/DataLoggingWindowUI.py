@@ -6,33 +6,72 @@ from PyQt5.QtCore import pyqtSignal, pyqtSlot, QObject
 from PyQt5.QtWidgets import QWidget, QFileDialog
 from PyQt5.QtGui import QIntValidator
 import numpy as np
+import time
+from dataclasses import dataclass
 
 from DroneModel import DroneModel
-from VehicleStatus import Attitude
-from VehicleStatus import Position
-from VehicleStatus import Velocity
+from DataLogging.TelemetryStore import TelemetryStore
+
+# Times are milliseconds since logging started, taken from the receive time of the telemetry itself.
+# "time" is the newest message in the sample, t_* the last message of that channel (NaN if none yet).
+LOG_COLUMNS = ["time",
+               "t_battery", "battery_voltage", "battery_percentage",
+               "t_velocity", "vx", "vy", "vz",
+               "t_position", "lat", "lon", "alt",
+               "t_attitude", "roll", "pitch", "yaw"]
+
+# Initial size of each vehicle's log (about 3.5 minutes at the default 50 ms interval), it doubles as it fills
+LOG_CHUNK_SAMPLES = 4096
+
+
+@dataclass
+class _VehicleLog:
+    model: "DroneModel"
+    store: "TelemetryStore"
+    # seq of the last VehicleStatus snapshot appended
+    last_seq: int = -1
 
 
 class DataLoggingWindow(QObject):
-    time_stamp: list[int] = []
-    battery_voltage: list[float] = []
-    battery_percentage: list[float] = []
-    velocity: list['Velocity'] = []
-    position: list['Position'] = []
-    attitude: list['Attitude'] = []
-
-    def __init__(self, view: "DataLoggingWindowUI", model: "DroneModel"):
+    """
+    Logs telemetry of every vehicle added with ``add_model()`` (the active one always), each into a
+    TelemetryStore of its own, all sampled on the same timer with times from the same start. The
+    window plots and exports the active vehicle's log, switching vehicles never drops a log.
+    """
+
+    def __init__(self, view: "DataLoggingWindowUI", model: "DroneModel", max_samples: int | None = None):
         super().__init__()
         self._view = view
+        self._max_samples = max_samples
+        self._logs: dict["DroneModel", _VehicleLog] = {}
         self._model = model
+        self.add_model(model)
 
         self.logging = False
+        self._log_start = None
         self.timer = QtCore.QTimer(self)
         self.timer.setInterval(50)
         self.interval = 50
+        # Samples are logged whether or not the window is open, the plot is only drawn while it is
+        self._visible = self._view.isVisible()
 
         self.connect_signals_and_slots()
 
+    @property
+    def store(self) -> "TelemetryStore":
+        return self._logs[self._model].store
+
+    def add_model(self, model: "DroneModel"):
+        if model not in self._logs:
+            store = TelemetryStore(LOG_COLUMNS, capacity=LOG_CHUNK_SAMPLES, max_samples=self._max_samples)
+            self._logs[model] = _VehicleLog(model, store)
+
+    def set_model(self, model: "DroneModel"):
+        self.add_model(model)
+        self._model = model
+        self._view.set_vehicle_name(model.name if len(self._logs) > 1 else None)
+        self.update_plot_ui()
+
     def connect_signals_and_slots(self):
         self._view.set_interval_button_clicked_signal.connect(self.set_interval)
         self._view.download_log_button_clicked_signal.connect(self.download_log)
@@ -40,36 +79,61 @@ class DataLoggingWindow(QObject):
         self._view.log_data_button_clicked_signal.connect(self.log_data)
         self._view.combo_box_current_index_changed_signal.connect(lambda _: self.update_plot_ui())
         self.timer.timeout.connect(self.on_timer_timeout)
+        self._view.window_shown_signal.connect(self.on_window_shown)
+        self._view.window_hidden_signal.connect(self.on_window_hidden)
+
+    @pyqtSlot()
+    def on_window_shown(self):
+        self._visible = True
+        self.update_plot_ui()
+
+    @pyqtSlot()
+    def on_window_hidden(self):
+        self._visible = False
 
     @pyqtSlot()
     def update_plot_ui(self):
+        if not self._visible:
+            return
         index = self._view.get_combo_box_index()
-        self._view.update_plot(index, self.time_stamp, self.battery_voltage, self.battery_percentage, self.velocity,
-                               self.position, self.attitude)
+        self._view.update_plot(index, self.store)
 
     def on_timer_timeout(self):
         self.update_plot_data()
         self.update_plot_ui()
 
+    def _log_time(self, receive_time: float) -> float:
+        if receive_time <= 0.0:
+            return np.nan
+        # Messages received before logging started are the state at the start, logged at 0
+        return max(receive_time - self._log_start, 0.0) * 1000
+
     @pyqtSlot()
     def update_plot_data(self):
-        if len(self.time_stamp) == 0:
-            self.time_stamp.append(self.interval)
-        else:
-            self.time_stamp.append(self.time_stamp[-1] + self.interval)
-
-        vehicle_stat = self._model.get_vehicle_status()
-
-        self.battery_voltage.append(vehicle_stat.battery_voltage)
-        self.battery_percentage.append(vehicle_stat.battery_percentage)
-        self.velocity.append(
-            Velocity(vehicle_stat.velocity.vx, vehicle_stat.velocity.vy, vehicle_stat.velocity.vz)
-        )
-        self.position.append(
-            Position(vehicle_stat.position.latitude, vehicle_stat.position.longitude, vehicle_stat.position.altitude)
-        )
-        self.attitude.append(
-            Attitude(vehicle_stat.attitude.roll, vehicle_stat.attitude.pitch, vehicle_stat.attitude.yaw)
+        if self._log_start is None:
+            self._log_start = time.monotonic()
+        for log in self._logs.values():
+            self._append_sample(log)
+
+    def _append_sample(self, log: "_VehicleLog"):
+        vehicle_stat = log.model.get_vehicle_status()
+
+        # Nothing new arrived since the last tick
+        if vehicle_stat.seq == log.last_seq:
+            return
+        log.last_seq = vehicle_stat.seq
+
+        log.store.append(
+            self._log_time(vehicle_stat.timestamp),
+            self._log_time(vehicle_stat.battery_time),
+            vehicle_stat.battery_voltage,
+            vehicle_stat.battery_percentage,
+            self._log_time(vehicle_stat.velocity_time),
+            vehicle_stat.velocity.vx, vehicle_stat.velocity.vy, vehicle_stat.velocity.vz,
+            self._log_time(vehicle_stat.position_time),
+            vehicle_stat.position.latitude, vehicle_stat.position.longitude, vehicle_stat.position.altitude,
+            self._log_time(vehicle_stat.attitude_time),
+            vehicle_stat.attitude.roll, vehicle_stat.attitude.pitch, vehicle_stat.attitude.yaw,
         )
 
     @pyqtSlot()
@@ -92,26 +156,27 @@ class DataLoggingWindow(QObject):
     @pyqtSlot()
     def download_log(self):
         index = self._view.get_combo_box_index()
+        col = self.store.column
         if index == 0:
-            plt.plot(self.time_stamp, self.battery_voltage)
+            plt.plot(col("t_battery"), col("battery_voltage"))
             plt.ylabel("Battery Voltage $(V)$")
         elif index == 1:
-            plt.plot(self.time_stamp, self.battery_percentage)
+            plt.plot(col("t_battery"), col("battery_percentage"))
             plt.ylabel("Battery Percentage")
         elif index == 2:
-            plt.plot(self.time_stamp, [vel.vx for vel in self.velocity], label="$V_x (m/s)$")
-            plt.plot(self.time_stamp, [vel.vy for vel in self.velocity], label="$V_y (m/s)$")
-            plt.plot(self.time_stamp, [vel.vz for vel in self.velocity], label="$V_z (m/s)$")
+            plt.plot(col("t_velocity"), col("vx"), label="$V_x (m/s)$")
+            plt.plot(col("t_velocity"), col("vy"), label="$V_y (m/s)$")
+            plt.plot(col("t_velocity"), col("vz"), label="$V_z (m/s)$")
             plt.ylabel("Velocity")
         elif index == 3:
-            plt.plot(self.time_stamp, [pos.latitude for pos in self.position], label="Latitude $(°)$")
-            plt.plot(self.time_stamp, [pos.longitude for pos in self.position], label="Longitude $(°)$")
-            plt.plot(self.time_stamp, [pos.altitude for pos in self.position], label="Altitude $(m)$")
+            plt.plot(col("t_position"), col("lat"), label="Latitude $(°)$")
+            plt.plot(col("t_position"), col("lon"), label="Longitude $(°)$")
+            plt.plot(col("t_position"), col("alt"), label="Altitude $(m)$")
             plt.ylabel("Position")
         elif index == 4:
-            plt.plot(self.time_stamp, [att.roll for att in self.attitude], label="Roll $(rad)$")
-            plt.plot(self.time_stamp, [att.pitch for att in self.attitude], label="Pitch $(rad)$")
-            plt.plot(self.time_stamp, [att.yaw for att in self.attitude], label="Yaw $(rad)$")
+            plt.plot(col("t_attitude"), col("roll"), label="Roll $(rad)$")
+            plt.plot(col("t_attitude"), col("pitch"), label="Pitch $(rad)$")
+            plt.plot(col("t_attitude"), col("yaw"), label="Yaw $(rad)$")
             plt.ylabel("Attitude")
 
 
@@ -123,27 +188,25 @@ class DataLoggingWindow(QObject):
 
     @pyqtSlot()
     def export_csv(self):
-        drone_data_table = np.array([
-            self.time_stamp,
-            self.battery_percentage,
-            self.battery_voltage,
-            [vel.vx for vel in self.velocity],
-            [vel.vy for vel in self.velocity],
-            [vel.vz for vel in self.velocity],
-            [pos.latitude for pos in self.position],
-            [pos.longitude for pos in self.position],
-            [pos.altitude for pos in self.position],
-            [att.roll for att in self.attitude],
-            [att.pitch for att in self.attitude],
-            [att.yaw for att in self.attitude]
-        ]).T
-        drone_df = pd.DataFrame(
-            drone_data_table,
-            columns=["time(ms)", "battery_percentage(%)", "battery_voltage(V)",
-                     "vx(m/s)", "vy(m/s)", "vz(m/s)",
-                     "lat(°)", "lon(°)", "alt(m)",
-                     "roll(rad)", "pitch(rad)", "yaw(rad)"]
-        )
+        col = self.store.column
+        drone_df = pd.DataFrame({
+            "time(ms)": col("time"),
+            "battery_time(ms)": col("t_battery"),
+            "battery_percentage(%)": col("battery_percentage"),
+            "battery_voltage(V)": col("battery_voltage"),
+            "velocity_time(ms)": col("t_velocity"),
+            "vx(m/s)": col("vx"),
+            "vy(m/s)": col("vy"),
+            "vz(m/s)": col("vz"),
+            "position_time(ms)": col("t_position"),
+            "lat(°)": col("lat"),
+            "lon(°)": col("lon"),
+            "alt(m)": col("alt"),
+            "attitude_time(ms)": col("t_attitude"),
+            "roll(rad)": col("roll"),
+            "pitch(rad)": col("pitch"),
+            "yaw(rad)": col("yaw"),
+        }, copy=False)
 
         options = QFileDialog.Options()
         options |= QFileDialog.DontUseNativeDialog
@@ -151,7 +214,7 @@ class DataLoggingWindow(QObject):
         file_path, _ = QFileDialog.getSaveFileName(
             self._view,
             "Save File",
-            "drone_data.csv",
+            f"drone_data_{self._model.name}.csv" if len(self._logs) > 1 else "drone_data.csv",
             "CSV Files (*.csv);;All Files (*)",
             options=options
         )
@@ -162,6 +225,8 @@ class DataLoggingWindow(QObject):
 
 class DataLoggingWindowUI(QWidget):
     window_closed_signal = pyqtSignal()
+    window_shown_signal = pyqtSignal()
+    window_hidden_signal = pyqtSignal()
 
     log_data_button_clicked_signal = pyqtSignal()
     set_interval_button_clicked_signal = pyqtSignal()
@@ -246,44 +311,43 @@ class DataLoggingWindowUI(QWidget):
         self.pushButton_3.setText(_translate("Widget", "Download Log"))
         self.pushButton_4.setText(_translate("Widget", "Export CSV File"))
 
-    @pyqtSlot(int)
-    def update_plot(self, index, time_stamp: list[int], battery_voltage: float, battery_percentage: float,
-                    velocity: list['Velocity'], position: list['Position'], attitude: list['Attitude']):
+    def update_plot(self, index, store: 'TelemetryStore'):
         legend = self.graphicsView_2.getPlotItem().legend
+        col = store.column
         if index == 0:
-            self.data_line_a.setData(time_stamp, battery_voltage)
+            self.data_line_a.setData(col("t_battery"), col("battery_voltage"))
             self.data_line_b.clear()
             self.data_line_c.clear()
             self.graphicsView_2.setTitle("Battery Voltage")
             legend.setVisible(False)
         elif index == 1:
-            self.data_line_a.setData(time_stamp, battery_percentage)
+            self.data_line_a.setData(col("t_battery"), col("battery_percentage"))
             self.data_line_b.clear()
             self.data_line_c.clear()
             self.graphicsView_2.setTitle("Battery Percentage")
             legend.setVisible(False)
         elif index == 2:
-            self.data_line_a.setData(time_stamp, [vel.vx for vel in velocity])
-            self.data_line_b.setData(time_stamp, [vel.vy for vel in velocity])
-            self.data_line_c.setData(time_stamp, [vel.vz for vel in velocity])
+            self.data_line_a.setData(col("t_velocity"), col("vx"))
+            self.data_line_b.setData(col("t_velocity"), col("vy"))
+            self.data_line_c.setData(col("t_velocity"), col("vz"))
             self.graphicsView_2.setTitle("Velocity")
             legend.setVisible(True)
             legend.getLabel(self.data_line_a).setText("Velocity X")
             legend.getLabel(self.data_line_b).setText("Velocity Y")
             legend.getLabel(self.data_line_c).setText("Velocity Z")
         elif index == 3:
-            self.data_line_a.setData(time_stamp, [pos.latitude for pos in position])
-            self.data_line_b.setData(time_stamp, [pos.longitude for pos in position])
-            self.data_line_c.setData(time_stamp, [pos.altitude for pos in position])
+            self.data_line_a.setData(col("t_position"), col("lat"))
+            self.data_line_b.setData(col("t_position"), col("lon"))
+            self.data_line_c.setData(col("t_position"), col("alt"))
             self.graphicsView_2.setTitle("Position")
             legend.setVisible(True)
             legend.getLabel(self.data_line_a).setText("Latitude")
             legend.getLabel(self.data_line_b).setText("Longitude")
             legend.getLabel(self.data_line_c).setText("Altitude")
         elif index == 4:
-            self.data_line_a.setData(time_stamp, [att.roll for att in attitude])
-            self.data_line_b.setData(time_stamp, [att.pitch for att in attitude])
-            self.data_line_c.setData(time_stamp, [att.yaw for att in attitude])
+            self.data_line_a.setData(col("t_attitude"), col("roll"))
+            self.data_line_b.setData(col("t_attitude"), col("pitch"))
+            self.data_line_c.setData(col("t_attitude"), col("yaw"))
             self.graphicsView_2.setTitle("Attitude")
             legend.setVisible(True)
             legend.getLabel(self.data_line_a).setText("Roll")
@@ -311,6 +375,19 @@ class DataLoggingWindowUI(QWidget):
         self.pushButton_4.clicked.connect(self.export_csv_button_clicked_signal)
         self.comboBox.currentIndexChanged.connect(self.combo_box_current_index_changed_signal)
 
+    def set_vehicle_name(self, name: str | None):
+        # The vehicle whose log is shown, None with a single vehicle
+        self.setWindowTitle("Data Logger" if name is None else f"Data Logger - {name}")
+
+    def showEvent(self, e):
+        super().showEvent(e)
+        self.window_shown_signal.emit()
+
+    def hideEvent(self, e):
+        # Also sent, spontaneously, when the window is minimised
+        super().hideEvent(e)
+        self.window_hidden_signal.emit()
+
     def closeEvent(self, e):
         e.ignore()
         self.hide()
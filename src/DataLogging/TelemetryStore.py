@@ -0,0 +1,92 @@
+import numpy as np
+
+
+class TelemetryStore:
+    """
+    Preallocated columnar store, one float64 row per channel.
+
+    The buffer starts at ``capacity`` samples and at least doubles whenever it is full, so a long log
+    costs few copies without reserving memory for samples that may never come. Without
+    ``max_samples`` the store keeps everything. With ``max_samples`` it keeps only the newest
+    ``max_samples`` samples (ring). The ring's buffer grows up to ``max_samples`` plus some slack at
+    the end: once the slack is used up the newest samples are moved back to the front in one copy, so
+    every column is always a single contiguous slice.
+
+    ``column()`` / ``view()`` return zero-copy, read-only views. They are only valid until the next
+    ``append()``.
+    """
+
+    def __init__(self, columns: list[str], capacity: int = 4096, max_samples: int | None = None):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if max_samples is not None and max_samples <= 0:
+            raise ValueError("max_samples must be positive")
+
+        self.columns = tuple(columns)
+        self._index = {name: i for i, name in enumerate(self.columns)}
+        self._chunk = capacity
+        self._max_samples = max_samples
+        self._max_size = None if max_samples is None else max_samples + max(1, max_samples // 4)
+
+        size = capacity if self._max_size is None else min(capacity, self._max_size)
+        self._buffer = np.zeros((len(self.columns), size), dtype=np.float64)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def nbytes(self) -> int:
+        return self._buffer.nbytes
+
+    @property
+    def bytes_per_sample(self) -> int:
+        return self._buffer.itemsize * len(self.columns)
+
+    def clear(self):
+        self._start = 0
+        self._end = 0
+
+    def append(self, *values: float):
+        if len(values) != len(self.columns):
+            raise ValueError(f"expected {len(self.columns)} values, got {len(values)}")
+
+        if self._end == self._buffer.shape[1]:
+            self._make_room()
+
+        self._buffer[:, self._end] = values
+        self._end += 1
+
+        if self._max_samples is not None and self._end - self._start > self._max_samples:
+            self._start += 1
+
+    def _make_room(self):
+        n = self._end - self._start
+        size = self._buffer.shape[1]
+        if self._max_size is None or size < self._max_size:
+            size = max(2 * size, size + self._chunk)
+            if self._max_size is not None:
+                size = min(size, self._max_size)
+            grown = np.zeros((self._buffer.shape[0], size), dtype=np.float64)
+            grown[:, :n] = self._buffer[:, self._start:self._end]
+            self._buffer = grown
+        else:
+            self._buffer[:, :n] = self._buffer[:, self._start:self._end]
+        self._start = 0
+        self._end = n
+
+    def column(self, name: str) -> np.ndarray:
+        col = self._buffer[self._index[name], self._start:self._end]
+        col.flags.writeable = False
+        return col
+
+    def view(self) -> np.ndarray:
+        data = self._buffer[:, self._start:self._end]
+        data.flags.writeable = False
+        return data
+
+    def last(self, name: str) -> float | None:
+        if self._end == self._start:
+            return None
+        return float(self._buffer[self._index[name], self._end - 1])
@@ -0,0 +1,128 @@
+import time
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+from PyQt5.QtCore import pyqtSignal, pyqtSlot, QObject
+from PyQt5.QtWidgets import QWidget, QFileDialog
+
+from DroneModel import DroneModel
+
+REFRESH_INTERVAL_MS = 1000
+
+
+class DiagnosticsWindow(QObject):
+    def __init__(self, view: "DiagnosticsWindowUI", model: "DroneModel"):
+        super().__init__()
+        self._view = view
+        self._model = model
+
+        # Only refreshes while the window is open
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(REFRESH_INTERVAL_MS)
+
+        self.connect_signals_and_slots()
+
+    def set_model(self, model: "DroneModel"):
+        self._model = model
+        self.refresh()
+
+    def connect_signals_and_slots(self):
+        self._view.export_button_clicked_signal.connect(self.export_snapshot)
+        self._view.reset_button_clicked_signal.connect(self.reset)
+        self._view.window_shown_signal.connect(self.on_window_shown)
+        self._view.window_hidden_signal.connect(self.timer.stop)
+        self.timer.timeout.connect(self.refresh)
+
+    @pyqtSlot()
+    def on_window_shown(self):
+        self.refresh()
+        self.timer.start()
+
+    @pyqtSlot()
+    def refresh(self):
+        self._view.set_text(self._model.diagnostics_text())
+
+    @pyqtSlot()
+    def reset(self):
+        self._model.metrics.reset()
+        self.refresh()
+
+    @pyqtSlot()
+    def export_snapshot(self):
+        text = f"# {time.strftime('%Y-%m-%d %H:%M:%S')}\n" + self._model.diagnostics_text() + "\n"
+
+        options = QFileDialog.Options()
+        options |= QFileDialog.DontUseNativeDialog
+
+        file_path, _ = QFileDialog.getSaveFileName(
+            self._view,
+            "Save File",
+            f"diagnostics_{time.strftime('%Y%m%d_%H%M%S')}.txt",
+            "Text Files (*.txt);;All Files (*)",
+            options=options
+        )
+
+        if file_path:
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(text)
+
+
+class DiagnosticsWindowUI(QWidget):
+    window_closed_signal = pyqtSignal()
+    window_shown_signal = pyqtSignal()
+    window_hidden_signal = pyqtSignal()
+
+    export_button_clicked_signal = pyqtSignal()
+    reset_button_clicked_signal = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+
+        self.resize(720, 560)
+        self.setMinimumSize(QtCore.QSize(480, 320))
+
+        self.layout = QtWidgets.QVBoxLayout(self)
+
+        self.text_edit = QtWidgets.QPlainTextEdit(self)
+        self.text_edit.setReadOnly(True)
+        self.text_edit.setLineWrapMode(QtWidgets.QPlainTextEdit.NoWrap)
+        self.text_edit.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        self.layout.addWidget(self.text_edit)
+
+        self.button_layout = QtWidgets.QHBoxLayout()
+
+        self.reset_button = QtWidgets.QPushButton("Reset Metrics", self)
+        self.button_layout.addWidget(self.reset_button)
+
+        self.export_button = QtWidgets.QPushButton("Export Snapshot", self)
+        self.export_button.setStyleSheet("font-weight: bold;")
+        self.button_layout.addWidget(self.export_button)
+
+        self.layout.addLayout(self.button_layout)
+
+        self.setWindowTitle("Diagnostics")
+        self.setWindowIcon(QtGui.QIcon(':/image-placeholder.png'))
+
+        self.connect_signals_and_slots()
+
+    def set_text(self, text: str):
+        # Keep the scroll position across refreshes
+        scroll = self.text_edit.verticalScrollBar().value()
+        self.text_edit.setPlainText(text)
+        self.text_edit.verticalScrollBar().setValue(scroll)
+
+    def connect_signals_and_slots(self):
+        self.export_button.clicked.connect(self.export_button_clicked_signal)
+        self.reset_button.clicked.connect(self.reset_button_clicked_signal)
+
+    def showEvent(self, e):
+        super().showEvent(e)
+        self.window_shown_signal.emit()
+
+    def hideEvent(self, e):
+        super().hideEvent(e)
+        self.window_hidden_signal.emit()
+
+    def closeEvent(self, e):
+        e.ignore()
+        self.hide()
+        self.window_closed_signal.emit()
@@ -0,0 +1,142 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal, pyqtSlot
+
+from VehicleStatus import Position
+
+COMMAND_TIMEOUT_S = 10.0
+
+
+class CommandError(Exception):
+    pass
+
+
+class DroneCommands(QObject):
+    """
+    Non-blocking front end for the DroneModel coroutines.
+
+    Every call schedules the coroutine on the model's event loop and returns a
+    ``concurrent.futures.Future`` right away, so the GUI thread never waits on MAVLink. ``cancel()`` on
+    the future cancels the command. Completion is reported with ``command_finished`` /
+    ``command_failed`` and the optional ``on_done(result)`` / ``on_error(message)`` callbacks, all
+    delivered on the Qt thread. A command that returns False (the DroneModel convention for a rejected
+    command) or a result that is not ``ok`` counts as failed.
+    """
+
+    command_started = pyqtSignal(str)
+    command_finished = pyqtSignal(str, object)
+    command_failed = pyqtSignal(str, str)
+
+    # (callback, argument), always queued so callbacks run on the thread this object lives in
+    _deliver = pyqtSignal(object, object)
+
+    def __init__(self, model, parent: QObject = None):
+        super().__init__(parent)
+        self._model = model
+        self._pending: set[concurrent.futures.Future] = set()
+        self._lock = threading.Lock()
+
+        self._deliver.connect(self._on_deliver, Qt.QueuedConnection)
+
+    def submit(self, name: str, coro, timeout: float | None = COMMAND_TIMEOUT_S, on_done=None,
+               on_error=None) -> 'concurrent.futures.Future':
+        loop = self._model.event_loop
+        if loop is None or not loop.is_running():
+            coro.close()
+            future = concurrent.futures.Future()
+            future.set_exception(CommandError("vehicle event loop is not running"))
+        else:
+            future = asyncio.run_coroutine_threadsafe(self._run(coro, timeout), loop)
+            with self._lock:
+                self._pending.add(future)
+
+        self.command_started.emit(name)
+        start = time.perf_counter()
+        future.add_done_callback(lambda f: self._on_future_done(name, f, start, on_done, on_error))
+        return future
+
+    @staticmethod
+    async def _run(coro, timeout: float | None):
+        if timeout is None:
+            return await coro
+        return await asyncio.wait_for(coro, timeout)
+
+    def _on_future_done(self, name: str, future: 'concurrent.futures.Future', start: float, on_done, on_error):
+        with self._lock:
+            self._pending.discard(future)
+        self._model.metrics.histogram(f"command.{name}_s").observe(time.perf_counter() - start)
+
+        if future.cancelled():
+            error = "cancelled"
+        else:
+            exception = future.exception()
+            # asyncio.TimeoutError is only an alias of TimeoutError from Python 3.11 on
+            if isinstance(exception, (asyncio.TimeoutError, TimeoutError)):
+                error = "timed out"
+            elif exception is not None:
+                error = str(exception) or type(exception).__name__
+            elif future.result() is False or getattr(future.result(), "ok", True) is False:
+                error = "rejected"
+            else:
+                error = None
+
+        if error is None:
+            result = future.result()
+            self.command_finished.emit(name, result)
+            if on_done is not None:
+                self._deliver.emit(on_done, result)
+        else:
+            self._model.metrics.counter(f"command.{name}.failed").inc()
+            print(f"{self._model.name} {name}: {error}")
+            self.command_failed.emit(name, error)
+            if on_error is not None:
+                self._deliver.emit(on_error, error)
+
+    @pyqtSlot(object, object)
+    def _on_deliver(self, callback, argument):
+        callback(argument)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def cancel_all(self):
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.cancel()
+
+    # --------------------------------
+    # Commands
+
+    def arm(self, **kwargs) -> 'concurrent.futures.Future':
+        return self.submit("arm", self._model.arm(), **kwargs)
+
+    def disarm(self, **kwargs) -> 'concurrent.futures.Future':
+        return self.submit("disarm", self._model.disarm(), **kwargs)
+
+    def takeoff(self, altitude: float, **kwargs) -> 'concurrent.futures.Future':
+        return self.submit("takeoff", self._model.takeoff(altitude), **kwargs)
+
+    def land(self, **kwargs) -> 'concurrent.futures.Future':
+        return self.submit("land", self._model.land(), **kwargs)
+
+    def goto_location(self, pos: 'Position', **kwargs) -> 'concurrent.futures.Future':
+        return self.submit("goto_location", self._model.goto_location(pos), **kwargs)
+
+    def refresh_parameters(self, **kwargs) -> 'concurrent.futures.Future':
+        return self.submit("refresh_parameters", self._model.refresh_parameters(), **kwargs)
+
+    def write_parameters(self, values: dict[str, float], group: str = "params",
+                         **kwargs) -> 'concurrent.futures.Future':
+        return self.submit("write_parameters", self._model.write_parameters(values, group), **kwargs)
+
+    def set_pid_params(self, group: str, gains: dict[str, tuple[float, float, float]],
+                       **kwargs) -> 'concurrent.futures.Future':
+        return self.submit("set_pid_params", self._model.set_pid_params(group, gains), **kwargs)
+
+    def optimise_route(self, **kwargs) -> 'concurrent.futures.Future':
+        return self.submit("optimise_route", self._model.optimise_waypoints(), **kwargs)
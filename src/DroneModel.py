@@ -1,11 +1,23 @@
 import threading
 import asyncio
 import math
+import time
 
 import numpy as np
-from PyQt5.QtCore import QObject, pyqtSignal
-
-from VehicleStatus import VehicleStatus, FlightMode, Position, Attitude, Velocity
+from PyQt5.QtCore import QObject
+
+from VehicleStatus import VehicleStatus, VehicleStatusPublisher, FlightMode, Position, Attitude, Velocity
+from UiUpdateScheduler import UiUpdateScheduler
+from FlightRecorder import FlightRecorder
+from Metrics import MetricsRegistry, InstrumentedLock, monitor_loop_lag
+from ParameterCache import ParameterCache, ParameterWriteResult
+from DroneCommands import DroneCommands
+from MissionExecutor import MissionExecutor
+from Geodesy import LocalTangentPlane, ArrivalTarget, WaypointProximity
+from MissionStore import MissionStore, MissionSnapshot
+from FlightTrack import FlightTrack
+from RouteOptimizer import RouteResult, optimise_route
+from TelemetryRates import TelemetryProfile, StreamRate, StreamRateMeter, RATE_SETTERS, TELEMETRY_PROFILES
 
 import mavsdk
 from mavsdk import System
@@ -14,44 +26,96 @@ from mavsdk.action import ActionError
 ALLOWABLE_HORIZONTAL_DISTANCE_TO_WAYPOINT = 1.0
 ALLOWABLE_VERTICAL_DISTANCE_TO_WAYPOINT = 1.0
 
+# Channels marked dirty on ui_scheduler when the matching part of the vehicle status changes
+CHANNEL_STATUS = "status"
+CHANNEL_POSITION = "position"
+CHANNEL_ATTITUDE = "attitude"
+CHANNEL_VELOCITY = "velocity"
+CHANNEL_BATTERY = "battery"
+CHANNEL_WAYPOINTS = "waypoints"
+
+# VehicleStatus field holding the receive time of each channel
+CHANNEL_TIME_FIELDS = {
+    CHANNEL_POSITION: "position_time",
+    CHANNEL_ATTITUDE: "attitude_time",
+    CHANNEL_VELOCITY: "velocity_time",
+    CHANNEL_BATTERY: "battery_time",
+}
+
+# PX4 parameters behind the P, I and D gain of each PID group and axis, None where the controller has no such term
+PID_PARAMETERS = {
+    "attitude": {
+        "roll": ("MC_ROLL_P", None, None),
+        "pitch": ("MC_PITCH_P", None, None),
+        "yaw": ("MC_YAW_P", None, None),
+    },
+    "rate": {
+        "roll": ("MC_ROLLRATE_P", "MC_ROLLRATE_I", "MC_ROLLRATE_D"),
+        "pitch": ("MC_PITCHRATE_P", "MC_PITCHRATE_I", "MC_PITCHRATE_D"),
+        "yaw": ("MC_YAWRATE_P", "MC_YAWRATE_I", "MC_YAWRATE_D"),
+    },
+    "position": {
+        "x": ("MPC_XY_P", None, None),
+        "y": ("MPC_XY_P", None, None),
+        "z": ("MPC_Z_P", None, None),
+    },
+    "velocity": {
+        "x": ("MPC_XY_VEL_P_ACC", "MPC_XY_VEL_I_ACC", "MPC_XY_VEL_D_ACC"),
+        "y": ("MPC_XY_VEL_P_ACC", "MPC_XY_VEL_I_ACC", "MPC_XY_VEL_D_ACC"),
+        "z": ("MPC_Z_VEL_P_ACC", "MPC_Z_VEL_I_ACC", "MPC_Z_VEL_D_ACC"),
+    },
+}
+
+# Telemetry streams consumed by the _monitor_* coroutines
+TELEMETRY_STREAMS = ("connection", "health", "position", "attitude", "velocity", "battery", "flight_mode", "armed",
+                     "in_air")
 
-class DroneModel(QObject):
-    ui_update_signal = pyqtSignal(bool)
 
+class DroneModel(QObject):
 
-    def __init__(self, connection_address: str = "udp://:14540"):
+    def __init__(self, connection_address: str = "udp://:14540",
+                 telemetry_profile: 'TelemetryProfile' = TELEMETRY_PROFILES["default"],
+                 mavsdk_port: int = 50051, name: str = "Vehicle", system=None):
         super().__init__()
-        self.drone = System()
+        # Every System spawns its own mavsdk_server, so vehicles sharing a process need distinct ports.
+        # `system` replaces mavsdk entirely (FakeSystem for offline testing).
+        self.drone = system if system is not None else System(port=mavsdk_port)
+        self.mavsdk_port = mavsdk_port
+        self.name = name
         self.connection_address = connection_address
         self.connected = False
         self.coordinates = []
 
-        self._waypoints: list['Position'] = []
-        self._vehicle_status = VehicleStatus()
+        self.metrics = MetricsRegistry()
+
+        self._status_publisher = VehicleStatusPublisher(lock=InstrumentedLock(self.metrics, "vehicle_status"))
+        self.ui_scheduler = UiUpdateScheduler(self)
 
-        self._vehicle_status_lock = threading.Lock()
-        self._waypoints_lock = threading.Lock()
+        self._telemetry_profile = telemetry_profile
+        self._rate_meters = {stream: StreamRateMeter() for stream in TELEMETRY_STREAMS}
+        self._recorder: 'FlightRecorder | None' = None
+        self.parameters = ParameterCache()
+        # Bulk load in flight on the event loop, concurrent refresh_parameters() calls wait on it
+        self._parameter_refresh: 'asyncio.Future | None' = None
+        # Non-blocking commands for the GUI, the *_sync methods below block the caller
+        self.commands = DroneCommands(self, self)
+
+        self._waypoints = MissionStore(lock=InstrumentedLock(self.metrics, "waypoints"))
+        self.mission = MissionExecutor(self)
+        self._track = FlightTrack(lock=InstrumentedLock(self.metrics, "track"))
+
+        # Arrival checks run on a local plane, the current target and the look-ahead index are
+        # projected once, keyed by waypoint id and mission version
+        self._plane: 'LocalTangentPlane | None' = None
+        self._arrival_target: tuple[int, 'ArrivalTarget'] | None = None
+        self._proximity: tuple[int, 'WaypointProximity'] | None = None
 
         self.running = False
         self.main_task = None
-        self.ui_updater_task = None
         self.event_loop = None
         self.loop_ready_event = threading.Event()
         self.thread = None
 
-        self._initialize_status()
-
-    def _initialize_status(self):
-        self._vehicle_status.heartbeat = False
-        self._vehicle_status.armed = False
-        self._vehicle_status.in_air = False
-        self._vehicle_status.position = Position(0.0, 0.0, 0.0)
-        self._vehicle_status.attitude = Attitude(0.0, 0.0, 0.0)
-        self._vehicle_status.velocity = Velocity(0.0, 0.0, 0.0)
-        self._vehicle_status.battery_percentage = 0.0
-        self._vehicle_status.battery_voltage = 0.0
-        self._vehicle_status.flight_mode = FlightMode.MANUAL
-    
     def _run_event_loop(self):
         asyncio.set_event_loop(self.event_loop)
         self.event_loop.run_forever()
@@ -72,18 +136,8 @@ class DroneModel(QObject):
                 break
             
     async def set_attitude_pid_params(self, p_gain: float, i_gain: float, d_gain: float, axis: str = "roll"):
-        try:
-            if axis.lower() == "roll":
-                await self.drone.param.set_param_float("MC_ROLL_P", p_gain)
-            elif axis.lower() == "pitch":
-                await self.drone.param.set_param_float("MC_PITCH_P", p_gain)
-            elif axis.lower() == "yaw":
-                await self.drone.param.set_param_float("MC_YAW_P", p_gain)
-
-            return True
-        except Exception as e:
-            print(e)
-            return False
+        # Attitude controller only has P gain, no I or D
+        return await self.set_pid_params("attitude", {axis: (p_gain, i_gain, d_gain)})
 
     def set_attitude_pid_params_sync(self, p_gain: float, i_gain: float, d_gain: float, axis: str = "roll"):
         if self.event_loop is None or not self.event_loop.is_running():
@@ -93,14 +147,14 @@ class DroneModel(QObject):
     async def get_attitude_pid_params(self, axis: str = "roll"):
         try:
             if axis.lower() == "roll":
-                p = await self.drone.param.get_param_float("MC_ROLL_P")
+                p = await self._get_param("MC_ROLL_P")
                 # Attitude controller only has P gain, no I or D
                 return {"p": p, "i": 0.0, "d": 0.0}
             elif axis.lower() == "pitch":
-                p = await self.drone.param.get_param_float("MC_PITCH_P")
+                p = await self._get_param("MC_PITCH_P")
                 return {"p": p, "i": 0.0, "d": 0.0}
             elif axis.lower() == "yaw":
-                p = await self.drone.param.get_param_float("MC_YAW_P")
+                p = await self._get_param("MC_YAW_P")
                 return {"p": p, "i": 0.0, "d": 0.0}
             return {"p": 0.0, "i": 0.0, "d": 0.0}
         except Exception as e:
@@ -116,19 +170,19 @@ class DroneModel(QObject):
     async def get_rate_pid_params(self, axis: str = "roll"):
         try:
             if axis.lower() == "roll":
-                p = await self.drone.param.get_param_float("MC_ROLLRATE_P")
-                i = await self.drone.param.get_param_float("MC_ROLLRATE_I")
-                d = await self.drone.param.get_param_float("MC_ROLLRATE_D")
+                p = await self._get_param("MC_ROLLRATE_P")
+                i = await self._get_param("MC_ROLLRATE_I")
+                d = await self._get_param("MC_ROLLRATE_D")
                 return {"p": p, "i": i, "d": d}
             elif axis.lower() == "pitch":
-                p = await self.drone.param.get_param_float("MC_PITCHRATE_P")
-                i = await self.drone.param.get_param_float("MC_PITCHRATE_I")
-                d = await self.drone.param.get_param_float("MC_PITCHRATE_D")
+                p = await self._get_param("MC_PITCHRATE_P")
+                i = await self._get_param("MC_PITCHRATE_I")
+                d = await self._get_param("MC_PITCHRATE_D")
                 return {"p": p, "i": i, "d": d}
             elif axis.lower() == "yaw":
-                p = await self.drone.param.get_param_float("MC_YAWRATE_P")
-                i = await self.drone.param.get_param_float("MC_YAWRATE_I")
-                d = await self.drone.param.get_param_float("MC_YAWRATE_D")
+                p = await self._get_param("MC_YAWRATE_P")
+                i = await self._get_param("MC_YAWRATE_I")
+                d = await self._get_param("MC_YAWRATE_D")
                 return {"p": p, "i": i, "d": d}
             return {"p": 0.0, "i": 0.0, "d": 0.0}
         except Exception as e:
@@ -139,26 +193,17 @@ class DroneModel(QObject):
         return self.run_async(self.get_rate_pid_params(axis))
     
     async def set_position_pid_params(self, p_gain: float, i_gain: float, d_gain: float, axis: str = "x"):
-        try:
-            if axis.lower() in ["x", "y"]:
-                await self.drone.param.set_param_float("MPC_XY_P", p_gain)
-            elif axis.lower() == "z":
-                await self.drone.param.set_param_float("MPC_Z_P", p_gain)
-            return True
-        except Exception as e:
-            print(e)
-            return False
-    
+        # Position controller only has P gain, no I or D
+        return await self.set_pid_params("position", {axis: (p_gain, i_gain, d_gain)})
 
-    
     async def get_position_pid_params(self, axis: str = "x"):
         try:
             if axis.lower() in ["x", "y"]:
-                p = await self.drone.param.get_param_float("MPC_XY_P")
+                p = await self._get_param("MPC_XY_P")
                 # Position controller only has P gain, no I or D
                 return {"p": p, "i": 0.0, "d": 0.0}
             elif axis.lower() == "z":
-                p = await self.drone.param.get_param_float("MPC_Z_P")
+                p = await self._get_param("MPC_Z_P")
                 return {"p": p, "i": 0.0, "d": 0.0}
             return {"p": 0.0, "i": 0.0, "d": 0.0}
         except Exception as e:
@@ -177,14 +222,14 @@ class DroneModel(QObject):
     async def get_velocity_pid_params(self, axis: str = "x"):
         try:
             if axis.lower() in ["x", "y"]:
-                p = await self.drone.param.get_param_float("MPC_XY_VEL_P_ACC")
-                i = await self.drone.param.get_param_float("MPC_XY_VEL_I_ACC")
-                d = await self.drone.param.get_param_float("MPC_XY_VEL_D_ACC")
+                p = await self._get_param("MPC_XY_VEL_P_ACC")
+                i = await self._get_param("MPC_XY_VEL_I_ACC")
+                d = await self._get_param("MPC_XY_VEL_D_ACC")
                 return {"p": p, "i": i, "d": d}
             elif axis.lower() == "z":
-                p = await self.drone.param.get_param_float("MPC_Z_VEL_P_ACC")
-                i = await self.drone.param.get_param_float("MPC_Z_VEL_I_ACC")
-                d = await self.drone.param.get_param_float("MPC_Z_VEL_D_ACC")
+                p = await self._get_param("MPC_Z_VEL_P_ACC")
+                i = await self._get_param("MPC_Z_VEL_I_ACC")
+                d = await self._get_param("MPC_Z_VEL_D_ACC")
                 return {"p": p, "i": i, "d": d}
             return {"p": 0.0, "i": 0.0, "d": 0.0}
         except Exception as e:
@@ -195,69 +240,52 @@ class DroneModel(QObject):
         return self.run_async(self.get_velocity_pid_params(axis))
 
     
+    def _set_all_pid_params_sync(self, group: str, gains: dict[str, dict]) -> bool:
+        # Every axis of the group is written in a single transaction, all or nothing
+        pid_gains = {axis: (pid["p"], pid.get("i", 0.0), pid.get("d", 0.0)) for axis, pid in gains.items()}
+        if not pid_gains:
+            return True
+        return bool(self.run_async(self.set_pid_params(group, pid_gains)))
+
     def set_all_attitude_pid_params(self, roll_pid: dict, pitch_pid: dict, yaw_pid: dict):
         try:
-            if "p" in roll_pid:
-                self.set_attitude_pid_params_sync(roll_pid["p"], 0, 0, "roll")
-            if "p" in pitch_pid:
-                self.set_attitude_pid_params_sync(pitch_pid["p"], 0, 0, "pitch")
-            if "p" in yaw_pid:
-                self.set_attitude_pid_params_sync(yaw_pid["p"], 0, 0, "yaw")
-            return True
+            gains = {axis: pid for axis, pid in (("roll", roll_pid), ("pitch", pitch_pid), ("yaw", yaw_pid))
+                     if "p" in pid}
+            return self._set_all_pid_params_sync("attitude", gains)
         except Exception as e:
             print(e)
             return False
-    
+
     def set_all_rate_pid_params(self, roll_pid: dict, pitch_pid: dict, yaw_pid: dict):
         try:
-            if all(k in roll_pid for k in ["p", "i", "d"]):
-                self.set_rate_pid_params_sync(roll_pid["p"], roll_pid["i"], roll_pid["d"], "roll")
-            if all(k in pitch_pid for k in ["p", "i", "d"]):
-                self.set_rate_pid_params_sync(pitch_pid["p"], pitch_pid["i"], pitch_pid["d"], "pitch")
-            if all(k in yaw_pid for k in ["p", "i", "d"]):
-                self.set_rate_pid_params_sync(yaw_pid["p"], yaw_pid["i"], yaw_pid["d"], "yaw")
-            return True
+            gains = {axis: pid for axis, pid in (("roll", roll_pid), ("pitch", pitch_pid), ("yaw", yaw_pid))
+                     if all(k in pid for k in ["p", "i", "d"])}
+            return self._set_all_pid_params_sync("rate", gains)
         except Exception as e:
             print(e)
             return False
-    
+
     def set_all_position_pid_params(self, xy_pid: dict, z_pid: dict):
         try:
-            if all(k in xy_pid for k in ["p", "i", "d"]):
-                self.set_position_pid_params_sync(xy_pid["p"], xy_pid["i"], xy_pid["d"], "x")
-            if all(k in z_pid for k in ["p", "i", "d"]):
-                self.set_position_pid_params_sync(z_pid["p"], z_pid["i"], z_pid["d"], "z")
-            return True
+            gains = {axis: pid for axis, pid in (("x", xy_pid), ("z", z_pid))
+                     if all(k in pid for k in ["p", "i", "d"])}
+            return self._set_all_pid_params_sync("position", gains)
         except Exception as e:
             print(e)
             return False
-    
+
     def set_all_velocity_pid_params(self, xy_pid: dict, z_pid: dict):
         try:
-            if all(k in xy_pid for k in ["p", "i", "d"]):
-                self.set_velocity_pid_params_sync(xy_pid["p"], xy_pid["i"], xy_pid["d"], "x")
-            if all(k in z_pid for k in ["p", "i", "d"]):
-                self.set_velocity_pid_params_sync(z_pid["p"], z_pid["i"], z_pid["d"], "z")
-            return True
+            gains = {axis: pid for axis, pid in (("x", xy_pid), ("z", z_pid))
+                     if all(k in pid for k in ["p", "i", "d"])}
+            return self._set_all_pid_params_sync("velocity", gains)
         except Exception as e:
             print(e)
             return False
-    
+
     async def set_rate_pid_params(self, p_gain: float, i_gain: float, d_gain: float, axis: str = "roll"):
-        try:
-            param_name_p = f"MC_{axis.upper()}RATE_P"
-            param_name_i = f"MC_{axis.upper()}RATE_I"
-            param_name_d = f"MC_{axis.upper()}RATE_D"
+        return await self.set_pid_params("rate", {axis: (p_gain, i_gain, d_gain)})
 
-            
-            await self.drone.param.set_param_float(param_name_p, p_gain)
-            await self.drone.param.set_param_float(param_name_i, i_gain)
-            await self.drone.param.set_param_float(param_name_d, d_gain)
-            return True
-        except Exception as e:
-            print(e)
-            return False
-    
     def set_rate_pid_params_sync(self, p_gain: float, i_gain: float, d_gain: float, axis: str = "roll"):
         return self.run_async(self.set_rate_pid_params(p_gain, i_gain, d_gain, axis))
 
@@ -265,65 +293,183 @@ class DroneModel(QObject):
         return self.run_async(self.set_position_pid_params(p_gain, i_gain, d_gain, axis))
 
     async def set_velocity_pid_params(self, p_gain: float, i_gain: float, d_gain: float, axis: str = "x"):
+        return await self.set_pid_params("velocity", {axis: (p_gain, i_gain, d_gain)})
+
+    async def refresh_parameters(self):
+        # One round trip for every parameter of the vehicle, shared by every caller while it is in flight
+        if self._parameter_refresh is None:
+            self._parameter_refresh = asyncio.ensure_future(self._load_all_parameters())
+            self._parameter_refresh.add_done_callback(self._on_parameter_refresh_done)
+        # A cancelled caller does not cancel the load the others are waiting on
+        await asyncio.shield(self._parameter_refresh)
+
+    async def _load_all_parameters(self):
+        self.parameters.load(await self.drone.param.get_all_params())
+        self.metrics.counter("param.bulk_loads").inc()
+
+    def _on_parameter_refresh_done(self, future: 'asyncio.Future'):
+        self._parameter_refresh = None
+        if not future.cancelled():
+            # Retrieved here too, every caller may have given up on it
+            future.exception()
+
+    async def _get_param(self, name: str) -> float:
+        if not self.parameters.loaded:
+            await self.refresh_parameters()
+
+        value = self.parameters.get(name)
+        if value is None:
+            value = await self.drone.param.get_param_float(name)
+            self.parameters.update(name, value)
+        return value
+
+    async def _set_param(self, name: str, value: float):
         try:
-            if axis.lower() == "x" or axis.lower() == "y":
-                param_name_p = "MPC_XY_VEL_P_ACC"
-                param_name_i = "MPC_XY_VEL_I_ACC"
-                param_name_d = "MPC_XY_VEL_D_ACC"
-            elif axis.lower() == "z":
-                param_name_p = "MPC_Z_VEL_P_ACC"
-                param_name_i = "MPC_Z_VEL_I_ACC"
-                param_name_d = "MPC_Z_VEL_D_ACC"
-            else:
-                return False
+            await self.drone.param.set_param_float(name, value)
+        except Exception:
+            # The vehicle may or may not have taken the value
+            self.parameters.invalidate(name)
+            raise
+        self.parameters.update(name, float(value))
+
+    async def write_parameters(self, values: dict[str, float], group: str = "params") -> 'ParameterWriteResult':
+        """
+        Writes a group of parameters as one transaction: the current values are read from the vehicle,
+        all writes go out concurrently, every value is read back, and if anything failed or did not
+        stick the values read first are restored. The group latency is recorded in
+        ``param.write.<group>_s``.
+        """
+        start = time.perf_counter()
+        result = ParameterWriteResult(group, dict(values))
+        names = list(values)
+        param = self.drone.param
 
-            await self.drone.param.set_param_float(param_name_p, p_gain)
-            await self.drone.param.set_param_float(param_name_i, i_gain)
-            await self.drone.param.set_param_float(param_name_d, d_gain)
-            return True
+        try:
+            # From the vehicle, not the cache: another GCS or a reboot may have changed them, and these
+            # are the values a rollback restores
+            previous = await asyncio.gather(*(param.get_param_float(name) for name in names))
         except Exception as e:
-            print(e)
+            # Without the old values there is nothing to roll back to, do not touch the vehicle
+            result.failed = {name: f"read previous value: {e}" for name in names}
+            return self._finish_parameter_write(result, start)
+        result.previous = dict(zip(names, previous))
+        for name, value in result.previous.items():
+            self.parameters.update(name, value)
+
+        try:
+            written = await asyncio.gather(*(self._set_param(name, values[name]) for name in names),
+                                           return_exceptions=True)
+            for name, outcome in zip(names, written):
+                if isinstance(outcome, BaseException):
+                    result.failed[name] = str(outcome) or type(outcome).__name__
+
+            if not result.failed:
+                read_back = await asyncio.gather(*(param.get_param_float(name) for name in names),
+                                                 return_exceptions=True)
+                for name, value in zip(names, read_back):
+                    if isinstance(value, BaseException):
+                        result.failed[name] = f"read back: {value}"
+                    elif np.float32(value) != np.float32(values[name]):
+                        # PX4 stores float32, anything else means the vehicle clamped or rejected it
+                        result.failed[name] = f"read back {value}, expected {values[name]}"
+                        self.parameters.update(name, value)
+        except asyncio.CancelledError:
+            # Timed out or cancelled with some writes done: the restore is shielded so the vehicle
+            # is never left with a mixed group, even if the caller is cancelled again meanwhile
+            result.failed = {name: "cancelled" for name in names}
+            await asyncio.shield(self._restore_parameters(result))
+            self._finish_parameter_write(result, start)
+            raise
+
+        if result.failed:
+            await self._restore_parameters(result)
+
+        return self._finish_parameter_write(result, start)
+
+    async def _restore_parameters(self, result: 'ParameterWriteResult'):
+        names = list(result.previous)
+        restored = await asyncio.gather(*(self._set_param(name, result.previous[name]) for name in names),
+                                        return_exceptions=True)
+        for name, outcome in zip(names, restored):
+            if isinstance(outcome, BaseException):
+                result.rollback_failed[name] = str(outcome) or type(outcome).__name__
+        result.rolled_back = True
+
+    def _finish_parameter_write(self, result: 'ParameterWriteResult', start: float) -> 'ParameterWriteResult':
+        result.latency_s = time.perf_counter() - start
+        self.metrics.histogram(f"param.write.{result.group}_s").observe(result.latency_s)
+        if not result.ok:
+            self.metrics.counter(f"param.write.{result.group}.failed").inc()
+            print(f"{self.name} parameter write {result.group} failed: {result.failed}"
+                  + (f", rollback failed: {result.rollback_failed}" if result.rollback_failed else ""))
+        return result
+
+    @staticmethod
+    def _pid_values(group: str, gains: dict[str, tuple[float, float, float]]) -> dict[str, float]:
+        # {axis: (p, i, d)} -> {PX4 name: value}, skipping the terms the controller does not have
+        values = {}
+        for axis, axis_gains in gains.items():
+            for name, gain in zip(PID_PARAMETERS[group][axis.lower()], axis_gains):
+                if name is not None:
+                    values[name] = gain
+        return values
+
+    async def set_pid_params(self, group: str, gains: dict[str, tuple[float, float, float]]) -> bool:
+        try:
+            values = self._pid_values(group, gains)
+        except KeyError as e:
+            print(f"unknown PID axis {e}")
             return False
+        return (await self.write_parameters(values, group)).ok
+
+    def get_cached_pid_params(self, group: str, axis: str) -> dict[str, float] | None:
+        """Gains from the parameter cache without any round trip, None if they are not cached."""
+        names = PID_PARAMETERS.get(group, {}).get(axis.lower())
+        if names is None:
+            return None
+
+        gains = {}
+        for key, name in zip(("p", "i", "d"), names):
+            if name is None:
+                gains[key] = 0.0
+                continue
+            value = self.parameters.get(name)
+            if value is None:
+                return None
+            gains[key] = value
+        return gains
 
     def get_all_pid_parameters(self):
         try:
-            params = {
-                'attitude': {
-                    'roll': self.get_attitude_pid_params_sync('roll'),
-                    'pitch': self.get_attitude_pid_params_sync('pitch'),
-                    'yaw': self.get_attitude_pid_params_sync('yaw')
-                },
-                'rate': {
-                    'roll': self.get_rate_pid_params_sync('roll'),
-                    'pitch': self.get_rate_pid_params_sync('pitch'),
-                    'yaw': self.get_rate_pid_params_sync('yaw')
-                },
-                'position': {
-                    'x': self.get_position_pid_params_sync('x'),
-                    'y': self.get_position_pid_params_sync('y'),
-                    'z': self.get_position_pid_params_sync('z')
-                },
-                'velocity': {
-                    'x': self.get_velocity_pid_params_sync('x'),
-                    'y': self.get_velocity_pid_params_sync('y'),
-                    'z': self.get_velocity_pid_params_sync('z')
-                }
+            if not self.parameters.loaded:
+                self.run_async(self.refresh_parameters())
+            if not self.parameters.loaded:
+                return None
+
+            return {
+                group: {axis: self.get_cached_pid_params(group, axis) for axis in axes}
+                for group, axes in PID_PARAMETERS.items()
             }
-            return params
         except Exception as e:
             print(e)
             return None
 
-
-
     def start(self):
         self.running = True
         self.thread = threading.Thread(target=self._run_async_loop)
         self.thread.daemon = True
         self.thread.start()
 
+    def start_on_loop(self, event_loop: 'asyncio.AbstractEventLoop'):
+        # Run on an event loop owned by someone else (FleetModel) instead of a private thread
+        self.running = True
+        self.event_loop = event_loop
+        self.loop_ready_event.set()
+        self.main_task = asyncio.run_coroutine_threadsafe(self._main_async(), event_loop)
+
     def stop(self):
         self.running = False
+        self.stop_recording()
         if self.event_loop and self.main_task:
             asyncio.run_coroutine_threadsafe(self._stop_async(), self.event_loop)
         if self.thread:
@@ -344,9 +490,10 @@ class DroneModel(QObject):
 
             async for state in self.drone.core.connection_state():
                 if state.is_connected:
-                    with self._vehicle_status_lock:
-                        self._vehicle_status.heartbeat = True
-                        break
+                    self._publish("connection", CHANNEL_STATUS, heartbeat=True)
+                    break
+
+            await self._apply_telemetry_profile()
 
             tasks = [
                 self._monitor_health(),
@@ -358,7 +505,8 @@ class DroneModel(QObject):
                 self._monitor_armed_state(),
                 self._monitor_in_air_state(),
                 self._monitor_connection(),
-                self._update_ui_periodic()
+                monitor_loop_lag(self.metrics),
+                self.mission.run(),
             ]
 
             await asyncio.gather(*tasks)
@@ -372,47 +520,141 @@ class DroneModel(QObject):
         if self.main_task:
             self.main_task.cancel()
 
-        if self.ui_updater_task:
-            self.ui_updater_task.cancel()
+    def _on_message(self, stream: str) -> float:
+        now = time.monotonic()
+        self._rate_meters[stream].tick(now)
+        self.metrics.counter(f"stream.{stream}.messages").inc()
+        return now
+
+    def _on_monitor_error(self, stream: str, error: Exception):
+        self.metrics.counter(f"stream.{stream}.errors").inc()
+        print(f"{self.name} {stream}: {error!r}")
+
+    def _publish(self, stream: str, channel: str, **changes):
+        start = time.perf_counter()
+        timestamp = self._on_message(stream)
+
+        time_field = CHANNEL_TIME_FIELDS.get(channel)
+        if time_field is not None:
+            changes[time_field] = timestamp
+
+        snapshot = self._status_publisher.publish(timestamp=timestamp, stream=stream, **changes)
+
+        recorder = self._recorder
+        if recorder is not None:
+            recorder.record_snapshot(stream, snapshot)
+        self.ui_scheduler.mark_dirty(channel)
+
+        self.metrics.histogram(f"stream.{stream}.handler_s").observe(time.perf_counter() - start)
+
+    # --------------------------------
+    # Flight recording
+
+    def start_recording(self, path: str):
+        self.stop_recording()
+        self._recorder = FlightRecorder(path)
+
+    def stop_recording(self):
+        recorder, self._recorder = self._recorder, None
+        if recorder is not None:
+            recorder.close()
+
+    def is_recording(self) -> bool:
+        return self._recorder is not None
+
+    # --------------------------------
+    # Telemetry rates
+
+    async def _apply_telemetry_profile(self):
+        for stream, rate_hz in self._telemetry_profile.rates().items():
+            try:
+                await getattr(self.drone.telemetry, RATE_SETTERS[stream])(rate_hz)
+            except Exception as e:
+                print(f"set rate {stream} {rate_hz} Hz: {e}")
 
-    async def _update_ui_periodic(self, interval: float = 0.1):
-        while self.running:
-            self.ui_update_signal.emit(False)
+    def set_telemetry_profile(self, profile: 'TelemetryProfile'):
+        self._telemetry_profile = profile
+        for meter in self._rate_meters.values():
+            meter.reset()
 
-            await asyncio.sleep(interval)
+        if self.event_loop is not None and self.event_loop.is_running() and self.get_vehicle_status().heartbeat:
+            asyncio.run_coroutine_threadsafe(self._apply_telemetry_profile(), self.event_loop)
+
+    def get_telemetry_profile(self) -> 'TelemetryProfile':
+        return self._telemetry_profile
+
+    def get_stream_rates(self) -> dict[str, 'StreamRate']:
+        return {stream: meter.measure() for stream, meter in self._rate_meters.items()}
+
+    def diagnostics_text(self) -> str:
+        lines = [f"# {self.name} ({self.connection_address})", "", "# stream rates",
+                 f"{'':<14}{'count':>9}{'Hz':>10}{'jitter ms':>11}"]
+        for stream, rate in self.get_stream_rates().items():
+            lines.append(f"{stream:<14}{rate.count:>9}{rate.rate_hz:>10.1f}{rate.jitter_ms:>11.2f}")
+
+        lines += ["", "# ui consumers", f"{'':<14}{'delivered':>10}{'coalesced':>11}{'pending':>9}{'paused':>8}"]
+        for name, stats in self.ui_scheduler.stats().items():
+            lines.append(f"{name:<14}{stats['delivered']:>10}{stats['coalesced']:>11}{stats['pending']:>9}"
+                         f"{stats['paused']:>8}")
+
+        return "\n".join(lines) + "\n\n" + self.metrics.snapshot_text()
 
     async def _monitor_health(self):
         try:
-            async for _ in self.drone.telemetry.health():
+            async for health in self.drone.telemetry.health():
                 if not self.running:
                     break
+                timestamp = self._on_message("health")
+
+                recorder = self._recorder
+                if recorder is not None:
+                    recorder.record("health", timestamp, (float(health.is_armable),))
         except Exception as e:
-            print(e)
+            self._on_monitor_error("health", e)
 
     async def _monitor_position(self):
         try:
             async for position in self.drone.telemetry.position():
                 if not self.running:
                     break
-                with self._vehicle_status_lock:
-                    self._vehicle_status.position.latitude = position.latitude_deg
-                    self._vehicle_status.position.longitude = position.longitude_deg
-                    self._vehicle_status.position.altitude = position.relative_altitude_m
-
-                with self._waypoints_lock:
-                    if len(self._waypoints) > 0:
-                        horizontal_distance = self.haversine(position.latitude_deg,
-                                                             position.longitude_deg,
-                                                             self._waypoints[0].latitude,
-                                                             self._waypoints[0].longitude)
-                        vertical_distance = np.fabs(position.relative_altitude_m - self._waypoints[0].altitude)
-                        if (horizontal_distance < ALLOWABLE_HORIZONTAL_DISTANCE_TO_WAYPOINT) and (
-                                vertical_distance < ALLOWABLE_VERTICAL_DISTANCE_TO_WAYPOINT):
-                            # print("MOVE COMPLETE")
-                            self._waypoints.pop(0)
-                            self.ui_update_signal.emit(True)
+                self._publish(
+                    "position", CHANNEL_POSITION,
+                    position=Position(position.latitude_deg, position.longitude_deg, position.relative_altitude_m)
+                )
+
+                self._on_position(position.latitude_deg, position.longitude_deg, position.relative_altitude_m)
         except Exception as e:
-            print(e)
+            self._on_monitor_error("position", e)
+
+    def _on_position(self, latitude: float, longitude: float, altitude: float):
+        self._track.append(latitude, longitude)
+        self._check_waypoint_arrival(latitude, longitude, altitude)
+
+    def _plane_around(self, latitude: float, longitude: float) -> 'LocalTangentPlane':
+        plane = self._plane
+        if plane is None or not plane.covers(latitude, longitude):
+            plane = self._plane = LocalTangentPlane(latitude, longitude)
+        return plane
+
+    def _check_waypoint_arrival(self, latitude: float, longitude: float, altitude: float):
+        current = self._waypoints.current()
+        if current is None:
+            return
+        waypoint_id, waypoint = current
+
+        cached = self._arrival_target
+        if cached is None or cached[0] != waypoint_id:
+            cached = self._arrival_target = (waypoint_id, ArrivalTarget(
+                self._plane_around(latitude, longitude), waypoint, ALLOWABLE_HORIZONTAL_DISTANCE_TO_WAYPOINT,
+                ALLOWABLE_VERTICAL_DISTANCE_TO_WAYPOINT))
+        if not cached[1].reached(latitude, longitude, altitude):
+            return
+
+        # Only if the GUI has not removed or reordered it in the meantime
+        if self._waypoints.advance(waypoint_id):
+            # print("MOVE COMPLETE")
+            self.ui_scheduler.mark_dirty(CHANNEL_WAYPOINTS)
+            self.mission.notify()
 
     async def _monitor_attitude(self):
         try:
@@ -420,12 +662,14 @@ class DroneModel(QObject):
                 if not self.running:
                     break
 
-                with self._vehicle_status_lock:
-                    self._vehicle_status.attitude.roll = math.radians(attitude.roll_deg)
-                    self._vehicle_status.attitude.pitch = math.radians(attitude.pitch_deg)
-                    self._vehicle_status.attitude.yaw = math.radians(attitude.yaw_deg)
+                self._publish(
+                    "attitude", CHANNEL_ATTITUDE,
+                    attitude=Attitude(math.radians(attitude.roll_deg),
+                                      math.radians(attitude.pitch_deg),
+                                      math.radians(attitude.yaw_deg))
+                )
         except Exception as e:
-            print(e)
+            self._on_monitor_error("attitude", e)
 
     async def _monitor_velocity(self):
         try:
@@ -433,12 +677,12 @@ class DroneModel(QObject):
                 if not self.running:
                     break
 
-                with self._vehicle_status_lock:
-                    self._vehicle_status.velocity.vx = velocity.north_m_s
-                    self._vehicle_status.velocity.vy = velocity.east_m_s
-                    self._vehicle_status.velocity.vz = velocity.down_m_s
+                self._publish(
+                    "velocity", CHANNEL_VELOCITY,
+                    velocity=Velocity(velocity.north_m_s, velocity.east_m_s, velocity.down_m_s)
+                )
         except Exception as e:
-            print(e)
+            self._on_monitor_error("velocity", e)
 
     async def _monitor_battery(self):
         try:
@@ -446,11 +690,11 @@ class DroneModel(QObject):
                 if not self.running:
                     break
 
-                with self._vehicle_status_lock:
-                    self._vehicle_status.battery_percentage = battery.remaining_percent
-                    self._vehicle_status.battery_voltage = battery.voltage_v
+                self._publish("battery", CHANNEL_BATTERY,
+                              battery_percentage=battery.remaining_percent,
+                              battery_voltage=battery.voltage_v)
         except Exception as e:
-            print(e)
+            self._on_monitor_error("battery", e)
 
     async def _monitor_flight_mode(self):
         try:
@@ -458,18 +702,19 @@ class DroneModel(QObject):
                 if not self.running:
                     break
 
-                with self._vehicle_status_lock:
-                    if flight_mode == mavsdk.system.telemetry.FlightMode.MANUAL:
-                        self._vehicle_status.flight_mode = FlightMode.MANUAL
-                    elif flight_mode == mavsdk.system.telemetry.FlightMode.MISSION:
-                        self._vehicle_status.flight_mode = FlightMode.MISSION
-                    elif flight_mode == mavsdk.system.telemetry.FlightMode.LAND:
-                        self._vehicle_status.flight_mode = FlightMode.LANDING
-                    else:
-                        self._vehicle_status.flight_mode = FlightMode.MANUAL
+                if flight_mode == mavsdk.system.telemetry.FlightMode.MANUAL:
+                    mode = FlightMode.MANUAL
+                elif flight_mode == mavsdk.system.telemetry.FlightMode.MISSION:
+                    mode = FlightMode.MISSION
+                elif flight_mode == mavsdk.system.telemetry.FlightMode.LAND:
+                    mode = FlightMode.LANDING
+                else:
+                    mode = FlightMode.MANUAL
+
+                self._publish("flight_mode", CHANNEL_STATUS, flight_mode=mode)
 
         except Exception as e:
-            print(e)
+            self._on_monitor_error("flight_mode", e)
 
     async def _monitor_armed_state(self):
         try:
@@ -477,10 +722,9 @@ class DroneModel(QObject):
                 if not self.running:
                     break
 
-                with self._vehicle_status_lock:
-                    self._vehicle_status.armed = armed
+                self._publish("armed", CHANNEL_STATUS, armed=armed)
         except Exception as e:
-            print(e)
+            self._on_monitor_error("armed", e)
 
     async def _monitor_in_air_state(self):
         try:
@@ -488,10 +732,9 @@ class DroneModel(QObject):
                 if not self.running:
                     break
 
-                with self._vehicle_status_lock:
-                    self._vehicle_status.in_air = in_air
+                self._publish("in_air", CHANNEL_STATUS, in_air=in_air)
         except Exception as e:
-            print(e)
+            self._on_monitor_error("in_air", e)
 
     async def _monitor_connection(self):
         try:
@@ -499,13 +742,12 @@ class DroneModel(QObject):
                 if not self.running:
                     break
 
-                with self._vehicle_status_lock:
-                    self._vehicle_status.heartbeat = state.is_connected
+                self._publish("connection", CHANNEL_STATUS, heartbeat=state.is_connected)
         except Exception as e:
-            print(e)
+            self._on_monitor_error("connection", e)
 
     def status(self):
-        return self._vehicle_status
+        return self._status_publisher.latest()
 
     async def arm(self):
         try:
@@ -595,43 +837,91 @@ class DroneModel(QObject):
 
         return earth_radius * c
 
-    # --------------------------------
-
-    async def _update_waypoints_on_drone(self):
-        while len(self._waypoints) > 0:
-            val = await self.goto_location(self._waypoints[0])
-            if not val:
-                print("move failed")
-
     # --------------------------------
     # Public stuff
 
-    def add_waypoint_to_end(self, new_pos: 'Position'):
-        self.loop_ready_event.wait()
+    def _on_waypoints_changed(self):
+        self.ui_scheduler.mark_dirty(CHANNEL_WAYPOINTS)
+        # Removing or reordering the current leg retargets the vehicle
+        self.mission.notify()
 
-        with self._waypoints_lock:
-            self._waypoints.append(new_pos)
+    def add_waypoint_to_end(self, new_pos: 'Position') -> int:
+        waypoint_id = self._waypoints.append(new_pos)
+        self._on_waypoints_changed()
+        return waypoint_id
 
-        if len(self._waypoints) == 1:
-            asyncio.run_coroutine_threadsafe(self._update_waypoints_on_drone(), self.event_loop)
+    def add_waypoints(self, positions: list['Position']) -> list[int]:
+        waypoint_ids = self._waypoints.extend(positions)
+        self._on_waypoints_changed()
+        return waypoint_ids
 
     def remove_waypoint(self, index: int):
-        print(index)
-        with self._waypoints_lock:
-            self._waypoints.pop(index)
+        self._waypoints.remove(index)
+        self._on_waypoints_changed()
+
+    def remove_waypoint_id(self, waypoint_id: int) -> bool:
+        removed = self._waypoints.remove_id(waypoint_id)
+        if removed:
+            self._on_waypoints_changed()
+        return removed
+
+    def clear_waypoints(self):
+        self._waypoints.clear()
+        self._on_waypoints_changed()
+
+    async def optimise_waypoints(self) -> 'RouteResult | bool':
+        """
+        Reorders the remaining waypoints into the shortest route from the vehicle (or from the first
+        waypoint before there is a position fix). Returns False if the list changed while solving.
+        """
+        mission = self._waypoints.snapshot()
+        status = self.get_vehicle_status()
+        start = None
+        if status.heartbeat and status.position_time > 0.0:
+            start = (status.position.latitude, status.position.longitude, status.position.altitude)
+
+        # CPU bound, kept off the event loop so telemetry keeps flowing
+        result = await asyncio.get_running_loop().run_in_executor(None, optimise_route, mission.coords, start)
+        self.metrics.histogram("mission.optimise_s").observe(result.seconds)
+
+        if not self._waypoints.reorder(result.order, expected_version=mission.version):
+            return False
+        self._on_waypoints_changed()
+        return result
+
+    def current_waypoint(self) -> tuple[int, 'Position'] | None:
+        """Id and position of the waypoint being flown to."""
+        return self._waypoints.current()
+
+    def waypoints_near(self, horizontal_radius: float, vertical_radius: float = math.inf) -> list[int]:
+        """Indexes of the remaining waypoints within the given distance of the vehicle."""
+        position = self.get_vehicle_status().position
+        plane = self._plane_around(position.latitude, position.longitude)
+        mission = self._waypoints.snapshot()
+
+        cached = self._proximity
+        if cached is None or cached[0] != mission.version or cached[1].plane is not plane:
+            cached = self._proximity = (mission.version, WaypointProximity.from_coords(plane, mission.coords))
+
+        return cached[1].within(position.latitude, position.longitude, position.altitude, horizontal_radius,
+                                vertical_radius).tolist()
+
+    def get_waypoints(self) -> 'MissionSnapshot':
+        # Immutable, safe to keep and read from any thread
+        return self._waypoints.snapshot()
 
-    def get_waypoints(self):
-        with self._waypoints_lock:
-            return self._waypoints
+    def get_track(self) -> 'FlightTrack':
+        # Appended from the telemetry thread, rows already written can be read from any thread
+        return self._track
 
-    def get_vehicle_status(self):
-        with self._vehicle_status_lock:
-            return self._vehicle_status
+    def get_vehicle_status(self) -> 'VehicleStatus':
+        # Lock-free: the publisher swaps whole immutable snapshots
+        return self._status_publisher.latest()
 
     def __del__(self):
         if hasattr(self, 'loop') and self.loop.is_running():
             self.loop.call_soon_threadsafe(self.loop.stop)
         if hasattr(self, 'control_thread') and self.control_thread.is_alive():
             self.control_thread.join(timeout=1.0)
-        if hasattr(self, 'thread') and self.thread.is_alive():
+        if getattr(self, 'thread', None) is not None and self.thread.is_alive():
             self.thread.join(timeout=1.0)
@@ -0,0 +1,351 @@
+import asyncio
+import math
+import random
+import time
+from dataclasses import dataclass, field
+
+from mavsdk.telemetry import FlightMode as MavFlightMode
+
+# Stand-in for mavsdk.System so the DroneModel ingestion path can be benchmarked and stress tested
+# without PX4 / Gazebo. Only what DroneModel uses is implemented, message types mirror the MAVSDK
+# attribute names.
+
+EARTH_RADIUS = 6371000
+
+DEFAULT_PARAMS = {
+    "MC_ROLLRATE_P": 0.15, "MC_ROLLRATE_I": 0.2, "MC_ROLLRATE_D": 0.003,
+    "MC_PITCHRATE_P": 0.15, "MC_PITCHRATE_I": 0.2, "MC_PITCHRATE_D": 0.003,
+    "MC_YAWRATE_P": 0.2, "MC_YAWRATE_I": 0.1, "MC_YAWRATE_D": 0.0,
+    "MC_ROLL_P": 6.5, "MC_PITCH_P": 6.5, "MC_YAW_P": 2.8,
+    "MPC_XY_VEL_P_ACC": 1.8, "MPC_XY_VEL_I_ACC": 0.4, "MPC_XY_VEL_D_ACC": 0.2,
+    "MPC_Z_VEL_P_ACC": 4.0, "MPC_Z_VEL_I_ACC": 2.0, "MPC_Z_VEL_D_ACC": 0.0,
+    "MPC_XY_P": 0.95, "MPC_Z_P": 1.0,
+}
+
+
+@dataclass
+class FakeScenario:
+    """Stream rates (Hz, up to ~1 kHz), command latencies (s) and the simulated vehicle."""
+    rates: dict[str, float] = field(default_factory=lambda: {
+        "position": 10.0, "attitude": 50.0, "velocity": 10.0, "battery": 1.0, "health": 1.0,
+        "flight_mode": 1.0, "armed": 1.0, "in_air": 1.0, "connection": 1.0,
+    })
+    param_latency: float = 0.02
+    action_latency: float = 0.05
+    latency_jitter: float = 0.0
+    home_latitude: float = 47.397971
+    home_longitude: float = 8.546164
+    speed_m_s: float = 5.0
+    climb_m_s: float = 2.0
+    params: dict[str, float] = field(default_factory=lambda: dict(DEFAULT_PARAMS))
+
+    @classmethod
+    def uniform(cls, rate_hz: float, **kwargs) -> 'FakeScenario':
+        scenario = cls(**kwargs)
+        scenario.rates = {stream: rate_hz for stream in scenario.rates}
+        return scenario
+
+
+class FakeError(Exception):
+    pass
+
+
+# --- Messages (attribute compatible with mavsdk types) ---
+
+@dataclass(frozen=True)
+class ConnectionState:
+    is_connected: bool
+
+
+@dataclass(frozen=True)
+class Position:
+    latitude_deg: float
+    longitude_deg: float
+    absolute_altitude_m: float
+    relative_altitude_m: float
+
+
+@dataclass(frozen=True)
+class EulerAngle:
+    roll_deg: float
+    pitch_deg: float
+    yaw_deg: float
+    timestamp_us: int
+
+
+@dataclass(frozen=True)
+class VelocityNed:
+    north_m_s: float
+    east_m_s: float
+    down_m_s: float
+
+
+@dataclass(frozen=True)
+class Battery:
+    voltage_v: float
+    remaining_percent: float
+
+
+@dataclass(frozen=True)
+class Health:
+    is_global_position_ok: bool
+    is_home_position_ok: bool
+    is_armable: bool
+
+
+@dataclass(frozen=True)
+class FloatParam:
+    name: str
+    value: float
+
+
+@dataclass(frozen=True)
+class AllParams:
+    int_params: list
+    float_params: list
+    custom_params: list
+
+
+class _FakeVehicle:
+    """Very small kinematic model: flies straight to the goto target, drains the battery."""
+
+    def __init__(self, scenario: 'FakeScenario'):
+        self.scenario = scenario
+        self.latitude = scenario.home_latitude
+        self.longitude = scenario.home_longitude
+        self.altitude = 0.0
+        self.velocity = (0.0, 0.0, 0.0)
+        self.target = None
+        self.armed = False
+        self.in_air = False
+        self.flight_mode = MavFlightMode.HOLD
+        self.battery = 100.0
+        self._start = time.monotonic()
+        self._last_step = self._start
+
+    def step(self):
+        now = time.monotonic()
+        dt = now - self._last_step
+        if dt <= 0:
+            return
+        self._last_step = now
+
+        if not self.in_air or self.target is None:
+            self.velocity = (0.0, 0.0, 0.0)
+            return
+
+        lat, lon, alt = self.target
+        north = math.radians(lat - self.latitude) * EARTH_RADIUS
+        east = math.radians(lon - self.longitude) * EARTH_RADIUS * math.cos(math.radians(self.latitude))
+        up = alt - self.altitude
+
+        horizontal = math.hypot(north, east)
+        step_h = min(horizontal, self.scenario.speed_m_s * dt)
+        step_v = max(-self.scenario.climb_m_s * dt, min(self.scenario.climb_m_s * dt, up))
+
+        if horizontal > 0:
+            d_north = north / horizontal * step_h
+            d_east = east / horizontal * step_h
+        else:
+            d_north = d_east = 0.0
+
+        self.latitude += math.degrees(d_north / EARTH_RADIUS)
+        self.longitude += math.degrees(d_east / (EARTH_RADIUS * math.cos(math.radians(self.latitude))))
+        self.altitude += step_v
+        self.velocity = (d_north / dt, d_east / dt, -step_v / dt)
+        self.battery = max(0.0, self.battery - 0.01 * dt)
+
+        if self.altitude <= 0.0 and self.flight_mode == MavFlightMode.LAND:
+            self.altitude = 0.0
+            self.in_air = False
+            self.target = None
+
+    def attitude(self) -> tuple[float, float, float]:
+        t = time.monotonic() - self._start
+        vn, ve, _ = self.velocity
+        yaw = math.degrees(math.atan2(ve, vn)) if (vn or ve) else 0.0
+        return 2.0 * math.sin(t), 2.0 * math.cos(0.7 * t), yaw
+
+
+async def _latency(seconds: float, jitter: float):
+    delay = seconds + (random.uniform(-jitter, jitter) if jitter else 0.0)
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+async def _stream(rate_hz, produce):
+    # Fixed-rate generator that does not drift, rate_hz is read again every tick so set_rate_* applies live
+    loop = asyncio.get_running_loop()
+    deadline = loop.time()
+    while True:
+        yield produce()
+        deadline += 1.0 / max(rate_hz(), 1e-3)
+        delay = deadline - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            # Running behind, do not try to catch up with a burst
+            deadline = loop.time()
+            await asyncio.sleep(0)
+
+
+class FakeTelemetry:
+    def __init__(self, vehicle: '_FakeVehicle', rates: dict[str, float]):
+        self._vehicle = vehicle
+        self._rates = rates
+
+    def _rate(self, stream):
+        return lambda: self._rates.get(stream, 1.0)
+
+    async def _set_rate(self, stream, rate_hz):
+        self._rates[stream] = rate_hz
+
+    async def set_rate_position(self, rate_hz):
+        await self._set_rate("position", rate_hz)
+
+    async def set_rate_attitude_euler(self, rate_hz):
+        await self._set_rate("attitude", rate_hz)
+
+    async def set_rate_velocity_ned(self, rate_hz):
+        await self._set_rate("velocity", rate_hz)
+
+    async def set_rate_battery(self, rate_hz):
+        await self._set_rate("battery", rate_hz)
+
+    async def set_rate_in_air(self, rate_hz):
+        await self._set_rate("in_air", rate_hz)
+
+    async def set_rate_health(self, rate_hz):
+        await self._set_rate("health", rate_hz)
+
+    def position(self):
+        def produce():
+            v = self._vehicle
+            v.step()
+            return Position(v.latitude, v.longitude, 488.0 + v.altitude, v.altitude)
+        return _stream(self._rate("position"), produce)
+
+    def attitude_euler(self):
+        def produce():
+            roll, pitch, yaw = self._vehicle.attitude()
+            return EulerAngle(roll, pitch, yaw, int(time.monotonic() * 1e6))
+        return _stream(self._rate("attitude"), produce)
+
+    def velocity_ned(self):
+        return _stream(self._rate("velocity"), lambda: VelocityNed(*self._vehicle.velocity))
+
+    def battery(self):
+        return _stream(self._rate("battery"),
+                       lambda: Battery(12.6 * (0.8 + 0.2 * self._vehicle.battery / 100), self._vehicle.battery))
+
+    def health(self):
+        return _stream(self._rate("health"), lambda: Health(True, True, not self._vehicle.in_air))
+
+    def flight_mode(self):
+        return _stream(self._rate("flight_mode"), lambda: self._vehicle.flight_mode)
+
+    def armed(self):
+        return _stream(self._rate("armed"), lambda: self._vehicle.armed)
+
+    def in_air(self):
+        return _stream(self._rate("in_air"), lambda: self._vehicle.in_air)
+
+
+class FakeAction:
+    def __init__(self, vehicle: '_FakeVehicle', scenario: 'FakeScenario'):
+        self._vehicle = vehicle
+        self._scenario = scenario
+        self._takeoff_altitude = 2.5
+
+    async def _round_trip(self):
+        await _latency(self._scenario.action_latency, self._scenario.latency_jitter)
+
+    async def arm(self):
+        await self._round_trip()
+        if self._vehicle.in_air:
+            raise FakeError("arm: already in air")
+        self._vehicle.armed = True
+
+    async def disarm(self):
+        await self._round_trip()
+        if self._vehicle.in_air:
+            raise FakeError("disarm: in air")
+        self._vehicle.armed = False
+
+    async def set_takeoff_altitude(self, altitude):
+        await self._round_trip()
+        self._takeoff_altitude = altitude
+
+    async def takeoff(self):
+        await self._round_trip()
+        if not self._vehicle.armed:
+            raise FakeError("takeoff: not armed")
+        v = self._vehicle
+        v.step()
+        v.in_air = True
+        v.flight_mode = MavFlightMode.TAKEOFF
+        v.target = (v.latitude, v.longitude, self._takeoff_altitude)
+
+    async def land(self):
+        await self._round_trip()
+        v = self._vehicle
+        v.step()
+        v.flight_mode = MavFlightMode.LAND
+        v.target = (v.latitude, v.longitude, -1.0)
+
+    async def goto_location(self, latitude_deg, longitude_deg, absolute_altitude_m, yaw_deg):
+        await self._round_trip()
+        v = self._vehicle
+        if not v.in_air:
+            raise FakeError("goto_location: not in air")
+        v.step()
+        v.flight_mode = MavFlightMode.HOLD
+        v.target = (latitude_deg, longitude_deg, absolute_altitude_m)
+
+
+class FakeParam:
+    def __init__(self, scenario: 'FakeScenario'):
+        self._scenario = scenario
+        self.round_trips = 0
+
+    async def _round_trip(self):
+        self.round_trips += 1
+        await _latency(self._scenario.param_latency, self._scenario.latency_jitter)
+
+    async def get_param_float(self, name):
+        await self._round_trip()
+        try:
+            return self._scenario.params[name]
+        except KeyError:
+            raise FakeError(f"get_param_float: unknown parameter {name}")
+
+    async def set_param_float(self, name, value):
+        await self._round_trip()
+        if name not in self._scenario.params:
+            raise FakeError(f"set_param_float: unknown parameter {name}")
+        self._scenario.params[name] = float(value)
+
+    async def get_all_params(self):
+        await self._round_trip()
+        return AllParams([], [FloatParam(name, value) for name, value in self._scenario.params.items()], [])
+
+
+class FakeCore:
+    def connection_state(self):
+        return _stream(lambda: 1.0, lambda: ConnectionState(True))
+
+
+class FakeSystem:
+    """In-process replacement for mavsdk.System, pass it to DroneModel(system=...)."""
+
+    def __init__(self, scenario: 'FakeScenario' = None):
+        self.scenario = scenario if scenario is not None else FakeScenario()
+        self.vehicle = _FakeVehicle(self.scenario)
+
+        self.telemetry = FakeTelemetry(self.vehicle, self.scenario.rates)
+        self.action = FakeAction(self.vehicle, self.scenario)
+        self.param = FakeParam(self.scenario)
+        self.core = FakeCore()
+
+    async def connect(self, system_address=None):
+        pass
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from DroneModel import DroneModel
+from TelemetryRates import TelemetryProfile, TELEMETRY_PROFILES
+from VehicleStatus import VehicleStatus
+
+# PX4 SITL instance N listens on 14540 + N, mavsdk_server instance N gets 50051 + N
+SITL_BASE_UDP_PORT = 14540
+BASE_MAVSDK_PORT = 50051
+
+
+class FleetModel(QObject):
+    """
+    Hosts several DroneModel vehicles on a single asyncio event loop and thread.
+
+    One vehicle is "active": that is the one the main window, map and logger are bound to. Every
+    vehicle keeps its own lock-free status snapshot, so the fleet status is just a list of reads.
+    """
+
+    active_vehicle_changed = pyqtSignal(int)
+
+    def __init__(self, connection_addresses: list[str], base_mavsdk_port: int = BASE_MAVSDK_PORT,
+                 telemetry_profile: 'TelemetryProfile' = TELEMETRY_PROFILES["default"]):
+        super().__init__()
+        if not connection_addresses:
+            raise ValueError("a fleet needs at least one vehicle")
+
+        self.vehicles: list['DroneModel'] = [
+            DroneModel(address, telemetry_profile=telemetry_profile, mavsdk_port=base_mavsdk_port + i,
+                       name=f"Vehicle {i + 1}")
+            for i, address in enumerate(connection_addresses)
+        ]
+        self._active_index = 0
+
+        self.running = False
+        self.event_loop = None
+        self.loop_ready_event = threading.Event()
+        self.thread = None
+
+    @classmethod
+    def from_sitl(cls, count: int, base_udp_port: int = SITL_BASE_UDP_PORT, **kwargs) -> 'FleetModel':
+        return cls([f"udpin://0.0.0.0:{base_udp_port + i}" for i in range(count)], **kwargs)
+
+    def __len__(self):
+        return len(self.vehicles)
+
+    def vehicle(self, index: int) -> 'DroneModel':
+        return self.vehicles[index]
+
+    @property
+    def active_index(self) -> int:
+        return self._active_index
+
+    def active_vehicle(self) -> 'DroneModel':
+        return self.vehicles[self._active_index]
+
+    def set_active_vehicle(self, index: int):
+        if not 0 <= index < len(self.vehicles):
+            raise IndexError(index)
+        if index == self._active_index:
+            return
+
+        self._active_index = index
+        self.active_vehicle_changed.emit(index)
+
+    def get_fleet_status(self) -> list['VehicleStatus']:
+        return [vehicle.get_vehicle_status() for vehicle in self.vehicles]
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run_event_loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.loop_ready_event.wait()
+        for vehicle in self.vehicles:
+            vehicle.start_on_loop(self.event_loop)
+
+    def stop(self):
+        self.running = False
+        for vehicle in self.vehicles:
+            vehicle.stop()
+
+        if self.event_loop is not None:
+            self.event_loop.call_soon_threadsafe(self.event_loop.stop)
+        if self.thread:
+            self.thread.join(timeout=5.0)
+
+    def _run_event_loop(self):
+        self.event_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.event_loop)
+
+        self.loop_ready_event.set()
+        self.event_loop.run_forever()
+        self.event_loop.close()
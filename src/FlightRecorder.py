@@ -0,0 +1,246 @@
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from VehicleStatus import VehicleStatus
+
+# File layout
+#   header  : 64 bytes, see HEADER_STRUCT
+#   records : RECORD_SIZE bytes each, appended forever
+#
+# Every record starts with RECORD_SYNC and ends with a CRC32 of everything before it. A crash can only
+# ever leave a torn record at the end of the file, which the reader drops (short tail) or masks out
+# (bad sync / CRC).
+
+FILE_MAGIC = b"T4GCSREC"
+FILE_VERSION = 1
+HEADER_SIZE = 64
+HEADER_STRUCT = struct.Struct("<8sHHIdd")
+
+RECORD_SYNC = 0x31434552  # b"REC1"
+RECORD_VALUES = 5
+RECORD_BODY_STRUCT = struct.Struct(f"<IB3xId{RECORD_VALUES}d")
+RECORD_SIZE = RECORD_BODY_STRUCT.size + 4
+
+RECORD_DTYPE = np.dtype([
+    ("sync", "<u4"),
+    ("stream", "u1"),
+    ("pad", "u1", (3,)),
+    ("seq", "<u4"),
+    ("time", "<f8"),
+    ("values", "<f8", (RECORD_VALUES,)),
+    ("crc", "<u4"),
+])
+
+# Stream ids are part of the file format, only ever append to this list
+STREAMS = ("connection", "health", "position", "attitude", "velocity", "battery", "flight_mode", "armed", "in_air")
+STREAM_IDS = {name: i for i, name in enumerate(STREAMS)}
+
+STREAM_FIELDS = {
+    "connection": ("heartbeat",),
+    "health": ("is_armable",),
+    "position": ("lat", "lon", "alt"),
+    "attitude": ("roll", "pitch", "yaw"),
+    "velocity": ("vx", "vy", "vz"),
+    "battery": ("battery_percentage", "battery_voltage"),
+    "flight_mode": ("flight_mode",),
+    "armed": ("armed",),
+    "in_air": ("in_air",),
+}
+
+_SNAPSHOT_VALUES = {
+    "connection": lambda s: (float(s.heartbeat),),
+    "position": lambda s: (s.position.latitude, s.position.longitude, s.position.altitude),
+    "attitude": lambda s: (s.attitude.roll, s.attitude.pitch, s.attitude.yaw),
+    "velocity": lambda s: (s.velocity.vx, s.velocity.vy, s.velocity.vz),
+    "battery": lambda s: (s.battery_percentage, s.battery_voltage),
+    "flight_mode": lambda s: (float(s.flight_mode.value),),
+    "armed": lambda s: (float(s.armed),),
+    "in_air": lambda s: (float(s.in_air),),
+}
+
+_PADDING = (0.0,) * RECORD_VALUES
+
+
+class FlightRecorder:
+    """
+    Streams telemetry messages into an append-only file of fixed-size records.
+
+    ``record()`` only packs the message and hands it to a writer thread, so it is cheap enough to call
+    from the telemetry coroutines. The writer batches writes and calls fsync every ``fsync_every``
+    records or ``fsync_interval`` seconds, whichever comes first.
+    """
+
+    def __init__(self, path: str, fsync_every: int = 512, fsync_interval: float = 1.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.records_written = 0
+
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new_file:
+            FlightLog.read_header(path)
+
+        self._file = open(path, "ab")
+        if new_file:
+            header = HEADER_STRUCT.pack(FILE_MAGIC, FILE_VERSION, RECORD_SIZE, HEADER_SIZE, time.time(),
+                                        time.monotonic())
+            self._file.write(header.ljust(HEADER_SIZE, b"\0"))
+            self._sync()
+        else:
+            self._truncate_torn_tail()
+
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="FlightRecorder", daemon=True)
+        self._thread.start()
+
+    def _truncate_torn_tail(self):
+        size = os.path.getsize(self.path)
+        torn = (size - HEADER_SIZE) % RECORD_SIZE
+        if torn:
+            self._file.truncate(size - torn)
+
+    def record(self, stream: str, timestamp: float, values: tuple = (), seq: int = 0):
+        body = RECORD_BODY_STRUCT.pack(RECORD_SYNC, STREAM_IDS[stream], seq & 0xFFFFFFFF, timestamp,
+                                       *(tuple(values) + _PADDING)[:RECORD_VALUES])
+        self._queue.put(body + struct.pack("<I", zlib.crc32(body)))
+
+    def record_snapshot(self, stream: str, snapshot: 'VehicleStatus'):
+        self.record(stream, snapshot.timestamp, _SNAPSHOT_VALUES[stream](snapshot), snapshot.seq)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _run(self):
+        pending = 0
+        last_sync = time.monotonic()
+
+        while True:
+            try:
+                item = self._queue.get(timeout=self.fsync_interval)
+            except queue.Empty:
+                item = b""
+
+            batch = []
+            stop = item is None
+            if item:
+                batch.append(item)
+
+            # Drain whatever else is already queued into the same write
+            while not stop:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                else:
+                    batch.append(item)
+
+            if batch:
+                self._file.write(b"".join(batch))
+                pending += len(batch)
+                self.records_written += len(batch)
+
+            now = time.monotonic()
+            if pending and (stop or pending >= self.fsync_every or now - last_sync >= self.fsync_interval):
+                self._sync()
+                pending = 0
+                last_sync = now
+
+            if stop:
+                return
+
+
+class FlightLog:
+    """
+    Memory-mapped reader for FlightRecorder files.
+
+    Opening only maps the file, nothing is read until a column is touched. ``times``, ``streams`` and
+    ``values`` are zero-copy views over every record. ``stream()`` gathers the records of one stream,
+    which copies just that stream's columns.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version, self.start_wall_time, self.start_monotonic = self.read_header(path)
+
+        count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_SIZE
+        if count > 0:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+
+        self._valid = None
+        self._stream_index: dict[int, np.ndarray] = {}
+
+    @staticmethod
+    def read_header(path: str) -> tuple[int, float, float]:
+        with open(path, "rb") as f:
+            raw = f.read(HEADER_SIZE)
+        if len(raw) < HEADER_SIZE:
+            raise ValueError(f"{path}: truncated header")
+
+        magic, version, record_size, header_size, wall_time, monotonic = HEADER_STRUCT.unpack_from(raw)
+        if magic != FILE_MAGIC:
+            raise ValueError(f"{path}: not a flight recording")
+        if version != FILE_VERSION or record_size != RECORD_SIZE or header_size != HEADER_SIZE:
+            raise ValueError(f"{path}: unsupported recording version {version}")
+
+        return version, wall_time, monotonic
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.records["time"]
+
+    @property
+    def streams(self) -> np.ndarray:
+        return self.records["stream"]
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.records["values"]
+
+    def valid(self) -> np.ndarray:
+        # Cheap framing check, see verify() for a full CRC pass
+        if self._valid is None:
+            self._valid = self.records["sync"] == RECORD_SYNC
+        return self._valid
+
+    def verify(self) -> np.ndarray:
+        raw = self.records.view(np.uint8).reshape(len(self.records), RECORD_SIZE)
+        crc = np.fromiter((zlib.crc32(row[:-4]) for row in raw), dtype=np.uint32, count=len(self.records))
+        self._valid = (self.records["sync"] == RECORD_SYNC) & (crc == self.records["crc"])
+        return self._valid
+
+    def stream(self, name: str) -> dict[str, np.ndarray]:
+        stream_id = STREAM_IDS[name]
+        index = self._stream_index.get(stream_id)
+        if index is None:
+            index = np.flatnonzero((self.streams == stream_id) & self.valid())
+            self._stream_index[stream_id] = index
+
+        columns = {"time": self.times[index], "seq": self.records["seq"][index]}
+        stream_values = self.values[index]
+        for i, field in enumerate(STREAM_FIELDS[name]):
+            columns[field] = stream_values[:, i]
+
+        return columns
@@ -0,0 +1,234 @@
+import math
+import threading
+
+import numpy as np
+
+from Geodesy import LocalTangentPlane
+
+# Fixes closer than this to the last kept one are dropped, so hovering does not grow the track
+MIN_SPACING_M = 0.5
+INITIAL_CAPACITY = 1024
+# Runs of fewer points than this are split by douglas_peucker() without numpy
+SMALL_RUN = 32
+
+
+def _farthest_small(xs: list[float], ys: list[float]) -> tuple[float, int]:
+    # _farthest over a short run, in plain floats
+    x0, y0 = xs[0], ys[0]
+    sx, sy = xs[-1] - x0, ys[-1] - y0
+    length_sq = sx * sx + sy * sy
+    best, farthest = -1.0, 0
+    for i in range(1, len(xs) - 1):
+        ox, oy = xs[i] - x0, ys[i] - y0
+        if length_sq > 0.0:
+            t = (ox * sx + oy * sy) / length_sq
+            t = 0.0 if t < 0.0 else 1.0 if t > 1.0 else t
+            ox, oy = ox - t * sx, oy - t * sy
+        distance_sq = ox * ox + oy * oy
+        if distance_sq > best:
+            best, farthest = distance_sq, i
+    return best, farthest
+
+
+def _farthest(x: np.ndarray, y: np.ndarray) -> tuple[float, int]:
+    # Squared distance and index of the inner point farthest from the segment between the end points.
+    # To the segment rather than the line, so a track flown out and back along the same line is kept.
+    sx, sy = x[-1] - x[0], y[-1] - y[0]
+    ox, oy = x[1:-1] - x[0], y[1:-1] - y[0]
+    length_sq = sx * sx + sy * sy
+    if length_sq > 0.0:
+        t = (ox * sx + oy * sy) / length_sq
+        np.clip(t, 0.0, 1.0, out=t)
+        ox -= t * sx
+        oy -= t * sy
+    distance_sq = ox * ox + oy * oy
+    farthest = int(np.argmax(distance_sq))
+    return float(distance_sq[farthest]), farthest + 1
+
+
+def douglas_peucker(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Indexes of the (east, north) rows of ``points`` kept by Douglas-Peucker, every dropped point is
+    within ``tolerance`` metres of the simplified line. Iterative, long runs are split with array
+    operations and short ones, where those cost more than they save, in plain Python.
+    """
+    count = len(points)
+    if count < 3:
+        return np.arange(count)
+
+    x = np.ascontiguousarray(points[:, 0])
+    y = np.ascontiguousarray(points[:, 1])
+    x_list, y_list = x.tolist(), y.tolist()
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+    tolerance_sq = tolerance * tolerance
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        if last - first < SMALL_RUN:
+            distance_sq, farthest = _farthest_small(x_list[first:last + 1], y_list[first:last + 1])
+        else:
+            distance_sq, farthest = _farthest(x[first:last + 1], y[first:last + 1])
+        if distance_sq > tolerance_sq:
+            split = first + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return np.flatnonzero(keep)
+
+
+class FlightTrack:
+    """
+    Positions flown by one vehicle, appended from the telemetry thread.
+
+    Rows are (latitude, longitude) in a preallocated array that doubles when full. A fix within
+    ``min_spacing_m`` of the last kept one is dropped (radial-distance decimation), so the track
+    grows with the distance flown rather than the time in the air. Rows never change once written,
+    readers take the ones past the index they already have.
+    """
+
+    def __init__(self, lock=None, min_spacing_m: float = MIN_SPACING_M, capacity: int = INITIAL_CAPACITY):
+        self._lock = lock if lock is not None else threading.Lock()
+        self._points = np.zeros((capacity, 2), dtype=np.float64)
+        self._count = 0
+        self._min_spacing_sq = min_spacing_m * min_spacing_m
+        self._last_en: tuple[float, float] | None = None
+        # Set by the first fix, metric coordinates of the whole track are taken on it
+        self.plane: 'LocalTangentPlane | None' = None
+
+    def __len__(self):
+        return self._count
+
+    def append(self, latitude: float, longitude: float) -> bool:
+        plane = self.plane
+        if plane is None:
+            plane = self.plane = LocalTangentPlane(latitude, longitude)
+        east, north = plane.to_en(latitude, longitude)
+        last = self._last_en
+        if last is not None and (east - last[0]) ** 2 + (north - last[1]) ** 2 < self._min_spacing_sq:
+            return False
+        self._last_en = (east, north)
+
+        with self._lock:
+            if self._count == len(self._points):
+                points = np.zeros((2 * len(self._points), 2), dtype=np.float64)
+                points[:self._count] = self._points
+                self._points = points
+            self._points[self._count] = (latitude, longitude)
+            self._count += 1
+        return True
+
+    def since(self, start: int) -> np.ndarray:
+        """Copy of the rows from ``start`` on."""
+        with self._lock:
+            return self._points[start:self._count].copy()
+
+
+class TrackSimplifier:
+    """
+    A FlightTrack simplified to ``tolerance`` metres, extended with only the vertices that are new.
+
+    ``update()`` carries on from the rows appended since the previous call with a streaming sleeve
+    test (Zhao-Saalfeld): the line from the last vertex is extended while every point passed stays
+    within ``tolerance`` of it, which is O(1) per point as a cone of directions that only narrows.
+    A new tolerance or another track is rebuilt from all rows with Douglas-Peucker.
+    """
+
+    def __init__(self, tolerance: float):
+        self.tolerance = tolerance
+        self._track: 'FlightTrack | None' = None
+        self._read = 0
+        self._anchor: tuple[float, float] | None = None
+        self._candidate: tuple[float, float, float, float] | None = None
+        self._direction: float | None = None
+        self._low = self._high = 0.0
+        self._reach = 0.0
+
+    def set_tolerance(self, tolerance: float):
+        if tolerance != self.tolerance:
+            self.tolerance = tolerance
+            self._track = None
+
+    def invalidate(self):
+        self._track = None
+
+    def update(self, track: 'FlightTrack') -> tuple[bool, list[list[float]]]:
+        """
+        (rebuilt, new [latitude, longitude] vertices). When rebuilt, the vertices replace every one
+        returned before.
+        """
+        if track is not self._track:
+            return True, self._rebuild(track)
+        rows = track.since(self._read)
+        if len(rows) == 0:
+            return False, []
+        self._read += len(rows)
+        return False, self._extend(track.plane, rows)
+
+    def _rebuild(self, track: 'FlightTrack') -> list[list[float]]:
+        self._track = track
+        self._anchor = None
+        rows = track.since(0)
+        self._read = len(rows)
+        if len(rows) == 0:
+            return []
+
+        east, north = track.plane.to_en_array(rows[:, 0], rows[:, 1])
+        keep = douglas_peucker(np.column_stack((east, north)), self.tolerance)
+        # The last row is always kept, the sleeve carries on from it
+        self._start(float(east[-1]), float(north[-1]))
+        return rows[keep].tolist()
+
+    def _extend(self, plane: 'LocalTangentPlane', rows: np.ndarray) -> list[list[float]]:
+        east, north = plane.to_en_array(rows[:, 0], rows[:, 1])
+        vertices = []
+        for e, n, (latitude, longitude) in zip(east.tolist(), north.tolist(), rows.tolist()):
+            if self._anchor is None:
+                self._start(e, n)
+                vertices.append([latitude, longitude])
+            elif not self._carries(e, n, latitude, longitude):
+                # Left the sleeve: the last point inside it ends the line and anchors the next one
+                candidate_e, candidate_n, candidate_latitude, candidate_longitude = self._candidate
+                vertices.append([candidate_latitude, candidate_longitude])
+                self._start(candidate_e, candidate_n)
+                self._carries(e, n, latitude, longitude)
+        return vertices
+
+    def _start(self, east: float, north: float):
+        self._anchor = (east, north)
+        self._candidate = None
+        self._direction = None
+        self._reach = 0.0
+
+    def _carries(self, east: float, north: float, latitude: float, longitude: float) -> bool:
+        # Always true from a fresh anchor
+        tolerance = self.tolerance
+        dx = east - self._anchor[0]
+        dy = north - self._anchor[1]
+        distance_sq = dx * dx + dy * dy
+        if distance_sq <= tolerance * tolerance:
+            # Close to the anchor, and so to any line from it
+            return True
+        distance = math.sqrt(distance_sq)
+        if distance < self._reach:
+            # Turned back towards the anchor, the line would end short of points already passed
+            return False
+
+        angle = math.atan2(dy, dx)
+        half_width = math.asin(tolerance / distance)
+        if self._direction is None:
+            self._direction = angle
+            self._low, self._high = -half_width, half_width
+        else:
+            # Relative to the first direction, the cone never gets wider than +-90 degrees around it
+            relative = (angle - self._direction + math.pi) % (2.0 * math.pi) - math.pi
+            if not self._low <= relative <= self._high:
+                return False
+            self._low = max(self._low, relative - half_width)
+            self._high = min(self._high, relative + half_width)
+
+        self._reach = max(self._reach, distance)
+        self._candidate = (east, north, latitude, longitude)
+        return True
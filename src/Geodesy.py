@@ -0,0 +1,115 @@
+import math
+
+import numpy as np
+
+# Same sphere as DroneModel.haversine
+EARTH_RADIUS = 6371000
+
+# Past this distance from its origin the flat-earth error of a plane reaches ~1e-3 relative,
+# LocalTangentPlane.covers() tells the caller to rebase
+MAX_PLANE_RADIUS_M = 20000.0
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in metres, plain math version of DroneModel.haversine."""
+    d_lat = math.radians(lat2 - lat1)
+    d_lon = math.radians(lon2 - lon1)
+    a = math.sin(d_lat / 2) ** 2 + math.sin(d_lon / 2) ** 2 * math.cos(math.radians(lat1)) * math.cos(
+        math.radians(lat2))
+    return EARTH_RADIUS * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+class LocalTangentPlane:
+    """
+    East/north/up metres around a fixed origin (equirectangular projection).
+
+    The per-origin trigonometry is computed once, so projecting a point is two subtractions and two
+    multiplications. Within a few km of the origin the error against haversine is well below the
+    1 m arrival tolerance.
+    """
+
+    def __init__(self, origin_latitude: float, origin_longitude: float):
+        self.origin_latitude = origin_latitude
+        self.origin_longitude = origin_longitude
+        self.north_per_deg = math.radians(1.0) * EARTH_RADIUS
+        self.east_per_deg = self.north_per_deg * math.cos(math.radians(origin_latitude))
+
+    def to_en(self, latitude: float, longitude: float) -> tuple[float, float]:
+        return ((longitude - self.origin_longitude) * self.east_per_deg,
+                (latitude - self.origin_latitude) * self.north_per_deg)
+
+    def to_en_array(self, latitudes: np.ndarray, longitudes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        return ((np.asarray(longitudes, dtype=np.float64) - self.origin_longitude) * self.east_per_deg,
+                (np.asarray(latitudes, dtype=np.float64) - self.origin_latitude) * self.north_per_deg)
+
+    def covers(self, latitude: float, longitude: float) -> bool:
+        east, north = self.to_en(latitude, longitude)
+        return east * east + north * north < MAX_PLANE_RADIUS_M * MAX_PLANE_RADIUS_M
+
+
+class ArrivalTarget:
+    """One waypoint pre-projected on a plane, ``reached()`` is a handful of float operations."""
+
+    __slots__ = ("waypoint", "plane", "east", "north", "altitude", "horizontal_sq", "vertical")
+
+    def __init__(self, plane: 'LocalTangentPlane', waypoint, horizontal_tolerance: float,
+                 vertical_tolerance: float):
+        self.waypoint = waypoint
+        self.plane = plane
+        self.east, self.north = plane.to_en(waypoint.latitude, waypoint.longitude)
+        self.altitude = waypoint.altitude
+        self.horizontal_sq = horizontal_tolerance * horizontal_tolerance
+        self.vertical = vertical_tolerance
+
+    def reached(self, latitude: float, longitude: float, altitude: float) -> bool:
+        plane = self.plane
+        d_east = (longitude - plane.origin_longitude) * plane.east_per_deg - self.east
+        d_north = (latitude - plane.origin_latitude) * plane.north_per_deg - self.north
+        return d_east * d_east + d_north * d_north < self.horizontal_sq and abs(altitude - self.altitude) < self.vertical
+
+
+class WaypointProximity:
+    """
+    Waypoints of one mission projected once into contiguous arrays, for look-ahead queries against
+    all upcoming points at once.
+    """
+
+    def __init__(self, plane: 'LocalTangentPlane', waypoints):
+        coords = np.array([(w.latitude, w.longitude, w.altitude) for w in waypoints], dtype=np.float64)
+        self._set_coords(plane, coords.reshape(-1, 3))
+
+    @classmethod
+    def from_coords(cls, plane: 'LocalTangentPlane', coords: np.ndarray) -> 'WaypointProximity':
+        # (latitude, longitude, altitude) rows, e.g. MissionSnapshot.coords
+        proximity = cls.__new__(cls)
+        proximity._set_coords(plane, coords)
+        return proximity
+
+    def _set_coords(self, plane: 'LocalTangentPlane', coords: np.ndarray):
+        self.plane = plane
+        self.east, self.north = plane.to_en_array(coords[:, 0], coords[:, 1])
+        self.altitude = np.array(coords[:, 2], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.altitude)
+
+    def horizontal_distances(self, latitude: float, longitude: float) -> np.ndarray:
+        east, north = self.plane.to_en(latitude, longitude)
+        return np.hypot(self.east - east, self.north - north)
+
+    def within(self, latitude: float, longitude: float, altitude: float, horizontal_radius: float,
+               vertical_radius: float = math.inf) -> np.ndarray:
+        """Indexes of the waypoints inside the given cylinder around the point, in mission order."""
+        east, north = self.plane.to_en(latitude, longitude)
+        d_east = self.east - east
+        d_north = self.north - north
+        inside = (d_east * d_east + d_north * d_north < horizontal_radius * horizontal_radius) & (
+                np.abs(self.altitude - altitude) < vertical_radius)
+        return np.flatnonzero(inside)
+
+    def nearest(self, latitude: float, longitude: float) -> tuple[int, float]:
+        if len(self) == 0:
+            return -1, math.inf
+        distances = self.horizontal_distances(latitude, longitude)
+        index = int(np.argmin(distances))
+        return index, float(distances[index])
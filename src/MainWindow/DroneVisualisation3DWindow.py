@@ -1,7 +1,7 @@
 import numpy as np
 from PyQt5 import Qt3DExtras, Qt3DCore
 from PyQt5.Qt3DExtras import QSphereMesh
-from PyQt5.Qt3DRender import QGeometry, QMesh
+from PyQt5.Qt3DRender import QGeometry, QMesh, QRenderSettings
 from PyQt5.QtCore import QObject, pyqtSignal, pyqtProperty, QPropertyAnimation, QUrl
 from PyQt5.QtGui import QMatrix4x4, QVector3D, QQuaternion
 
@@ -96,6 +96,9 @@ class DroneVisualisation3DWindow(Qt3DExtras.Qt3DWindow):
     def __init__(self):
         super().__init__()
 
+        # Redraw only when the scene changes (attitude animation, camera moves), not every vsync
+        self.renderSettings().setRenderPolicy(QRenderSettings.OnDemand)
+
         # Camera
         self.camera().lens().setPerspectiveProjection(45, 16 / 9, 0.1, 1000)
         self.camera().setPosition(QVector3D(0, 0, 40))
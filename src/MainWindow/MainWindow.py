@@ -1,13 +1,16 @@
-from PyQt5.QtCore import QSize, Qt, QObject, pyqtSlot
+from PyQt5.QtCore import QSize, Qt, QObject, pyqtSlot, pyqtSignal
 from PyQt5.QtGui import QIcon, QPixmap
 from PyQt5.QtWidgets import QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QLabel, QGridLayout, QPushButton, \
-    QToolButton, QSizePolicy
+    QToolButton, QSizePolicy, QComboBox
 
 from DataLogging.DataLoggingWindowUI import DataLoggingWindowUI, DataLoggingWindow
+from Diagnostics.DiagnosticsWindowUI import DiagnosticsWindowUI, DiagnosticsWindow
 from MapDisplay.MapDisplayWindowUI import MapDisplayWindow, MapDisplayWindowUI
 from PidTuning.PidTuningWindowUI import PidTuningWindowUI
 
-from DroneModel import DroneModel
+from FleetModel import FleetModel
+from DroneModel import DroneModel, CHANNEL_STATUS, CHANNEL_POSITION, CHANNEL_ATTITUDE, CHANNEL_VELOCITY, \
+    CHANNEL_BATTERY, CHANNEL_WAYPOINTS
 
 from MainWindow.DroneVisualisation import DroneVisualisationUI, DroneVisualisation
 from MainWindow.VehicleCondition import VehicleConditionUI
@@ -15,12 +18,28 @@ from MainWindow.VehicleDirection import VehicleDirectionUI
 from VehicleStatus import Position
 from VehicleStatus import VehicleStatus
 
+# Maximum refresh rate of each UI consumer of the drone model
+LABELS_MAX_RATE_HZ = 10
+MAP_MAX_RATE_HZ = 10
+# Matches the 100 ms rotation animation in OrbitTransformController
+VIEW_3D_MAX_RATE_HZ = 10
+# Markers of the other (non active) vehicles of a fleet
+FLEET_MAP_MAX_RATE_HZ = 2
+
+# How long a failed command stays in the status bar
+COMMAND_FAILED_MESSAGE_MS = 10_000
+
+# Consumers that only draw into one window, paused while it is hidden or minimised
+MAIN_WINDOW_CONSUMERS = ("labels", "3d")
+MAP_WINDOW_CONSUMERS = ("map", "fleet_map")
+
 
 class MainWindow(QObject):
-    def __init__(self, view: "MainWindowUI", model: "DroneModel"):
+    def __init__(self, view: "MainWindowUI", model: "DroneModel", fleet: "FleetModel" = None):
         super().__init__()
         self._view = view
         self._model = model
+        self._fleet = fleet
         
         # Initialize PID tuning window with drone model
         self._view.pid_tuning_window = PidTuningWindowUI(self._model)
@@ -28,10 +47,70 @@ class MainWindow(QObject):
         self.map_display_window_controller = MapDisplayWindow(view=self._view.map_display_window, model=self._model)
         self.drone_visualization_controller = DroneVisualisation(view=self._view.drone_visualisation_widget)
         self.data_logging_controller = DataLoggingWindow(view=self._view.data_logging_window, model=self._model)
+        self.diagnostics_controller = DiagnosticsWindow(view=self._view.diagnostics_window, model=self._model)
+
+        self._main_window_visible = self._view.isVisible()
+        self._map_window_visible = self._view.map_display_window.isVisible()
+
+        self._register_ui_consumers()
 
-        self._model.ui_update_signal.connect(self.update_ui)
+        if self._fleet is not None and len(self._fleet) > 1:
+            self._setup_fleet()
 
+        self._apply_window_visibility()
         self._connect_window_buttons()
+        self._connect_window_visibility()
+        self._connect_command_failures()
+
+    def _register_ui_consumers(self):
+        scheduler = self._model.ui_scheduler
+        scheduler.register("labels", self._on_labels_update,
+                           (CHANNEL_STATUS, CHANNEL_POSITION, CHANNEL_ATTITUDE, CHANNEL_VELOCITY, CHANNEL_BATTERY),
+                           LABELS_MAX_RATE_HZ)
+        scheduler.register("map", self._on_map_update, (CHANNEL_POSITION, CHANNEL_WAYPOINTS), MAP_MAX_RATE_HZ)
+        scheduler.register("3d", self._on_3d_update, (CHANNEL_ATTITUDE,), VIEW_3D_MAX_RATE_HZ)
+
+    def _unregister_ui_consumers(self):
+        for name in ("labels", "map", "3d"):
+            self._model.ui_scheduler.unregister(name)
+
+    def _setup_fleet(self):
+        self._view.set_vehicle_names([vehicle.name for vehicle in self._fleet.vehicles], self._fleet.active_index)
+        self._view.vehicle_selector.currentIndexChanged.connect(self._fleet.set_active_vehicle)
+        self._fleet.active_vehicle_changed.connect(self._on_active_vehicle_changed)
+
+        for vehicle in self._fleet.vehicles:
+            vehicle.ui_scheduler.register("fleet_map", self._on_fleet_update, (CHANNEL_POSITION,),
+                                          FLEET_MAP_MAX_RATE_HZ)
+            # The whole fleet is logged, the selector only picks the log shown
+            self.data_logging_controller.add_model(vehicle)
+        self.data_logging_controller.set_model(self._model)
+
+    @pyqtSlot(int)
+    def _on_active_vehicle_changed(self, index: int):
+        self._unregister_ui_consumers()
+        self._model = self._fleet.vehicle(index)
+
+        self._view.pid_tuning_window.drone_model = self._model
+        self.map_display_window_controller.set_model(self._model)
+        self.data_logging_controller.set_model(self._model)
+        self.diagnostics_controller.set_model(self._model)
+
+        self._register_ui_consumers()
+        self._apply_window_visibility()
+        self._on_fleet_update(frozenset())
+
+    def _connect_command_failures(self):
+        # Every vehicle reports, a failure on one that is not selected still needs to be seen
+        vehicles = [self._model] if self._fleet is None else self._fleet.vehicles
+        for vehicle in vehicles:
+            vehicle.commands.command_failed.connect(
+                lambda command, error, name=vehicle.name: self._view.show_command_failed(name, command, error))
+
+    def _on_fleet_update(self, _channels: frozenset):
+        others = [status.position for i, status in enumerate(self._fleet.get_fleet_status())
+                  if i != self._fleet.active_index]
+        self.map_display_window_controller.update_fleet_markers(others)
 
     def _connect_window_buttons(self):
         self._view.map_button.clicked.connect(
@@ -58,16 +137,49 @@ class MainWindow(QObject):
             lambda: self._view.set_data_log_checked(False)
         )
 
-    @pyqtSlot(bool)
-    def update_ui(self, waypoints_updated: bool):
-        vehicle_status = self._model.get_vehicle_status()
-        waypoints = self._model.get_waypoints()
+        self._view.diagnostics_button.clicked.connect(
+            lambda checked: self._toggle_window(self._view.diagnostics_window, checked)
+        )
 
-        self.update_map_display_ui(vehicle_status, waypoints, waypoints_updated)
+        self._view.diagnostics_window.window_closed_signal.connect(
+            lambda: self._view.set_diagnostics_checked(False)
+        )
+
+    def _connect_window_visibility(self):
+        self._view.window_shown_signal.connect(lambda: self._set_window_visible(main_window=True))
+        self._view.window_hidden_signal.connect(lambda: self._set_window_visible(main_window=False))
+        self._view.map_display_window.window_shown_signal.connect(lambda: self._set_window_visible(map_window=True))
+        self._view.map_display_window.window_hidden_signal.connect(lambda: self._set_window_visible(map_window=False))
+
+    def _set_window_visible(self, main_window: bool = None, map_window: bool = None):
+        if main_window is not None:
+            self._main_window_visible = main_window
+        if map_window is not None:
+            self._map_window_visible = map_window
+        self._apply_window_visibility()
+
+    def _apply_window_visibility(self):
+        # A resumed consumer is delivered everything that changed while it was paused
+        schedulers = [self._model.ui_scheduler] if self._fleet is None else \
+            [vehicle.ui_scheduler for vehicle in self._fleet.vehicles]
+        for scheduler in schedulers:
+            for name in MAIN_WINDOW_CONSUMERS:
+                scheduler.set_paused(name, not self._main_window_visible)
+            for name in MAP_WINDOW_CONSUMERS:
+                scheduler.set_paused(name, not self._map_window_visible)
+
+    def _on_labels_update(self, _channels: frozenset):
+        self._update_values(self._model.get_vehicle_status())
+
+    def _on_map_update(self, channels: frozenset):
+        self.update_map_display_ui(self._model.get_vehicle_status(), self._model.get_waypoints(),
+                                   CHANNEL_WAYPOINTS in channels)
+
+    def _on_3d_update(self, _channels: frozenset):
+        self.drone_visualization_controller.update_drone_3d_model(self._model.get_vehicle_status().attitude)
 
     def update_map_display_ui(self, vehicle_status: VehicleStatus, waypoints: list['Position'], waypoints_updated: bool):
         self.map_display_window_controller.update_map_on_drone_move(vehicle_status, waypoints, waypoints_updated)
-        self._update_values(vehicle_status)
 
     def _update_values(self, vehicle_status: 'VehicleStatus'):
         self._view.vehicle_direction_widget.set_direction_values(vehicle_status.position, vehicle_status.attitude,
@@ -75,7 +187,6 @@ class MainWindow(QObject):
         self._view.vehicle_condition_widget.set_condition_values(vehicle_status.heartbeat, vehicle_status.in_air,
                                                                  vehicle_status.battery_voltage,
                                                                  vehicle_status.battery_percentage)
-        self.drone_visualization_controller.update_drone_3d_model(vehicle_status.attitude)
 
     @staticmethod
     def _toggle_window(window, state):
@@ -87,6 +198,9 @@ class MainWindow(QObject):
 
 
 class MainWindowUI(QMainWindow):
+    window_shown_signal = pyqtSignal()
+    window_hidden_signal = pyqtSignal()
+
     def __init__(self):
         super().__init__()
 
@@ -109,6 +223,10 @@ class MainWindowUI(QMainWindow):
         """)
         self.sidebar_layout = QVBoxLayout()
 
+        # Only shown when more than one vehicle is connected
+        self.vehicle_selector = QComboBox()
+        self.vehicle_selector.setVisible(False)
+
         self.map_button = QToolButton()
         self.map_button.setMaximumHeight(150)
         self.map_button.setCheckable(True)
@@ -152,9 +270,25 @@ class MainWindowUI(QMainWindow):
         self.data_logging_button.setToolButtonStyle(Qt.ToolButtonStyle.ToolButtonTextUnderIcon)
         self.data_logging_button.setIconSize(QSize(90, 90))
 
+        self.diagnostics_button = QToolButton()
+        self.diagnostics_button.setMaximumHeight(150)
+        self.diagnostics_button.setCheckable(True)
+        self.diagnostics_button.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Expanding)
+        self.diagnostics_button.setText("Diagnostics")
+        self.diagnostics_button.setIcon(
+            QIcon(QPixmap(":/image-placeholder.png").scaled(QSize(90, 90),
+                                                            Qt.AspectRatioMode.KeepAspectRatio,
+                                                            Qt.TransformationMode.SmoothTransformation)
+                  )
+        )
+        self.diagnostics_button.setToolButtonStyle(Qt.ToolButtonStyle.ToolButtonTextUnderIcon)
+        self.diagnostics_button.setIconSize(QSize(90, 90))
+
+        self.sidebar_layout.addWidget(self.vehicle_selector)
         self.sidebar_layout.addWidget(self.map_button)
         self.sidebar_layout.addWidget(self.pid_tuning_button)
         self.sidebar_layout.addWidget(self.data_logging_button)
+        self.sidebar_layout.addWidget(self.diagnostics_button)
 
         self.sidebar_widget.setLayout(self.sidebar_layout)
         self.sidebar_widget.setFixedWidth(120)
@@ -196,6 +330,18 @@ class MainWindowUI(QMainWindow):
         # PID tuning window will be created by MainWindow controller with drone model
         self.pid_tuning_window = None  
         self.map_display_window = MapDisplayWindowUI()
+        self.diagnostics_window = DiagnosticsWindowUI()
+
+    def set_vehicle_names(self, names: list[str], current_index: int):
+        self.vehicle_selector.blockSignals(True)
+        self.vehicle_selector.clear()
+        self.vehicle_selector.addItems(names)
+        self.vehicle_selector.setCurrentIndex(current_index)
+        self.vehicle_selector.blockSignals(False)
+        self.vehicle_selector.setVisible(len(names) > 1)
+
+    def show_command_failed(self, vehicle_name: str, command: str, error: str):
+        self.statusBar().showMessage(f"{vehicle_name} {command} failed: {error}", COMMAND_FAILED_MESSAGE_MS)
 
     @pyqtSlot(bool)
     def set_map_button_checked(self, checked):
@@ -209,11 +355,25 @@ class MainWindowUI(QMainWindow):
     def set_pid_tuning_checked(self, checked):
         self.pid_tuning_button.setChecked(checked)
 
+    @pyqtSlot(bool)
+    def set_diagnostics_checked(self, checked):
+        self.diagnostics_button.setChecked(checked)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.window_shown_signal.emit()
+
+    def hideEvent(self, event):
+        # Also sent, spontaneously, when the window is minimised
+        super().hideEvent(event)
+        self.window_hidden_signal.emit()
+
     def closeEvent(self, event):
         event.ignore()
 
         self.data_logging_window.close()
         self.map_display_window.close()
         self.pid_tuning_window.close()
+        self.diagnostics_window.close()
 
         super().closeEvent(event)
@@ -0,0 +1,50 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# waypoint_selected argument when no waypoint is highlighted, ids start at 1
+NO_WAYPOINT = -1
+
+
+class MapBridge(QObject):
+    """
+    Pushes MapUpdateBatcher messages to the map page as typed Qt WebChannel signals.
+
+    Registered on the page's channel as ``bridge``, map.js connects a handler to each signal. The
+    arguments travel as JSON that the page parses natively, so an update builds no JavaScript source
+    in Python and compiles none in the page, unlike ``runJavaScript``. Only lists, numbers and bools
+    cross the channel (tuples arrive as null).
+    """
+
+    # The page is empty again, every later signal rebuilds it
+    reset = pyqtSignal()
+
+    # latitude, longitude
+    drone_moved = pyqtSignal(float, float)
+
+    # Removed waypoint ids, added [id, latitude, longitude] rows (appended in flying order), and the
+    # whole id order when surviving waypoints changed places (empty otherwise)
+    mission_changed = pyqtSignal(list, list, list)
+
+    # Waypoint id, or NO_WAYPOINT
+    waypoint_selected = pyqtSignal(int)
+
+    # Rebuilt (the vertices replace the line) or extended, [latitude, longitude] vertices
+    track_changed = pyqtSignal(bool, list)
+
+    # [latitude, longitude] of the other vehicles
+    fleet_moved = pyqtSignal(list)
+
+    def publish(self, update: dict):
+        # In the order the page has to apply them: the drone and mission before what refers to them
+        if update.get("reset"):
+            self.reset.emit()
+        if "drone" in update:
+            self.drone_moved.emit(*update["drone"])
+        if "removed" in update or "added" in update or "order" in update:
+            self.mission_changed.emit(update.get("removed", []), update.get("added", []), update.get("order", []))
+        if "selected" in update:
+            selected = update["selected"]
+            self.waypoint_selected.emit(NO_WAYPOINT if selected is None else selected)
+        if "track" in update:
+            self.track_changed.emit(update["track"]["reset"], update["track"]["add"])
+        if "fleet" in update:
+            self.fleet_moved.emit(update["fleet"])
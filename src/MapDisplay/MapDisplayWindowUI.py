@@ -1,19 +1,29 @@
-import json
+import threading
 
-from PyQt5.QtCore import QSize, QUrl, QObject, pyqtSlot, QVariant, pyqtSignal
+import numpy as np
+from PyQt5.QtCore import Qt, QSize, QUrl, QObject, QTimer, pyqtSlot, QVariant, pyqtSignal
 from PyQt5.QtGui import QDoubleValidator
 from PyQt5.QtWebChannel import QWebChannel
 from PyQt5.QtWebEngineWidgets import QWebEngineView
-from PyQt5.QtWidgets import QWidget, QLabel, QSizePolicy, QHBoxLayout, QVBoxLayout, QGroupBox, QPushButton, QTreeWidget, \
-    QTreeWidgetItem, QHeaderView, QLineEdit, QButtonGroup
+from PyQt5.QtWidgets import QWidget, QLabel, QSizePolicy, QHBoxLayout, QVBoxLayout, QGroupBox, QPushButton, QTableView, \
+    QHeaderView, QLineEdit, QAbstractItemView
 
 from VehicleStatus import Position, VehicleStatus
 from DroneModel import DroneModel
+from MissionStore import MissionSnapshot
+from MapDisplay.MapBridge import MapBridge
+from MapDisplay.MapUpdateBatcher import MapUpdateBatcher
+from MapDisplay.MapScheme import MAP_PAGE_URL, install_map_scheme
+from MapDisplay.TilePrefetcher import TilePrefetcher, PrefetchProgress, bulk_download_allowed
+from MapDisplay.WaypointTableModel import WaypointTableModel, DeleteButtonDelegate, COLUMN_DELETE
 
 
 class MapDisplayWindow(QObject):
     is_add_waypoint_button_checked = False
 
+    # Emitted from the prefetch thread, delivered queued on the Qt thread
+    prefetch_progress_signal = pyqtSignal(object)
+
     def __init__(self, view: 'MapDisplayWindowUI', model: "DroneModel"):
         super().__init__()
         self._view = view
@@ -21,43 +31,127 @@ class MapDisplayWindow(QObject):
         self._view.connect_signals_and_slots()
 
         self._map_ready = False
+        # Nothing is sent to the page while the window is hidden, the batcher keeps the latest state
+        self._visible = self._view.isVisible()
+        # State the page already shows, flushed as one MapBridge.publish() per frame
+        self._map_updates = MapUpdateBatcher()
+        self._flush_scheduled = False
+        self._prefetch_cancel: threading.Event | None = None
+        self.prefetch_progress_signal.connect(self._on_prefetch_progress)
         self._setup_map_logic()
 
+        reason = self._prefetch_unavailable_reason()
+        if reason is not None:
+            self._view.set_prefetch_unavailable(reason)
+
     def _setup_map_logic(self):
         self._view.map_finished_loading_signal.connect(self._init_map)
+        self._view.window_shown_signal.connect(self._on_window_shown)
+        self._view.window_hidden_signal.connect(self._on_window_hidden)
 
     def _init_map(self):
         self._view.map_clicked_signal.connect(self._on_map_clicked)
 
+        self._view.map_zoom_changed_signal.connect(self._on_map_zoom_changed)
+
         self._view.add_waypoint_button_clicked_signal.connect(self._on_add_waypoint_button_clicked)
 
-        self._view.list_current_item_changed_signal.connect(self._on_list_current_item_changed_slot)
+        self._view.list_current_row_changed_signal.connect(self._on_list_current_row_changed_slot)
 
-        self._view.button_group_clicked_signal.connect(self._on_del_button_group_clicked)
+        self._view.delete_waypoint_clicked_signal.connect(self._on_delete_waypoint_clicked)
 
-        self._map_ready = True
+        self._view.optimise_route_button_clicked_signal.connect(self._on_optimise_route_button_clicked)
 
-    def update_map_on_drone_move(self, vehicle_status: VehicleStatus, waypoints: list['Position'],
-                                 waypoints_updated: bool):
+        self._view.prefetch_tiles_button_clicked_signal.connect(self._on_prefetch_tiles_button_clicked)
+
+        self._map_ready = True
+        self._show_full_state()
+
+    def _render_list(self, waypoints: 'MissionSnapshot', force: bool = False):
+        # The table model diffs by version and waypoint id, an unchanged mission costs nothing
+        self._view.render_list_ui(waypoints, reset=force)
+
+    def _show_full_state(self):
+        waypoints = self._model.get_waypoints()
+        self._map_updates.reset()
+        self._map_updates.set_drone(self._model.get_vehicle_status().position)
+        self._map_updates.set_track(self._model.get_track())
+        self._map_updates.set_waypoints(waypoints)
+        self._map_updates.set_selected(waypoints.current_id)
+        self._flush_map_updates()
+
+    def _show_waypoints(self, waypoints: 'MissionSnapshot'):
+        self._map_updates.set_waypoints(waypoints)
+        self._schedule_map_flush()
+        self._render_list(waypoints)
+
+    def _schedule_map_flush(self):
+        # Updates made from UI events are merged into one message at the end of the event
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            QTimer.singleShot(0, self._flush_map_updates)
+
+    def _flush_map_updates(self):
+        self._flush_scheduled = False
+        if not self._map_ready or not self._visible:
+            return
+        update = self._map_updates.take()
+        if update is not None:
+            self._view.apply_map_update(update)
+
+    @pyqtSlot()
+    def _on_window_shown(self):
+        self._visible = True
+        # Catch up with the latest snapshot in one message, the page still shows the state it was hidden with
+        waypoints = self._model.get_waypoints()
+        self._map_updates.set_drone(self._model.get_vehicle_status().position)
+        self._map_updates.set_track(self._model.get_track())
+        self._map_updates.set_waypoints(waypoints)
+        self._render_list(waypoints)
+        self._flush_map_updates()
+
+    @pyqtSlot()
+    def _on_window_hidden(self):
+        self._visible = False
+
+    def set_model(self, model: "DroneModel"):
+        self._model = model
+        self._render_list(self._model.get_waypoints(), force=True)
         if self._map_ready:
-            self._view.render_map_polylines_ui(vehicle_status.position, waypoints)
-            self._view.render_map_waypoints_ui(vehicle_status.position, waypoints, 0 if waypoints_updated else -1)
+            self._show_full_state()
+
+    def update_fleet_markers(self, positions: list['Position']):
+        self._map_updates.set_fleet(positions)
+        self._schedule_map_flush()
 
+    def update_map_on_drone_move(self, vehicle_status: VehicleStatus, waypoints: 'MissionSnapshot',
+                                 waypoints_updated: bool):
+        self._map_updates.set_drone(vehicle_status.position)
+        self._map_updates.set_track(self._model.get_track())
+        self._map_updates.set_waypoints(waypoints)
         if waypoints_updated:
-            self._view.render_list_ui(waypoints)
+            # The current target is highlighted whenever the mission changes
+            self._map_updates.set_selected(waypoints.current_id)
+            self._render_list(waypoints)
+        self._flush_map_updates()
 
     @pyqtSlot(bool)
     def _on_add_waypoint_button_clicked(self, checked):
         self.is_add_waypoint_button_checked = checked
         self._view.map_on_add_waypoint_button_clicked(checked)
 
-    @pyqtSlot(QTreeWidgetItem, QTreeWidgetItem)
-    def _on_list_current_item_changed_slot(self, curr: 'QTreeWidgetItem', _):
-        if curr is not None:
-            selected_item = curr.data(0, 0)
+    @pyqtSlot(int)
+    def _on_map_zoom_changed(self, zoom: int):
+        # The track is simplified to about a pixel, a new zoom level rebuilds it
+        self._map_updates.set_zoom(zoom)
+        self._schedule_map_flush()
 
-            self._view.render_map_waypoints_ui(self._model.get_vehicle_status().position, self._model.get_waypoints(),
-                                               selected_item)
+    @pyqtSlot(int)
+    def _on_list_current_row_changed_slot(self, row: int):
+        waypoint_id = self._view.waypoint_table_model.waypoint_id(row)
+        if waypoint_id is not None:
+            self._map_updates.set_selected(waypoint_id)
+            self._schedule_map_flush()
 
     @pyqtSlot(QVariant)
     def _on_map_clicked(self, args):
@@ -73,35 +167,106 @@ class MapDisplayWindow(QObject):
             return
 
         self._model.add_waypoint_to_end(Position(args['lat'], args['lng'], alt_val))
-
-        self._view.render_map_waypoints_ui(self._model.get_vehicle_status().position, self._model.get_waypoints(), -1)
-        self._view.render_map_polylines_ui(self._model.get_vehicle_status().position, self._model.get_waypoints())
-        self._view.render_list_ui(self._model.get_waypoints())
+        self._show_waypoints(self._model.get_waypoints())
 
         self.is_add_waypoint_button_checked = False
         self._view.map_on_add_waypoint_button_clicked(False)
 
+    @pyqtSlot()
+    def _on_optimise_route_button_clicked(self):
+        if len(self._model.get_waypoints()) < 2:
+            return
+        self._view.set_optimise_route_busy(True)
+        self._model.commands.optimise_route(on_done=self._on_route_optimised,
+                                            on_error=lambda _: self._view.set_optimise_route_busy(False))
+
+    def _on_route_optimised(self, result):
+        self._view.set_optimise_route_busy(False)
+        self._show_waypoints(self._model.get_waypoints())
+
+    @pyqtSlot()
+    def _on_prefetch_tiles_button_clicked(self):
+        if self._prefetch_cancel is not None:
+            self._prefetch_cancel.set()
+            return
+
+        reason = self._prefetch_unavailable_reason()
+        if reason is not None:
+            self._view.set_prefetch_status(reason)
+            return
+        handler = install_map_scheme()
+
+        # The route as it will be flown: from the vehicle through the remaining waypoints
+        route = self._model.get_waypoints().coords[:, :2]
+        status = self._model.get_vehicle_status()
+        if status.heartbeat and status.position_time > 0.0:
+            route = np.vstack(((status.position.latitude, status.position.longitude), route))
+        if len(route) == 0:
+            self._view.set_prefetch_status("Add waypoints first")
+            return
+
+        prefetcher = TilePrefetcher(handler.store, handler.prefetch_source)
+        self._prefetch_cancel = cancel = threading.Event()
+        self._view.set_prefetch_busy(True)
+        threading.Thread(target=self._run_prefetch, args=(prefetcher, route, cancel), daemon=True,
+                         name="tile-prefetch").start()
+
+    @staticmethod
+    def _prefetch_unavailable_reason() -> str | None:
+        handler = install_map_scheme()
+        if handler.store is None:
+            return "Prefetch needs a tile store (MAP_TILES_FILE)"
+        if handler.prefetch_source is None:
+            return "Prefetch is off: set MAP_PREFETCH_SOURCE to a tile server that allows bulk downloads"
+        if not bulk_download_allowed(handler.prefetch_source):
+            # The OpenStreetMap tile policy forbids it, doing it anyway gets the app blocked
+            return "Prefetch is off: MAP_PREFETCH_SOURCE does not allow bulk downloads, use another tile server"
+        return None
+
+    def _run_prefetch(self, prefetcher: 'TilePrefetcher', route: np.ndarray, cancel: 'threading.Event'):
+        try:
+            prefetcher.prefetch(route, on_progress=self.prefetch_progress_signal.emit, cancel=cancel)
+        except Exception as e:
+            print(f"Tile prefetch: {e!r}")
+            self.prefetch_progress_signal.emit(PrefetchProgress(finished=True, cancelled=True))
+
+    def _on_prefetch_progress(self, progress: 'PrefetchProgress'):
+        text = (f"Tiles {progress.done}/{progress.total} ({progress.skipped} cached, {progress.failed} failed), "
+                f"{progress.store_bytes / 1e6:.1f} MB on disk")
+        if progress.finished:
+            text = ("Cancelled: " if progress.cancelled else "Done: ") + text
+            self._prefetch_cancel = None
+            self._view.set_prefetch_busy(False)
+        self._view.set_prefetch_status(text)
+
     @pyqtSlot(int)
-    def _on_del_button_group_clicked(self, button_id):
-        # print(button_id)
-        self._model.remove_waypoint(button_id)
-        self._view.render_map_waypoints_ui(self._model.get_vehicle_status().position, self._model.get_waypoints(), -1)
-        self._view.render_map_polylines_ui(self._model.get_vehicle_status().position, self._model.get_waypoints())
-        self._view.render_list_ui(self._model.get_waypoints())
+    def _on_delete_waypoint_clicked(self, row: int):
+        # By id, the row the user clicked may have moved if a waypoint was reached meanwhile
+        waypoint_id = self._view.waypoint_table_model.waypoint_id(row)
+        if waypoint_id is not None and self._model.remove_waypoint_id(waypoint_id):
+            self._show_waypoints(self._model.get_waypoints())
 
 
 class MapDisplayWindowUI(QWidget):
     map_clicked_signal = pyqtSignal(QVariant)
 
+    map_zoom_changed_signal = pyqtSignal(int)
+
     map_finished_loading_signal = pyqtSignal()
 
     window_closed_signal = pyqtSignal()
+    window_shown_signal = pyqtSignal()
+    window_hidden_signal = pyqtSignal()
 
     add_waypoint_button_clicked_signal = pyqtSignal(bool)
 
-    list_current_item_changed_signal = pyqtSignal(QTreeWidgetItem, QTreeWidgetItem)
+    list_current_row_changed_signal = pyqtSignal(int)
+
+    delete_waypoint_clicked_signal = pyqtSignal(int)
+
+    optimise_route_button_clicked_signal = pyqtSignal()
 
-    button_group_clicked_signal = pyqtSignal(int)
+    prefetch_tiles_button_clicked_signal = pyqtSignal()
 
     def __init__(self):
         super().__init__()
@@ -114,7 +279,7 @@ class MapDisplayWindowUI(QWidget):
         self.map_widget = WebView()
         self.map_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.map_widget.setMinimumSize(100, 100)
-        self.map_widget.load(QUrl("qrc:///map.html"))
+        self.map_widget.load(QUrl(MAP_PAGE_URL))
 
         layout.addWidget(self.map_widget)
 
@@ -149,41 +314,47 @@ class MapDisplayWindowUI(QWidget):
         self.waypoint_widget_layout.setSpacing(0)
         self.waypoint_widget.setLayout(self.waypoint_widget_layout)
 
-        self.list = QTreeWidget()
-        self.list.setRootIsDecorated(False)
+        self.waypoint_table_model = WaypointTableModel()
+        self.delete_waypoint_delegate = DeleteButtonDelegate()
+
+        self.list = QTableView()
+        self.list.setModel(self.waypoint_table_model)
+        self.list.setItemDelegateForColumn(COLUMN_DELETE, self.delete_waypoint_delegate)
+        self.list.setShowGrid(False)
+        self.list.setWordWrap(False)
+        # Fixed row heights let the view lay out any number of rows without measuring each one
+        self.list.verticalHeader().hide()
+        self.list.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.list.verticalHeader().setDefaultSectionSize(22)
+        self.list.horizontalHeader().setDefaultAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+        self.list.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.list.setSelectionMode(QAbstractItemView.SingleSelection)
         self.list.setContentsMargins(0, 0, 0, 0)
         self.list.setMaximumHeight(250)
         self.list.setAlternatingRowColors(True)
-        self.list.header().setSectionsMovable(False)
-        self.list.header().setDragEnabled(False)
-        self.list.header().setSectionResizeMode(QHeaderView.Fixed)
+        self.list.horizontalHeader().setSectionsMovable(False)
+        self.list.horizontalHeader().setDragEnabled(False)
+        self.list.horizontalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.list.horizontalHeader().setStretchLastSection(True)
         self.list.setStyleSheet("""
-            QTreeView::item:hover:!selected {
+            QTableView::item:hover:!selected {
                 color: black;
                 background-color: transparent;
             }
             
-            QTreeView {
+            QTableView {
                 border: none; 
                 border-top: 1px solid gray;
                 border-bottom: 1px solid gray;
             }
         """)
 
-        self.list.setColumnCount(5)
-        self.list.setHeaderLabels(['No.', 'lat', 'lng', 'alt', ''])
-        self.list.setColumnWidth(0, 5)
+        self.list.setColumnWidth(0, 40)
         self.list.setColumnWidth(1, 74)
         self.list.setColumnWidth(2, 74)
         self.list.setColumnWidth(3, 67)
         self.list.setColumnWidth(4, 10)
 
-        self.delete_list_item_button_group = QButtonGroup()
-        self.delete_list_item_button_group.setExclusive(False)
-        self.q_tree_widget_items: list['QTreeWidgetItem'] = []
-
-        # self.list.currentItemChanged.connect(lambda x: print(x.text()))
-
         self.waypoint_widget_layout.addWidget(self.list)
 
         self.alt_text_input_container = QWidget()
@@ -232,6 +403,26 @@ class MapDisplayWindowUI(QWidget):
 
         self.waypoint_widget_layout.addWidget(self.add_waypoint_button)
 
+        self.optimise_route_button = QPushButton("Optimise Route")
+
+        self.optimise_route_button.setToolTip("Reorder the remaining waypoints into the shortest route")
+
+        self.waypoint_widget_layout.addWidget(self.optimise_route_button)
+
+        self.prefetch_tiles_button = QPushButton("Prefetch Map Tiles")
+
+        self.prefetch_tiles_button.setToolTip("Download the map along the route for offline use")
+
+        self.waypoint_widget_layout.addWidget(self.prefetch_tiles_button)
+
+        self.prefetch_status_label = QLabel("")
+
+        self.prefetch_status_label.setWordWrap(True)
+
+        self.prefetch_status_label.setContentsMargins(5, 5, 5, 0)
+
+        self.waypoint_widget_layout.addWidget(self.prefetch_status_label)
+
         self.waypoint_widget_layout.addStretch()
 
         # -----------------------
@@ -244,15 +435,35 @@ class MapDisplayWindowUI(QWidget):
 
     def connect_signals_and_slots(self):
         self.map_widget.handler.map_clicked.connect(self.map_clicked_signal)
+        self.map_widget.handler.zoom_changed.connect(self.map_zoom_changed_signal)
         self.add_waypoint_button.clicked.connect(self.add_waypoint_button_clicked_signal)
-        self.map_widget.loadFinished.connect(self.map_finished_loading_signal)
-        self.list.currentItemChanged.connect(self.list_current_item_changed_signal)
-        self.delete_list_item_button_group.idClicked.connect(self.button_group_clicked_signal)
+        self.optimise_route_button.clicked.connect(self.optimise_route_button_clicked_signal)
+        self.prefetch_tiles_button.clicked.connect(self.prefetch_tiles_button_clicked_signal)
+        # Not loadFinished: signals emitted before map.js has connected to the bridge are lost
+        self.map_widget.handler.ready.connect(self.map_finished_loading_signal)
+        self.list.selectionModel().currentRowChanged.connect(
+            lambda current, _: self.list_current_row_changed_signal.emit(current.row()))
+        self.delete_waypoint_delegate.delete_clicked.connect(self.delete_waypoint_clicked_signal)
 
     def map_on_add_waypoint_button_clicked(self, checked):
         self.map_widget.page().runJavaScript(f"map_on_add_waypoint_button_clicked({'true' if checked else 'false'})")
         self.add_waypoint_button.setChecked(checked)
 
+    def set_optimise_route_busy(self, busy: bool):
+        self.optimise_route_button.setEnabled(not busy)
+        self.optimise_route_button.setText("Optimising..." if busy else "Optimise Route")
+
+    def set_prefetch_busy(self, busy: bool):
+        self.prefetch_tiles_button.setText("Cancel Prefetch" if busy else "Prefetch Map Tiles")
+
+    def set_prefetch_unavailable(self, reason: str):
+        self.prefetch_tiles_button.setEnabled(False)
+        self.prefetch_tiles_button.setToolTip(reason)
+        self.prefetch_status_label.setText(reason)
+
+    def set_prefetch_status(self, text: str):
+        self.prefetch_status_label.setText(text)
+
     def get_alt_text_input_value(self) -> float | None:
         val = self.alt_text_input_line_edit.text()
 
@@ -267,63 +478,21 @@ class MapDisplayWindowUI(QWidget):
     def get_current_selected_list_item(self):
         return self.list.currentIndex()
 
-    def render_list_ui(self, waypoints: list['Position']):
-        # cur_index = self.list.currentIndex()
-        for button in self.delete_list_item_button_group.buttons():
-            self.delete_list_item_button_group.removeButton(button)
-
-        self.list.clear()
-        self.q_tree_widget_items = []
-
-        for i, waypoint in enumerate(waypoints):
-            item = QTreeWidgetItem()
-            item.setText(0, f"{i}")
-            item.setText(1, f"{waypoint.latitude:.6f}°")
-            item.setText(2, f"{waypoint.longitude:.6f}°")
-            item.setText(3, f"{waypoint.altitude:.2f}m")
-
-            self.q_tree_widget_items.append(item)
-
-            self.list.addTopLevelItem(item)
-
-            button = QPushButton("X")
-
-            self.delete_list_item_button_group.addButton(button, i)
-
-            self.list.setItemWidget(item, 4, button)
+    def render_list_ui(self, waypoints: 'MissionSnapshot', reset: bool = False):
+        self.waypoint_table_model.set_waypoints(waypoints, reset)
 
-            # print(self.delete_list_item_button_group.buttons())
+    def apply_map_update(self, update: dict):
+        # One delta message built by MapUpdateBatcher, delivered as bridge signals
+        self.map_widget.bridge.publish(update)
 
-        # if cur_index is not None:
-        # self.list.setCurrentIndex(cur_index)
+    def showEvent(self, e):
+        super().showEvent(e)
+        self.window_shown_signal.emit()
 
-    def render_map_waypoints_ui(self, drone_position: 'Position', waypoints: list['Position'],
-                                selected_item_num: int):
-
-        self.q_tree_widget_items = []
-
-        waypoint_js_repr = []
-
-        drone_position_js_repr = [drone_position.latitude, drone_position.longitude]
-
-        for waypoint in waypoints:
-            waypoint_js_repr.append([waypoint.latitude, waypoint.longitude])
-
-        self.map_widget.page().runJavaScript(f'''
-            renderMarkers({json.dumps(drone_position_js_repr)}, {json.dumps(waypoint_js_repr)}, {selected_item_num});
-        ''')
-
-    def render_map_polylines_ui(self, drone_position: 'Position', waypoints: list['Position']):
-
-        waypoint_js_repr = []
-        drone_position_js_repr = [drone_position.latitude, drone_position.longitude]
-
-        for waypoint in waypoints:
-            waypoint_js_repr.append([waypoint.latitude, waypoint.longitude])
-
-        self.map_widget.page().runJavaScript(f'''
-            renderPolyLine({json.dumps(drone_position_js_repr)}, {json.dumps(waypoint_js_repr)});
-        ''')
+    def hideEvent(self, e):
+        # Also sent, spontaneously, when the window is minimised
+        super().hideEvent(e)
+        self.window_hidden_signal.emit()
 
     def closeEvent(self, e):
         e.ignore()
@@ -334,6 +503,10 @@ class MapDisplayWindowUI(QWidget):
 class CallHandler(QObject):
     map_clicked = pyqtSignal(QVariant)
 
+    zoom_changed = pyqtSignal(int)
+
+    ready = pyqtSignal()
+
     def __init__(self):
         super().__init__()
 
@@ -341,6 +514,14 @@ class CallHandler(QObject):
     def send_click_coordinates(self, args):
         self.map_clicked.emit(args)
 
+    @pyqtSlot(int)
+    def send_zoom(self, zoom):
+        self.zoom_changed.emit(zoom)
+
+    @pyqtSlot()
+    def map_ready(self):
+        self.ready.emit()
+
 
 class WebView(QWebEngineView):
 
@@ -349,6 +530,11 @@ class WebView(QWebEngineView):
 
         self.channel = QWebChannel()
         self.handler = CallHandler()
+        self.bridge = MapBridge()
 
         self.channel.registerObject('handler', self.handler)
+        self.channel.registerObject('bridge', self.bridge)
         self.page().setWebChannel(self.channel)
+
+        # No-op when main already installed it with the configured tile store
+        install_map_scheme(profile=self.page().profile())
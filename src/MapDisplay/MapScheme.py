@@ -0,0 +1,174 @@
+import mimetypes
+import os
+import re
+
+from PyQt5.QtCore import QBuffer, QIODevice, QUrl, QCoreApplication
+from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
+from PyQt5.QtWebEngineCore import QWebEngineUrlScheme, QWebEngineUrlSchemeHandler, QWebEngineUrlRequestJob
+from PyQt5.QtWebEngineWidgets import QWebEngineProfile
+
+from MapDisplay.TilePrefetcher import bulk_download_allowed
+from MapDisplay.TileStore import MBTilesStore, TileCache, TILE_MEMORY_BYTES, tile_mime
+
+# gcs://app/<file>     the map page and its bundled front-end assets, from this directory
+# gcs://tiles/z/x/y    raster tiles, from memory, then the MBTiles store, then (optionally) the network
+SCHEME = b"gcs"
+MAP_PAGE_URL = "gcs://app/map.html"
+
+DEFAULT_TILES_FILE = os.path.join(os.path.expanduser("~"), ".teken4gcs", "tiles.mbtiles")
+DEFAULT_TILE_SOURCE = "https://tile.openstreetmap.org/{z}/{x}/{y}.png"
+# The OSM tile policy asks for an identifying User-Agent
+USER_AGENT = b"teken4gcs/1.0"
+
+MAX_ZOOM = 22
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_EXTENSIONS = (".html", ".js", ".css", ".png")
+
+_TILE_PATH = re.compile(r"^/(\d+)/(\d+)/(\d+)(?:\.\w+)?$")
+
+
+def register_map_scheme():
+    """Declares the gcs:// scheme to Qt WebEngine. Must run before the QApplication is created."""
+    if QWebEngineUrlScheme.schemeByName(SCHEME).name().isEmpty():
+        scheme = QWebEngineUrlScheme(SCHEME)
+        scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+        # Local so the page can still load qrc:// (drone icon, qwebchannel.js)
+        scheme.setFlags(QWebEngineUrlScheme.SecureScheme | QWebEngineUrlScheme.LocalScheme |
+                        QWebEngineUrlScheme.LocalAccessAllowed | QWebEngineUrlScheme.CorsEnabled)
+        QWebEngineUrlScheme.registerScheme(scheme)
+
+
+def install_map_scheme(tiles_file: str | None = DEFAULT_TILES_FILE, tile_source: str | None = DEFAULT_TILE_SOURCE,
+                       profile: 'QWebEngineProfile' = None,
+                       prefetch_source: str | None = None) -> 'MapSchemeHandler':
+    """
+    Serves gcs:// in ``profile`` (the default profile when None), once: later calls return the
+    handler already installed. ``tiles_file`` None keeps tiles in memory only, ``tile_source`` None
+    (or empty) never goes to the network. Route prefetching only downloads from ``prefetch_source``,
+    a tile server that allows bulk downloads, and is off without one.
+    """
+    profile = profile if profile is not None else QWebEngineProfile.defaultProfile()
+    handler = profile.urlSchemeHandler(SCHEME)
+    if handler is None:
+        store = MBTilesStore(tiles_file) if tiles_file else None
+        handler = MapSchemeHandler(store, tile_source or None, prefetch_source=prefetch_source or None,
+                                   parent=QCoreApplication.instance())
+        profile.installUrlSchemeHandler(SCHEME, handler)
+    return handler
+
+
+class MapSchemeHandler(QWebEngineUrlSchemeHandler):
+    """
+    Serves the map page offline.
+
+    Tiles come from an LRU memory layer in front of an MBTiles store. A tile missing from both is
+    fetched from ``tile_source`` (if any). It is only written to the store when that server allows
+    offline storage (the same ``bulk_download_allowed`` rule as prefetching), so an area viewed once
+    keeps working without connectivity; tiles from the others (OpenStreetMap) stay in memory, where
+    they age out instead of being served forever past their expiry. Runs on the Qt thread.
+    ``prefetch_source`` is where TilePrefetcher downloads routes from, kept apart from
+    ``tile_source`` because the servers fine for browsing forbid bulk downloads.
+    """
+
+    def __init__(self, store: 'MBTilesStore | None', tile_source: str | None = None,
+                 cache_bytes: int = TILE_MEMORY_BYTES, prefetch_source: str | None = None, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.tile_source = tile_source
+        self.prefetch_source = prefetch_source
+        self._store_fetched = store is not None and bulk_download_allowed(tile_source)
+        self.cache = TileCache(cache_bytes)
+        self._assets: dict[str, tuple[bytes, bytes]] = {}
+        self._network = QNetworkAccessManager(self) if tile_source else None
+        self._fetching: dict['QNetworkReply', tuple['QWebEngineUrlRequestJob', tuple[int, int, int]]] = {}
+
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.fetched = 0
+        self.missing = 0
+
+    def requestStarted(self, job: 'QWebEngineUrlRequestJob'):
+        url = job.requestUrl()
+        host = url.host()
+        if host == "tiles":
+            self._serve_tile(job, url.path())
+        elif host == "app":
+            self._serve_asset(job, url.path())
+        else:
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+
+    @staticmethod
+    def _reply(job: 'QWebEngineUrlRequestJob', mime: bytes, data: bytes):
+        # Owned by the job, freed with it
+        buffer = QBuffer(job)
+        buffer.setData(data)
+        buffer.open(QIODevice.ReadOnly)
+        job.reply(mime, buffer)
+
+    def _serve_asset(self, job: 'QWebEngineUrlRequestJob', path: str):
+        asset = self._assets.get(path)
+        if asset is None:
+            file = os.path.normpath(os.path.join(ASSET_DIR, path.lstrip("/")))
+            if not file.startswith(ASSET_DIR + os.sep) or not file.endswith(ASSET_EXTENSIONS) or not os.path.isfile(file):
+                job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+                return
+            with open(file, "rb") as f:
+                asset = self._assets[path] = ((mimetypes.guess_type(file)[0] or "text/plain").encode(), f.read())
+        self._reply(job, *asset)
+
+    def tile(self, z: int, x: int, y: int) -> bytes | None:
+        key = (z, x, y)
+        data = self.cache.get(key)
+        if data is not None:
+            self.memory_hits += 1
+            return data
+        data = self.store.get(z, x, y) if self.store is not None else None
+        if data is not None:
+            self.store_hits += 1
+            self.cache.put(key, data)
+        return data
+
+    def _serve_tile(self, job: 'QWebEngineUrlRequestJob', path: str):
+        match = _TILE_PATH.match(path)
+        if match is None:
+            job.fail(QWebEngineUrlRequestJob.UrlInvalid)
+            return
+        z, x, y = (int(value) for value in match.groups())
+        if z > MAX_ZOOM or x >= 1 << z or y >= 1 << z:
+            job.fail(QWebEngineUrlRequestJob.UrlInvalid)
+            return
+
+        data = self.tile(z, x, y)
+        if data is not None:
+            self._reply(job, tile_mime(data).encode(), data)
+        elif self._network is not None:
+            request = QNetworkRequest(QUrl(self.tile_source.format(z=z, x=x, y=y)))
+            request.setRawHeader(b"User-Agent", USER_AGENT)
+            reply = self._network.get(request)
+            self._fetching[reply] = (job, (z, x, y))
+            reply.finished.connect(lambda: self._on_tile_fetched(reply))
+        else:
+            self.missing += 1
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+
+    def _on_tile_fetched(self, reply: 'QNetworkReply'):
+        job, key = self._fetching.pop(reply)
+        reply.deleteLater()
+        data = bytes(reply.readAll()) if reply.error() == QNetworkReply.NoError else b""
+        if data:
+            self.fetched += 1
+            self.cache.put(key, data)
+            if self._store_fetched:
+                self.store.put(*key, data)
+        else:
+            self.missing += 1
+
+        try:
+            if data:
+                self._reply(job, tile_mime(data).encode(), data)
+            else:
+                job.fail(QWebEngineUrlRequestJob.RequestFailed)
+        except RuntimeError:
+            # The page dropped the request (panned away) while it was being fetched
+            pass
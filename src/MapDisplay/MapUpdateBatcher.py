@@ -0,0 +1,125 @@
+import math
+
+from FlightTrack import FlightTrack, TrackSimplifier
+from MissionStore import MissionSnapshot
+from VehicleStatus import Position
+from MapDisplay.TilePrefetcher import EARTH_CIRCUMFERENCE
+
+# Zoom of the page until it reports one (setView in map.js)
+DEFAULT_ZOOM = 16
+# Largest gap between the flown path and its simplified line on screen
+TRACK_TOLERANCE_PX = 1.0
+TILE_SIZE_PX = 256
+
+
+def pixel_size_m(zoom: int, latitude: float) -> float:
+    """Ground size of one screen pixel of the Web Mercator map at ``zoom``."""
+    return EARTH_CIRCUMFERENCE * math.cos(math.radians(latitude)) / (TILE_SIZE_PX << zoom)
+
+
+class MapUpdateBatcher:
+    """
+    Remembers what the map page already shows and turns the latest state into one delta message.
+
+    The setters only store the latest value, so any number of updates between two frames cost one
+    message. ``take()`` compares against what was last sent: an unchanged mission is a version
+    comparison, and a changed one is sent as the waypoint ids that were removed and added (plus the
+    full id order only when surviving waypoints changed places). The per-frame cost therefore does
+    not grow with the mission. The flown track is sent the same way, as the vertices its simplified
+    line gained, and is only sent whole again when the zoom level changes the tolerance.
+    ``MapBridge.publish()`` turns a message into web channel signals, so rows are lists rather than
+    tuples.
+    """
+
+    def __init__(self):
+        self._drone: tuple[float, float] | None = None
+        self._mission: MissionSnapshot | None = None
+        self._selected: int | None = None
+        self._fleet: list[list[float]] | None = None
+        self._track: FlightTrack | None = None
+        self._zoom = DEFAULT_ZOOM
+        self._track_simplifier = TrackSimplifier(pixel_size_m(DEFAULT_ZOOM, 0.0) * TRACK_TOLERANCE_PX)
+        self.reset()
+
+    def reset(self):
+        # The page is empty (reloaded, or switched to another vehicle): resend everything
+        self._sent_drone = None
+        self._sent_version = None
+        self._sent_ids: list[int] = []
+        self._sent_selected = None
+        self._sent_fleet = None
+        self._track_simplifier.invalidate()
+        self._reset = True
+
+    def set_drone(self, position: 'Position'):
+        self._drone = (position.latitude, position.longitude)
+
+    def set_waypoints(self, waypoints: 'MissionSnapshot'):
+        self._mission = waypoints
+
+    def set_selected(self, waypoint_id: int | None):
+        self._selected = waypoint_id
+
+    def set_track(self, track: 'FlightTrack'):
+        self._track = track
+
+    def set_zoom(self, zoom: int):
+        self._zoom = zoom
+
+    def set_fleet(self, positions: list['Position']):
+        self._fleet = [[position.latitude, position.longitude] for position in positions]
+
+    def take(self) -> dict | None:
+        update = {}
+        if self._reset:
+            update["reset"] = True
+            self._reset = False
+
+        if self._drone is not None and self._drone != self._sent_drone:
+            update["drone"] = self._drone
+            self._sent_drone = self._drone
+
+        mission = self._mission
+        if mission is not None and mission.version != self._sent_version:
+            self._diff_waypoints(mission, update)
+            self._sent_version = mission.version
+
+        if self._selected != self._sent_selected:
+            update["selected"] = self._selected
+            self._sent_selected = self._selected
+
+        track = self._track
+        if track is not None and track.plane is not None:
+            self._track_simplifier.set_tolerance(
+                pixel_size_m(self._zoom, track.plane.origin_latitude) * TRACK_TOLERANCE_PX)
+            rebuilt, vertices = self._track_simplifier.update(track)
+            if rebuilt or vertices:
+                update["track"] = {"reset": rebuilt, "add": vertices}
+
+        if self._fleet is not None and self._fleet != self._sent_fleet:
+            update["fleet"] = self._fleet
+            self._sent_fleet = self._fleet
+
+        return update or None
+
+    def _diff_waypoints(self, mission: 'MissionSnapshot', update: dict):
+        ids = mission.ids.tolist()
+        sent = self._sent_ids
+        current = set(ids)
+        previous = set(sent)
+
+        removed = [waypoint_id for waypoint_id in sent if waypoint_id not in current]
+        added = [[waypoint_id, latitude, longitude]
+                 for waypoint_id, (latitude, longitude, _) in zip(ids, mission.coords.tolist())
+                 if waypoint_id not in previous]
+        if removed:
+            update["removed"] = removed
+        if added:
+            update["added"] = added
+
+        # The page appends added waypoints after the surviving ones, which covers advancing, removing
+        # and appending. Anything else (a reorder) needs the whole order.
+        if [waypoint_id for waypoint_id in sent if waypoint_id in current] + [a[0] for a in added] != ids:
+            update["order"] = ids
+
+        self._sent_ids = ids
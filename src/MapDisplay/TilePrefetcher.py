@@ -0,0 +1,190 @@
+import concurrent.futures
+import threading
+import time
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass
+
+import numpy as np
+
+from MapDisplay.TileStore import MBTilesStore
+
+EARTH_CIRCUMFERENCE = 40075016.686
+# Web Mercator stops here
+MAX_LATITUDE = 85.0511287798
+
+DEFAULT_MIN_ZOOM = 10
+DEFAULT_MAX_ZOOM = 18
+DEFAULT_BUFFER_M = 250.0
+DEFAULT_WORKERS = 2
+# Tile servers whose usage policy forbids bulk downloads, prefetching from them is refused
+# (https://operations.osmfoundation.org/policies/tiles/)
+NO_BULK_DOWNLOAD_HOSTS = ("tile.openstreetmap.org",)
+REQUEST_TIMEOUT_S = 10.0
+USER_AGENT = "teken4gcs/1.0"
+
+# Tiles written to the store per transaction, and the minimum time between progress reports
+WRITE_BATCH = 64
+PROGRESS_INTERVAL_S = 0.1
+
+
+def corridor_tiles(coords: np.ndarray, zooms, buffer_m: float = DEFAULT_BUFFER_M) -> dict[int, np.ndarray]:
+    """
+    Tiles (x, y rows per zoom) covering every point within ``buffer_m`` of the route through the
+    (latitude, longitude) rows of ``coords``.
+
+    Each leg is sampled in tile space at most ``step`` tiles apart, and each sample claims the tiles
+    under a square of half-width buffer + step / 2. Every point of the leg is within step / 2 of a
+    sample, so nothing along the corridor is missed, at the price of a thin extra margin.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    if len(coords) == 0:
+        return {z: np.zeros((0, 2), dtype=np.int64) for z in zooms}
+
+    latitude = np.clip(coords[:, 0], -MAX_LATITUDE, MAX_LATITUDE)
+    world_x = (coords[:, 1] + 180.0) / 360.0
+    world_y = (1.0 - np.arcsinh(np.tan(np.radians(latitude))) / np.pi) / 2.0
+    # Mercator stretches by 1 / cos(latitude)
+    world_buffer = buffer_m / (EARTH_CIRCUMFERENCE * np.cos(np.radians(latitude)))
+
+    tiles = {}
+    for z in zooms:
+        n = 1 << z
+        x, y, buffer = world_x * n, world_y * n, world_buffer * n
+        # Finer sampling only trims the margin, a floor keeps tiny buffers from exploding the sample count
+        step = float(np.clip(buffer.min(), 0.125, 0.5))
+
+        if len(x) > 1:
+            dx, dy, db = np.diff(x), np.diff(y), np.diff(buffer)
+            counts = np.maximum(np.ceil(np.hypot(dx, dy) / step).astype(np.int64), 1)
+            leg = np.repeat(np.arange(len(counts)), counts)
+            t = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)) / counts[leg]
+            sample_x = np.append(x[leg] + dx[leg] * t, x[-1])
+            sample_y = np.append(y[leg] + dy[leg] * t, y[-1])
+            sample_buffer = np.append(buffer[leg] + db[leg] * t, buffer[-1]) + step / 2
+        else:
+            sample_x, sample_y, sample_buffer = x, y, buffer + step / 2
+
+        x0 = np.clip(np.floor(sample_x - sample_buffer), 0, n - 1).astype(np.int64)
+        x1 = np.clip(np.floor(sample_x + sample_buffer), 0, n - 1).astype(np.int64)
+        y0 = np.clip(np.floor(sample_y - sample_buffer), 0, n - 1).astype(np.int64)
+        y1 = np.clip(np.floor(sample_y + sample_buffer), 0, n - 1).astype(np.int64)
+
+        offset_x, offset_y = np.meshgrid(np.arange((x1 - x0).max() + 1), np.arange((y1 - y0).max() + 1))
+        tile_x = x0[:, None] + offset_x.ravel()[None, :]
+        tile_y = y0[:, None] + offset_y.ravel()[None, :]
+        inside = (tile_x <= x1[:, None]) & (tile_y <= y1[:, None])
+
+        keys = np.unique(tile_x[inside] * n + tile_y[inside])
+        tiles[z] = np.column_stack((keys // n, keys % n))
+    return tiles
+
+
+def bulk_download_allowed(source: str | None) -> bool:
+    """Whether ``source`` (an ``{z}/{x}/{y}`` URL template) may be used to prefetch tiles."""
+    if not source:
+        return False
+    host = (urllib.parse.urlsplit(source).hostname or "").lower()
+    return not any(host == forbidden or host.endswith("." + forbidden) for forbidden in NO_BULK_DOWNLOAD_HOSTS)
+
+
+@dataclass
+class PrefetchProgress:
+    total: int = 0            # tiles in the corridor
+    skipped: int = 0          # already in the store
+    downloaded: int = 0
+    failed: int = 0
+    bytes_downloaded: int = 0
+    store_bytes: int = 0      # size of the MBTiles file on disk
+    seconds: float = 0.0
+    finished: bool = False
+    cancelled: bool = False
+
+    @property
+    def done(self) -> int:
+        return self.skipped + self.downloaded + self.failed
+
+
+class TilePrefetcher:
+    """
+    Downloads the tiles of a route corridor into an MBTilesStore ahead of the flight.
+
+    Tiles already in the store are skipped. The rest are fetched by a bounded thread pool from
+    ``source`` (an ``{z}/{x}/{y}`` URL template) and written in batches from the calling thread.
+    ``prefetch()`` blocks, run it on a worker thread and watch ``on_progress``. Sources that do not
+    allow bulk downloads (the OpenStreetMap tile servers) are refused with a ValueError.
+    """
+
+    def __init__(self, store: 'MBTilesStore', source: str, workers: int = DEFAULT_WORKERS,
+                 timeout: float = REQUEST_TIMEOUT_S):
+        if not bulk_download_allowed(source):
+            raise ValueError(f"the usage policy of {source} does not allow bulk downloads")
+        self.store = store
+        self.source = source
+        self.workers = workers
+        self.timeout = timeout
+
+    def _download(self, z: int, x: int, y: int) -> bytes:
+        request = urllib.request.Request(self.source.format(z=z, x=x, y=y), headers={"User-Agent": USER_AGENT})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.read()
+
+    def missing_tiles(self, tiles: dict[int, np.ndarray]) -> list[tuple[int, int, int]]:
+        missing = []
+        for z, xy in tiles.items():
+            if len(xy) == 0:
+                continue
+            stored = self.store.existing(z, xy[:, 0], xy[:, 1])
+            missing.extend((z, x, y) for x, y in xy.tolist() if (x, y) not in stored)
+        return missing
+
+    def prefetch(self, coords: np.ndarray, zooms=range(DEFAULT_MIN_ZOOM, DEFAULT_MAX_ZOOM + 1),
+                 buffer_m: float = DEFAULT_BUFFER_M, on_progress=None,
+                 cancel: 'threading.Event' = None) -> 'PrefetchProgress':
+        start = time.perf_counter()
+        tiles = corridor_tiles(coords, zooms, buffer_m)
+        missing = self.missing_tiles(tiles)
+
+        progress = PrefetchProgress(total=sum(len(xy) for xy in tiles.values()))
+        progress.skipped = progress.total - len(missing)
+        last_report = 0.0
+
+        def report(final: bool = False):
+            nonlocal last_report
+            now = time.perf_counter()
+            if on_progress is not None and (final or now - last_report >= PROGRESS_INTERVAL_S):
+                last_report = now
+                progress.seconds = now - start
+                progress.store_bytes = self.store.size_bytes()
+                on_progress(PrefetchProgress(**progress.__dict__))
+
+        report()
+        batch = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._download, *key): key for key in missing}
+            for future in concurrent.futures.as_completed(futures):
+                if cancel is not None and cancel.is_set():
+                    progress.cancelled = True
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    break
+                try:
+                    data = future.result()
+                except Exception:
+                    # HTTP error, timeout or no connectivity: the tile stays missing
+                    progress.failed += 1
+                else:
+                    batch.append((*futures[future], data))
+                    progress.downloaded += 1
+                    progress.bytes_downloaded += len(data)
+                    if len(batch) >= WRITE_BATCH:
+                        self.store.put_many(batch)
+                        batch.clear()
+                report()
+
+        if batch:
+            self.store.put_many(batch)
+        progress.finished = True
+        report(final=True)
+        progress.seconds = time.perf_counter() - start
+        progress.store_bytes = self.store.size_bytes()
+        return progress
@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# MBTiles 1.3: https://github.com/mapbox/mbtiles-spec. Rows are TMS, counted from the south edge.
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS metadata (name TEXT, value TEXT)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS metadata_index ON metadata (name)",
+    "CREATE TABLE IF NOT EXISTS tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS tile_index ON tiles (zoom_level, tile_column, tile_row)",
+)
+
+TILE_MEMORY_BYTES = 32 * 1024 * 1024
+
+_MAGIC_MIME = ((b"\x89PNG", "image/png"), (b"\xff\xd8", "image/jpeg"), (b"RIFF", "image/webp"))
+
+
+def tile_mime(data: bytes) -> str:
+    for magic, mime in _MAGIC_MIME:
+        if data.startswith(magic):
+            return mime
+    return "application/octet-stream"
+
+
+class MBTilesStore:
+    """
+    Raster tiles in an MBTiles (SQLite) file, addressed with XYZ (slippy map) coordinates.
+
+    One connection shared behind a lock, so the map (Qt thread) and the prefetcher (worker threads)
+    can use the same store. Created with the MBTiles schema if the file does not exist yet.
+    """
+
+    def __init__(self, path: str, name: str = "teken4gcs tile cache"):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            # WAL lets other processes read the file while tiles are being added
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                self._connection.execute(statement)
+            self._connection.execute("INSERT OR IGNORE INTO metadata (name, value) VALUES ('name', ?)", (name,))
+            self._connection.execute("INSERT OR IGNORE INTO metadata (name, value) VALUES ('format', 'png')")
+
+    def get(self, z: int, x: int, y: int) -> bytes | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (z, x, (1 << z) - 1 - y)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def put(self, z: int, x: int, y: int, data: bytes):
+        self.put_many(((z, x, y, data),))
+
+    def put_many(self, tiles):
+        # (z, x, y, data) tuples, one transaction
+        rows = [(z, x, (1 << z) - 1 - y, sqlite3.Binary(data)) for z, x, y, data in tiles]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?)", rows)
+
+    def existing(self, z: int, xs, ys) -> set[tuple[int, int]]:
+        """The (x, y) pairs of zoom ``z`` within the given column and row ranges that are stored."""
+        limit = (1 << z) - 1
+        x_min, x_max, y_min, y_max = int(min(xs)), int(max(xs)), int(min(ys)), int(max(ys))
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT tile_column, tile_row FROM tiles WHERE zoom_level = ? AND tile_column BETWEEN ? AND ? "
+                "AND tile_row BETWEEN ? AND ?",
+                (z, x_min, x_max, limit - y_max, limit - y_min)).fetchall()
+        return {(x, limit - row) for x, row in rows}
+
+    def metadata(self) -> dict[str, str]:
+        with self._lock:
+            return dict(self._connection.execute("SELECT name, value FROM metadata").fetchall())
+
+    def set_metadata(self, **values):
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO metadata (name, value) VALUES (?, ?)",
+                                         [(name, str(value)) for name, value in values.items()])
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+
+    def size_bytes(self) -> int:
+        # Database plus write-ahead log on disk
+        return sum(os.path.getsize(p) for p in (self.path, self.path + "-wal") if os.path.exists(p))
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class TileCache:
+    """Least-recently-used tiles in memory, bounded by their total size in bytes."""
+
+    def __init__(self, max_bytes: int = TILE_MEMORY_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._tiles: OrderedDict[tuple[int, int, int], bytes] = OrderedDict()
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def get(self, key: tuple[int, int, int]) -> bytes | None:
+        data = self._tiles.get(key)
+        if data is not None:
+            self._tiles.move_to_end(key)
+        return data
+
+    def put(self, key: tuple[int, int, int], data: bytes):
+        previous = self._tiles.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        if len(data) > self.max_bytes:
+            return
+        self._tiles[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self._tiles.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self):
+        self._tiles.clear()
+        self.size = 0
@@ -0,0 +1,164 @@
+import numpy as np
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QEvent, QVariant, pyqtSignal
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyleOptionButton, QStyle, QApplication
+
+from MissionStore import MissionSnapshot
+
+COLUMN_NUMBER, COLUMN_LATITUDE, COLUMN_LONGITUDE, COLUMN_ALTITUDE, COLUMN_DELETE = range(5)
+HEADERS = ['No.', 'lat', 'lng', 'alt', '']
+
+WAYPOINT_ID_ROLE = Qt.UserRole
+
+# Past this many separate removed blocks a reset is cheaper than one signal pair per block
+MAX_REMOVED_RUNS = 16
+
+_EMPTY = MissionSnapshot(-1, np.zeros(0, dtype=np.int64), np.zeros((0, 3), dtype=np.float64))
+
+
+class WaypointTableModel(QAbstractTableModel):
+    """
+    Remaining waypoints of a mission for a view, straight from a MissionSnapshot.
+
+    Nothing is created per row: ``data()`` formats the visible cells on demand. ``set_waypoints()``
+    diffs the new snapshot against the shown one by waypoint id and reports the change as row
+    removals and an insert at the end, which covers reaching, deleting and adding waypoints. Only a
+    reorder falls back to a model reset.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._waypoints = _EMPTY
+        self._ids = _EMPTY.ids
+        self._coords = _EMPTY.coords
+
+    def waypoints(self) -> 'MissionSnapshot':
+        return self._waypoints
+
+    def waypoint_id(self, row: int) -> int | None:
+        return int(self._ids[row]) if 0 <= row < len(self._ids) else None
+
+    def set_waypoints(self, waypoints: 'MissionSnapshot', reset: bool = False):
+        if not reset and waypoints.version == self._waypoints.version:
+            return
+
+        old = self._ids
+        new = waypoints.ids
+        head = self._dropped_head(old, new)
+        if head is not None:
+            # Reached waypoints and/or appended ones, no set operations needed
+            survivors = old[head:]
+            runs = [np.arange(head)] if head else []
+        else:
+            keep = np.isin(old, new)
+            survivors = old[keep]
+            removed_rows = np.flatnonzero(~keep)
+            runs = np.split(removed_rows, np.flatnonzero(np.diff(removed_rows) != 1) + 1) if len(removed_rows) else []
+
+        if reset or len(runs) > MAX_REMOVED_RUNS or not np.array_equal(survivors, new[:len(survivors)]):
+            self.beginResetModel()
+            self._set(waypoints.ids, waypoints.coords)
+            self._waypoints = waypoints
+            self.endResetModel()
+            return
+
+        # Last block first, so the rows of the earlier blocks do not move
+        for run in reversed(runs):
+            first, last = int(run[0]), int(run[-1])
+            self.beginRemoveRows(QModelIndex(), first, last)
+            self._set(np.delete(self._ids, np.s_[first:last + 1]), np.delete(self._coords, np.s_[first:last + 1], 0))
+            self.endRemoveRows()
+
+        if len(new) > len(survivors):
+            self.beginInsertRows(QModelIndex(), len(survivors), len(new) - 1)
+            self._set(waypoints.ids, waypoints.coords)
+            self.endInsertRows()
+        else:
+            self._set(waypoints.ids, waypoints.coords)
+
+        self._waypoints = waypoints
+
+    @staticmethod
+    def _dropped_head(old: np.ndarray, new: np.ndarray) -> int | None:
+        # Rows dropped from the front if new is old[head:] followed by appended ids, else None
+        if len(new) == 0:
+            return len(old)
+        found = np.flatnonzero(old == new[0])
+        head = int(found[0]) if len(found) else len(old)
+        overlap = len(old) - head
+        if overlap > len(new) or not np.array_equal(old[head:], new[:overlap]):
+            return None
+        # MissionStore ids only grow, so appended ids are newer than every shown one (not a reorder)
+        if overlap < len(new) and len(old) and new[overlap] <= old.max():
+            return None
+        return head
+
+    def _set(self, ids: np.ndarray, coords: np.ndarray):
+        self._ids = ids
+        self._coords = coords
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._ids)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section: int, orientation, role: int = Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HEADERS[section]
+        return QVariant()
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        row, column = index.row(), index.column()
+
+        if role == Qt.DisplayRole:
+            if column == COLUMN_NUMBER:
+                # Position in the mission, the stable waypoint id is under WAYPOINT_ID_ROLE
+                return f"{row + 1}"
+            if column == COLUMN_LATITUDE:
+                return f"{self._coords[row, 0]:.6f}°"
+            if column == COLUMN_LONGITUDE:
+                return f"{self._coords[row, 1]:.6f}°"
+            if column == COLUMN_ALTITUDE:
+                return f"{self._coords[row, 2]:.2f}m"
+        elif role == WAYPOINT_ID_ROLE:
+            return int(self._ids[row])
+        return QVariant()
+
+    def flags(self, index: QModelIndex):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+
+class DeleteButtonDelegate(QStyledItemDelegate):
+    """Paints an "X" push button in its column and emits ``delete_clicked(row)``, no widget per row."""
+
+    delete_clicked = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pressed_row = -1
+
+    def paint(self, painter, option, index: QModelIndex):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(1, 1, -1, -1)
+        button.text = "X"
+        button.state = QStyle.State_Enabled | (
+            QStyle.State_Sunken if index.row() == self._pressed_row else QStyle.State_Raised)
+        style = option.widget.style() if option.widget is not None else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index: QModelIndex) -> bool:
+        if event.type() == QEvent.MouseButtonPress and option.rect.contains(event.pos()):
+            self._pressed_row = index.row()
+            return True
+
+        if event.type() == QEvent.MouseButtonRelease:
+            pressed_row, self._pressed_row = self._pressed_row, -1
+            if pressed_row == index.row() and option.rect.contains(event.pos()):
+                self.delete_clicked.emit(index.row())
+            return True
+
+        return False
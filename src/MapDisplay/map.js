@@ -1,31 +1,50 @@
 var map = L.map('map').setView([47.399, 8.546], 16)
 
-L.tileLayer('https://tile.openstreetmap.org/{z}/{x}/{y}.png', {
+// Served from the local MBTiles cache by MapSchemeHandler, which fetches (and keeps) missing tiles when online
+L.tileLayer('gcs://tiles/{z}/{x}/{y}', {
     maxZoom: 20, attribution: '&copy; <a href="http://www.openstreetmap.org/copyright">OpenStreetMap</a>'
 }).addTo(map);
 
 
-var mouse_position = new L.Control.MousePosition({
-    "position": "topright",
-    "separator": " | ",
-    "emptyString": "",
-    "lngFirst": false,
-    "numDigits": 20,
-    "prefix": "Coordinates:",
-});
-mouse_position.options["latFormatter"] =
+const MousePosition = L.Control.extend({
+    options: {position: "topright"},
 
-    (num) => {
-        return L.Util.formatNum(num, 3) + ' &deg; ';
-    };
+    onAdd: function (map) {
+        const container = L.DomUtil.create("div", "leaflet-control-mouseposition");
+        map.on("mousemove", e => {
+            container.innerHTML = "Coordinates:" + formatCoordinate(e.latlng.lat) + " | " + formatCoordinate(e.latlng.lng);
+        });
+        return container;
+    }
+});
 
-mouse_position.options["lngFormatter"] =
+function formatCoordinate(num) {
+    return L.Util.formatNum(num, 3) + ' &deg; ';
+}
 
-    (num) => {
-        return L.Util.formatNum(num, 3) + ' &deg; ';
-    };
+map.addControl(new MousePosition());
 
-map.addControl(mouse_position);
+// Dashes marching along a line: a faint base line with an animated dashed line on top (see map.css)
+const AntPath = L.LayerGroup.extend({
+    initialize: function (latlngs, options) {
+        L.LayerGroup.prototype.initialize.call(this);
+        this._base = L.polyline(latlngs, {
+            color: options.color, weight: options.weight, opacity: 0.5, interactive: false
+        });
+        this._pulse = L.polyline(latlngs, {
+            color: options.pulseColor, weight: options.weight, dashArray: options.dashArray,
+            className: "ant-path-pulse", interactive: false
+        });
+        this.addLayer(this._base);
+        this.addLayer(this._pulse);
+    },
+
+    setLatLngs: function (latlngs) {
+        this._base.setLatLngs(latlngs);
+        this._pulse.setLatLngs(latlngs);
+        return this;
+    }
+});
 
 let droneIcon = L.icon({
     iconUrl: "qrc:///drone-icon.png",
@@ -94,56 +113,141 @@ function map_on_add_waypoint_button_clicked(checked) {
 let markersGroup = L.layerGroup();
 map.addLayer(markersGroup);
 
-let droneMarker = null;
-let waypointMarkers = [];
-let currentHighlightedMarker = -1;
+const pathOptions = {
+    "dashArray": "10, 20",
+    "weight": 5,
+    "color": "#0000FF",
+    "pulseColor": "#FFFFFF"
+};
 
-function renderMarkers(dronePosition, positions, highlightedMarker) {
-    if (highlightedMarker >= 0) {
-        currentHighlightedMarker = highlightedMarker;
-    }
+let droneMarker = null;
+let dronePosition = null;
+// Waypoint id -> marker, and the ids in flying order
+let waypointMarkers = new Map();
+let waypointOrder = [];
+let selectedWaypoint = null;
+
+// The leg from the drone to the current waypoint moves every frame, the rest of the route only when
+// the mission changes
+let legPath = new AntPath([], pathOptions);
+let routePath = new AntPath([], pathOptions);
+map.addLayer(legPath);
+map.addLayer(routePath);
+
+// Flown path: vertices simplified in Python (TrackSimplifier) and appended as they come, on canvas
+// so a long flight stays one cheap path. A two-point line joins the last vertex to the drone.
+const trackOptions = {
+    "color": "#e67e22", "weight": 3, "opacity": 0.8, "interactive": false, "renderer": L.canvas()
+};
+let trackLine = L.polyline([], trackOptions).addTo(map);
+let trackTail = L.polyline([], trackOptions).addTo(map);
+
+let fleetMarkers = [];
+
+// Handlers of the MapBridge signals, each frame of MapUpdateBatcher.take() calls the ones it needs
+
+function resetMap() {
+    markersGroup.clearLayers();
+    waypointMarkers.clear();
+    waypointOrder = [];
+    selectedWaypoint = null;
+    trackLine.setLatLngs([]);
+    updateRoute();
+}
 
+function moveDrone(lat, lng) {
+    dronePosition = [lat, lng];
     if (!droneMarker) {
         droneMarker = L.marker(dronePosition, {icon: droneIcon}).addTo(map);
     } else {
-        droneMarker.setLatLng(dronePosition)
+        droneMarker.setLatLng(dronePosition);
     }
+    updateLeg();
+    updateTrackTail();
+}
 
-    if (!waypointMarkers || waypointMarkers.length !== positions.length) {
-        markersGroup.clearLayers();
-        for (let i = 0; i < positions.length; i++) {
-            let mark = L.marker(positions[i]).addTo(markersGroup);
-            mark.setIcon(i === currentHighlightedMarker ? redIcon : grayIcon)
-            waypointMarkers.push(mark)
-        }
-    } else {
-        for (let i = 0; i < waypointMarkers.length; i++) {
-            waypointMarkers[i].setLatLng(positions[i])
-            waypointMarkers[i].setIcon(i === currentHighlightedMarker ? redIcon : grayIcon)
+function changeMission(removed, added, order) {
+    if (removed.length) {
+        const removedIds = new Set(removed);
+        for (const id of removed) {
+            markersGroup.removeLayer(waypointMarkers.get(id));
+            waypointMarkers.delete(id);
         }
+        waypointOrder = waypointOrder.filter(id => !removedIds.has(id));
+    }
+
+    for (const [id, lat, lng] of added) {
+        const icon = id === selectedWaypoint ? redIcon : grayIcon;
+        waypointMarkers.set(id, L.marker([lat, lng], {icon: icon}).addTo(markersGroup));
+        waypointOrder.push(id);
+    }
+
+    if (order.length) {
+        waypointOrder = order;
     }
+    updateRoute();
+}
+
+function updateRoute() {
+    routePath.setLatLngs(waypointOrder.map(id => waypointMarkers.get(id).getLatLng()));
+    updateLeg();
+}
 
+function updateLeg() {
+    if (!dronePosition) {
+        return;
+    }
+    const leg = [dronePosition];
+    if (waypointOrder.length > 0) {
+        leg.push(waypointMarkers.get(waypointOrder[0]).getLatLng());
+    }
+    legPath.setLatLngs(leg);
 }
 
-let path;
+function changeTrack(reset, vertices) {
+    if (reset) {
+        trackLine.setLatLngs(vertices);
+    } else if (vertices.length === 1) {
+        trackLine.addLatLng(vertices[0]);
+    } else if (vertices.length > 1) {
+        trackLine.setLatLngs(trackLine.getLatLngs().concat(vertices.map(vertex => L.latLng(vertex))));
+    }
+    updateTrackTail();
+}
 
-function renderPolyLine(dronePosition, positions) {
-    const newPath = [dronePosition].concat(positions);
+function updateTrackTail() {
+    const vertices = trackLine.getLatLngs();
+    trackTail.setLatLngs(vertices.length && dronePosition ? [vertices[vertices.length - 1], dronePosition] : []);
+}
 
-    if (path) {
-        path.setLatLngs(newPath);
-    } else {
-        path = L.polyline.antPath([dronePosition].concat(positions), {
-            "delay": 1000,
-            "dashArray": [10, 20],
-            "weight": 5,
-            "color": "#0000FF",
-            "pulseColor": "#FFFFFF",
-            "paused": false,
-            "reverse": false,
-            "hardwareAccelerated": true
-        });
-        map.addLayer(path);
+function selectWaypoint(id) {
+    // Only the two markers whose state changes get a new icon
+    const previous = waypointMarkers.get(selectedWaypoint);
+    if (previous) {
+        previous.setIcon(grayIcon);
+    }
+    selectedWaypoint = id;
+    const next = waypointMarkers.get(id);
+    if (next) {
+        next.setIcon(redIcon);
+    }
+}
+
+function renderFleet(positions) {
+    while (fleetMarkers.length > positions.length) {
+        map.removeLayer(fleetMarkers.pop());
+    }
+
+    for (let i = 0; i < positions.length; i++) {
+        if (i < fleetMarkers.length) {
+            fleetMarkers[i].setLatLng(positions[i]);
+        } else {
+            fleetMarkers.push(L.circleMarker(positions[i], {
+                "radius": 8,
+                "color": grayColor,
+                "fillOpacity": 0.8
+            }).addTo(map));
+        }
     }
 }
 
@@ -151,11 +255,25 @@ function renderPolyLine(dronePosition, positions) {
 new QWebChannel(qt.webChannelTransport, channel => {
     window.handler = channel.objects.handler;
 
+    const bridge = channel.objects.bridge;
+    bridge.reset.connect(resetMap);
+    bridge.drone_moved.connect(moveDrone);
+    bridge.mission_changed.connect(changeMission);
+    bridge.waypoint_selected.connect(selectWaypoint);
+    bridge.track_changed.connect(changeTrack);
+    bridge.fleet_moved.connect(renderFleet);
+
     map.on('click', e => {
         console.log(e.latlng)
         window.handler.send_click_coordinates(e.latlng)
     })
 
+    map.on('zoomend', () => window.handler.send_zoom(map.getZoom()))
+    window.handler.send_zoom(map.getZoom())
+
+    // After the connects above, so the first frame (the full state) is not lost
+    window.handler.map_ready()
+
 
 })
 
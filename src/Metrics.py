@@ -0,0 +1,181 @@
+import asyncio
+import bisect
+import math
+import threading
+import time
+
+# Histogram bucket upper bounds, 1 us .. ~16 s in powers of two
+HISTOGRAM_BOUNDS = tuple(1e-6 * 2 ** k for k in range(25))
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n: int = 1):
+        self.value += n
+
+    def reset(self):
+        self.value = 0
+
+
+class Gauge:
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def reset(self):
+        self.value = 0.0
+
+
+class Histogram:
+    """Fixed log2 buckets, cheap enough to observe on every telemetry message."""
+
+    def __init__(self, bounds: tuple = HISTOGRAM_BOUNDS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def reset(self):
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        # Upper bound of the bucket holding the q-th percentile, never above the largest value seen
+        buckets = list(self.buckets)
+        count = sum(buckets)
+        if count == 0:
+            return 0.0
+
+        rank = math.ceil(q / 100 * count)
+        seen = 0
+        for i, n in enumerate(buckets):
+            seen += n
+            if seen >= rank:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+
+class MetricsRegistry:
+    """Named counters, gauges and histograms. Names are dotted, e.g. ``stream.position.messages``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: dict[str, Counter] = {}
+        self.gauges: dict[str, Gauge] = {}
+        self.histograms: dict[str, Histogram] = {}
+
+    def _get(self, table: dict, name: str, factory):
+        metric = table.get(name)
+        if metric is None:
+            with self._lock:
+                metric = table.setdefault(name, factory())
+        return metric
+
+    def counter(self, name: str) -> Counter:
+        return self._get(self.counters, name, Counter)
+
+    def gauge(self, name: str) -> Gauge:
+        return self._get(self.gauges, name, Gauge)
+
+    def histogram(self, name: str) -> Histogram:
+        return self._get(self.histograms, name, Histogram)
+
+    def reset(self):
+        # Zeroed in place, InstrumentedLock and monitor_loop_lag keep the objects they were given
+        with self._lock:
+            metrics = list(self.counters.values()) + list(self.gauges.values()) + list(self.histograms.values())
+        for metric in metrics:
+            metric.reset()
+
+    def snapshot_text(self) -> str:
+        with self._lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted(self.histograms.items())
+
+        width = max((len(name) for name, _ in counters + gauges + histograms), default=10) + 2
+        lines = ["# counters"]
+        lines += [f"{name:<{width}}{c.value}" for name, c in counters]
+
+        lines += ["", "# gauges"]
+        lines += [f"{name:<{width}}{g.value:.6g}" for name, g in gauges]
+
+        lines += ["", "# histograms (ms)",
+                  f"{'':<{width}}{'count':>9}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}"]
+        for name, h in histograms:
+            lines.append(f"{name:<{width}}{h.count:>9}{h.mean * 1000:>10.3f}{h.percentile(50) * 1000:>10.3f}"
+                         f"{h.percentile(95) * 1000:>10.3f}{h.percentile(99) * 1000:>10.3f}{h.max * 1000:>10.3f}")
+
+        return "\n".join(lines)
+
+
+class InstrumentedLock:
+    """threading.Lock that records wait and hold time in ``lock.<name>.*`` metrics."""
+
+    def __init__(self, registry: 'MetricsRegistry', name: str):
+        self._lock = threading.Lock()
+        self._wait = registry.histogram(f"lock.{name}.wait_s")
+        self._hold = registry.histogram(f"lock.{name}.hold_s")
+        self._contended = registry.counter(f"lock.{name}.contended")
+        self._acquired_at = 0.0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if self._lock.acquire(False):
+            self._wait.observe(0.0)
+        else:
+            if not blocking:
+                return False
+            self._contended.inc()
+            start = time.perf_counter()
+            if not self._lock.acquire(True, timeout):
+                return False
+            self._wait.observe(time.perf_counter() - start)
+
+        self._acquired_at = time.perf_counter()
+        return True
+
+    def release(self):
+        self._hold.observe(time.perf_counter() - self._acquired_at)
+        self._lock.release()
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *_):
+        self.release()
+
+
+async def monitor_loop_lag(registry: 'MetricsRegistry', interval: float = 0.1, name: str = "loop"):
+    """Measures how late the event loop wakes up from a sleep, i.e. how long callbacks block it."""
+    histogram = registry.histogram(f"{name}.lag_s")
+    gauge = registry.gauge(f"{name}.lag_s")
+    loop = asyncio.get_running_loop()
+
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        histogram.observe(lag)
+        gauge.set(lag)
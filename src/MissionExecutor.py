@@ -0,0 +1,97 @@
+import asyncio
+import threading
+from enum import Enum
+
+# Backoff between attempts when the vehicle rejects a goto (e.g. waypoints added before takeoff)
+RETRY_DELAY_S = 1.0
+MAX_RETRY_DELAY_S = 5.0
+
+
+class MissionState(Enum):
+    IDLE = 0        # no waypoints left
+    SENDING = 1     # goto for the current leg in flight
+    EN_ROUTE = 2    # goto accepted, waiting for the arrival event
+    RETRY_WAIT = 3  # goto rejected, waiting before sending it again
+
+
+class MissionExecutor:
+    """
+    Flies the waypoint list of a DroneModel one leg at a time.
+
+    Sends exactly one goto per leg and then sleeps until something changes: ``notify()`` is called
+    when a waypoint is added or removed and when DroneModel detects arrival at the current one. A
+    rejected goto is retried with backoff instead of being resent in a loop.
+    """
+
+    def __init__(self, model):
+        self._model = model
+        self._wake: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+
+        self.state = MissionState.IDLE
+        self.target_id: int | None = None
+
+    def notify(self):
+        # Callable from any thread
+        with self._lock:
+            loop, wake = self._loop, self._wake
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wake.set)
+
+    def _set_state(self, state: 'MissionState'):
+        self.state = state
+        self._model.metrics.gauge("mission.state").set(state.value)
+
+    async def run(self):
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+        wake = self._wake
+        wake.set()
+        retry_delay = RETRY_DELAY_S
+
+        try:
+            while True:
+                await wake.wait()
+                wake.clear()
+
+                current = self._model.current_waypoint()
+                if current is None:
+                    self.target_id = None
+                    self._set_state(MissionState.IDLE)
+                    continue
+
+                target_id, target = current
+                if target_id == self.target_id and self.state == MissionState.EN_ROUTE:
+                    # Still flying the same leg, nothing to send
+                    continue
+
+                self._set_state(MissionState.SENDING)
+                try:
+                    accepted = await self._model.goto_location(target)
+                except Exception as e:
+                    # Must not take the telemetry monitors down with it
+                    print(f"{self._model.name} goto: {e!r}")
+                    accepted = False
+
+                if accepted:
+                    self._model.metrics.counter("mission.goto_sent").inc()
+                    self.target_id = target_id
+                    retry_delay = RETRY_DELAY_S
+                    self._set_state(MissionState.EN_ROUTE)
+                    continue
+
+                self._model.metrics.counter("mission.goto_failed").inc()
+                self.target_id = None
+                self._set_state(MissionState.RETRY_WAIT)
+                try:
+                    await asyncio.wait_for(wake.wait(), retry_delay)
+                except asyncio.TimeoutError:
+                    pass
+                retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY_S)
+                wake.set()
+        finally:
+            with self._lock:
+                self._loop = None
+                self._wake = None
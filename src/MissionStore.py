@@ -0,0 +1,198 @@
+import threading
+
+import numpy as np
+
+from VehicleStatus import Position
+
+INITIAL_CAPACITY = 64
+
+_EMPTY_IDS = np.zeros(0, dtype=np.int64)
+_EMPTY_COORDS = np.zeros((0, 3), dtype=np.float64)
+_EMPTY_IDS.flags.writeable = False
+_EMPTY_COORDS.flags.writeable = False
+
+
+class MissionSnapshot:
+    """
+    Immutable view of the remaining waypoints at one version of a MissionStore.
+
+    Behaves as a sequence of Position, index 0 is the current target. ``ids`` and ``coords``
+    (latitude, longitude, altitude per row) are read-only arrays shared with the store, so taking a
+    snapshot never copies.
+    """
+
+    __slots__ = ("version", "ids", "coords")
+
+    def __init__(self, version: int, ids: np.ndarray, coords: np.ndarray):
+        self.version = version
+        self.ids = ids
+        self.coords = coords
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __bool__(self):
+        return len(self.ids) > 0
+
+    def __getitem__(self, index: int) -> 'Position':
+        latitude, longitude, altitude = self.coords[index].tolist()
+        return Position(latitude, longitude, altitude)
+
+    def __iter__(self):
+        for latitude, longitude, altitude in self.coords.tolist():
+            yield Position(latitude, longitude, altitude)
+
+    @property
+    def current_id(self) -> int | None:
+        return int(self.ids[0]) if len(self.ids) else None
+
+    def index_of(self, waypoint_id: int) -> int:
+        found = np.flatnonzero(self.ids == waypoint_id)
+        return int(found[0]) if len(found) else -1
+
+
+class MissionStore:
+    """
+    Waypoints of a mission in preallocated arrays.
+
+    The remaining waypoints are the rows ``[head, tail)``. Advancing to the next waypoint only moves
+    ``head`` and appending writes past ``tail``, so both are O(1). Rows inside ``[head, tail)`` are
+    never written again: edits in the middle (remove, reorder) and growth build fresh arrays instead,
+    which is what lets snapshots share memory with the store. Every change bumps ``version`` and
+    every waypoint keeps the id it got when it was added.
+    """
+
+    def __init__(self, lock=None, capacity: int = INITIAL_CAPACITY):
+        self._lock = lock if lock is not None else threading.Lock()
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._coords = np.zeros((capacity, 3), dtype=np.float64)
+        self._head = 0
+        self._tail = 0
+        self._next_id = 1
+        self.version = 0
+        self._snapshot = MissionSnapshot(0, _EMPTY_IDS, _EMPTY_COORDS)
+
+    def __len__(self):
+        return self._tail - self._head
+
+    def _changed(self):
+        # Caller holds the lock
+        self.version += 1
+        ids = self._ids[self._head:self._tail]
+        coords = self._coords[self._head:self._tail]
+        ids.flags.writeable = False
+        coords.flags.writeable = False
+        self._snapshot = MissionSnapshot(self.version, ids, coords)
+
+    def _replace(self, ids: np.ndarray, coords: np.ndarray):
+        # Caller holds the lock. Moves the remaining rows into new arrays with room to append.
+        count = len(ids)
+        capacity = max(INITIAL_CAPACITY, 2 * count)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._coords = np.zeros((capacity, 3), dtype=np.float64)
+        self._ids[:count] = ids
+        self._coords[:count] = coords
+        self._head = 0
+        self._tail = count
+
+    def snapshot(self) -> 'MissionSnapshot':
+        # A single attribute read, no lock needed
+        return self._snapshot
+
+    def current(self) -> tuple[int, 'Position'] | None:
+        snapshot = self._snapshot
+        if not snapshot:
+            return None
+        return int(snapshot.ids[0]), snapshot[0]
+
+    def extend(self, positions) -> list[int]:
+        positions = list(positions)
+        count = len(positions)
+        with self._lock:
+            if self._tail + count > len(self._ids):
+                remaining = self._tail - self._head
+                self._replace(self._ids[self._head:self._tail], self._coords[self._head:self._tail])
+                if remaining + count > len(self._ids):
+                    self._grow(remaining + count)
+
+            start = self._tail
+            ids = list(range(self._next_id, self._next_id + count))
+            self._ids[start:start + count] = ids
+            self._coords[start:start + count] = [(p.latitude, p.longitude, p.altitude) for p in positions]
+            self._tail += count
+            self._next_id += count
+            self._changed()
+        return ids
+
+    def _grow(self, required: int):
+        ids = np.zeros(max(required, 2 * len(self._ids)), dtype=np.int64)
+        coords = np.zeros((len(ids), 3), dtype=np.float64)
+        ids[:self._tail] = self._ids[:self._tail]
+        coords[:self._tail] = self._coords[:self._tail]
+        self._ids = ids
+        self._coords = coords
+
+    def append(self, position: 'Position') -> int:
+        return self.extend((position,))[0]
+
+    def advance(self, expected_id: int = None) -> bool:
+        """Drops the current waypoint. With ``expected_id`` only if it is still that waypoint."""
+        with self._lock:
+            if self._head == self._tail:
+                return False
+            if expected_id is not None and self._ids[self._head] != expected_id:
+                return False
+            self._head += 1
+            self._changed()
+        return True
+
+    def remove(self, index: int) -> int:
+        with self._lock:
+            count = self._tail - self._head
+            if index < 0:
+                index += count
+            if not 0 <= index < count:
+                raise IndexError("waypoint index out of range")
+            return self._remove_locked(index)
+
+    def remove_id(self, waypoint_id: int) -> bool:
+        # Looked up and removed under one lock, advance() may move the head in between otherwise
+        with self._lock:
+            index = np.flatnonzero(self._ids[self._head:self._tail] == waypoint_id)
+            if len(index) == 0:
+                return False
+            self._remove_locked(int(index[0]))
+        return True
+
+    def _remove_locked(self, index: int) -> int:
+        # Caller holds the lock, index is in range
+        if index == 0:
+            waypoint_id = int(self._ids[self._head])
+            self._head += 1
+        else:
+            count = self._tail - self._head
+            keep = np.ones(count, dtype=bool)
+            keep[index] = False
+            ids = self._ids[self._head:self._tail]
+            waypoint_id = int(ids[index])
+            self._replace(ids[keep], self._coords[self._head:self._tail][keep])
+        self._changed()
+        return waypoint_id
+
+    def reorder(self, order, expected_version: int = None) -> bool:
+        """Puts the remaining waypoints in ``order`` (a permutation of their indexes), ids are kept."""
+        order = np.asarray(order, dtype=np.int64)
+        with self._lock:
+            if expected_version is not None and expected_version != self.version:
+                return False
+            count = self._tail - self._head
+            if len(order) != count or not np.array_equal(np.sort(order), np.arange(count)):
+                raise ValueError("order must be a permutation of the waypoint indexes")
+            self._replace(self._ids[self._head:self._tail][order], self._coords[self._head:self._tail][order])
+            self._changed()
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._head = self._tail
+            self._changed()
@@ -0,0 +1,73 @@
+import threading
+import time
+from dataclasses import dataclass, field
+
+
+class ParameterCache:
+    """
+    Last known value of every vehicle parameter, by name.
+
+    Filled from a single ``param.get_all_params()`` round trip and kept up to date by DroneModel's own
+    writes. Written from the event loop thread, read from the GUI thread.
+    """
+
+    def __init__(self):
+        self._values: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.loaded_at: float | None = None
+
+    def load(self, all_params):
+        values = {param.name: param.value for param in all_params.int_params}
+        values.update((param.name, param.value) for param in all_params.float_params)
+
+        with self._lock:
+            self._values = values
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+
+    def get(self, name: str, default=None):
+        with self._lock:
+            return self._values.get(name, default)
+
+    def update(self, name: str, value: float):
+        with self._lock:
+            self._values[name] = value
+
+    def invalidate(self, name: str = None):
+        # A single name is dropped after a failed write, no name forgets everything
+        with self._lock:
+            if name is None:
+                self._values = {}
+                self.loaded = False
+                self.loaded_at = None
+            else:
+                self._values.pop(name, None)
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            return name in self._values
+
+    def __len__(self):
+        with self._lock:
+            return len(self._values)
+
+
+@dataclass
+class ParameterWriteResult:
+    """Outcome of DroneModel.write_parameters(). ``failed`` maps parameter name to the reason."""
+    group: str
+    values: dict[str, float]
+    previous: dict[str, float] = field(default_factory=dict)
+    failed: dict[str, str] = field(default_factory=dict)
+    rolled_back: bool = False
+    rollback_failed: dict[str, str] = field(default_factory=dict)
+    latency_s: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
@@ -13,6 +13,10 @@ class PidTuningWindowUI(QtWidgets.QWidget):
         self.setObjectName("Self")
         self.resize(1036, 521) 
         self.drone_model = drone_model
+        # (model, future) of the last explicit parameter refresh
+        self._pending_refresh = None
+        # (tab, tab axis) -> (PID group, PX4 axis) to fill once the refresh in flight is done
+        self._pending_loads = {}
 
         self.setWindowTitle("PID Tuning")
         layout = QtWidgets.QVBoxLayout(self)
@@ -72,42 +76,62 @@ class PidTuningWindowUI(QtWidgets.QWidget):
         if hasattr(self.position_tab, 'load_from_drone'):
             self.position_tab.load_from_drone.connect(self._load_position_pid_from_drone)
     
+    # Submits and loads return immediately, DroneCommands reports the outcome on the Qt thread
+
     def _handle_rate_pid_submit(self, axis, p, i, d):
-        self.drone_model.set_rate_pid_params_sync(p, i, d, axis.lower())
+        self.drone_model.commands.set_pid_params("rate", {axis.lower(): (p, i, d)}, on_error=self._show_command_failed)
     
     def _handle_attitude_pid_submit(self, axis, p, i, d):
-        self.drone_model.set_attitude_pid_params_sync(p, i, d, axis.lower())
+        self.drone_model.commands.set_pid_params("attitude", {axis.lower(): (p, i, d)},
+                                                 on_error=self._show_command_failed)
     
     def _handle_velocity_pid_submit(self, axis, p, i, d):
         px4_axis = "x" if axis.lower() == "horizontal" else "z"
-        self.drone_model.set_velocity_pid_params_sync(p, i, d, px4_axis)
+        self.drone_model.commands.set_pid_params("velocity", {px4_axis: (p, i, d)}, on_error=self._show_command_failed)
     
     def _handle_position_pid_submit(self, axis, p, i, d):
         px4_axis = "x" if axis.lower() == "horizontal" else "z"
-        self.drone_model.set_position_pid_params_sync(p, i, d, px4_axis)
+        self.drone_model.commands.set_pid_params("position", {px4_axis: (p, i, d)}, on_error=self._show_command_failed)
     
+    def _load_pid_from_drone(self, tab, group: str, axis: str, px4_axis: str):
+        # An explicit load always asks the vehicle, values may have changed since the cache was filled
+        # (another GCS, a reboot). Only the clicked axis is filled, edits elsewhere are kept. Clicks while
+        # a bulk fetch runs wait for that one instead of starting another.
+        self._pending_loads[(tab, axis)] = (group, px4_axis)
+        pending = self._pending_refresh
+        if pending is not None and pending[0] is self.drone_model and not pending[1].done():
+            return
+        future = self.drone_model.commands.refresh_parameters(on_done=lambda _: self._fill_pending_loads(),
+                                                              on_error=self._on_load_failed)
+        self._pending_refresh = (self.drone_model, future)
+
+    def _fill_pending_loads(self):
+        for (tab, axis), (group, px4_axis) in self._pending_loads.items():
+            params = self.drone_model.get_cached_pid_params(group, px4_axis)
+            if params:
+                tab.update_pid_values_from_drone(axis, params)
+        self._pending_loads.clear()
+
+    def _on_load_failed(self, error: str):
+        self._pending_loads.clear()
+        self._show_command_failed(error)
+
+    def _show_command_failed(self, error: str):
+        QtWidgets.QMessageBox.warning(self, "PID Tuning", f"Vehicle command failed: {error}")
+
     def _load_rate_pid_from_drone(self, axis):
-        params = self.drone_model.get_rate_pid_params_sync(axis.lower())
-        if params:
-            self.rate_tab.update_pid_values_from_drone(axis, params)
-    
+        self._load_pid_from_drone(self.rate_tab, "rate", axis, axis.lower())
+
     def _load_attitude_pid_from_drone(self, axis):
-        params = self.drone_model.get_attitude_pid_params_sync(axis.lower())
-        if params:
-            self.attitude_tab.update_pid_values_from_drone(axis, params)
-    
+        self._load_pid_from_drone(self.attitude_tab, "attitude", axis, axis.lower())
+
     def _load_velocity_pid_from_drone(self, axis):
         px4_axis = "x" if axis.lower() == "horizontal" else "z"
-        params = self.drone_model.get_velocity_pid_params_sync(px4_axis)
-        if params:
-            self.velocity_tab.update_pid_values_from_drone(axis, params)
-    
+        self._load_pid_from_drone(self.velocity_tab, "velocity", axis, px4_axis)
+
     def _load_position_pid_from_drone(self, axis):
         px4_axis = "x" if axis.lower() == "horizontal" else "z"
-        params = self.drone_model.get_position_pid_params_sync(px4_axis)
-        if params:
-            self.position_tab.update_pid_values_from_drone(axis, params)
-
+        self._load_pid_from_drone(self.position_tab, "position", axis, px4_axis)
 
     def closeEvent(self, e):
         e.ignore()
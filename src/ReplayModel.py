@@ -0,0 +1,182 @@
+import asyncio
+import csv
+import math
+from typing import Iterator
+
+from DroneModel import DroneModel, CHANNEL_STATUS, CHANNEL_POSITION, CHANNEL_ATTITUDE, CHANNEL_VELOCITY, \
+    CHANNEL_BATTERY
+from FlightRecorder import FlightLog, FILE_MAGIC, STREAMS
+from VehicleStatus import Position, Attitude, Velocity, FlightMode
+
+# Stream replayed from each group of logger CSV columns: (stream, time column, value columns)
+CSV_GROUPS = (
+    ("battery", "battery_time(ms)", ("battery_percentage(%)", "battery_voltage(V)")),
+    ("velocity", "velocity_time(ms)", ("vx(m/s)", "vy(m/s)", "vz(m/s)")),
+    ("position", "position_time(ms)", ("lat(°)", "lon(°)", "alt(m)")),
+    ("attitude", "attitude_time(ms)", ("roll(rad)", "pitch(rad)", "yaw(rad)")),
+)
+
+STREAM_CHANNELS = {
+    "connection": CHANNEL_STATUS,
+    "position": CHANNEL_POSITION,
+    "attitude": CHANNEL_ATTITUDE,
+    "velocity": CHANNEL_VELOCITY,
+    "battery": CHANNEL_BATTERY,
+    "flight_mode": CHANNEL_STATUS,
+    "armed": CHANNEL_STATUS,
+    "in_air": CHANNEL_STATUS,
+}
+
+# With speed=0 (as fast as possible), give the event loop a turn every this many events
+_YIELD_EVERY = 256
+
+
+def _changes_from_values(stream: str, values) -> dict:
+    match stream:
+        case "position":
+            return {"position": Position(values[0], values[1], values[2])}
+        case "attitude":
+            return {"attitude": Attitude(values[0], values[1], values[2])}
+        case "velocity":
+            return {"velocity": Velocity(values[0], values[1], values[2])}
+        case "battery":
+            return {"battery_percentage": values[0], "battery_voltage": values[1]}
+        case "flight_mode":
+            return {"flight_mode": FlightMode(int(values[0]))}
+        case "armed":
+            return {"armed": bool(values[0])}
+        case "in_air":
+            return {"in_air": bool(values[0])}
+        case "connection":
+            return {"heartbeat": bool(values[0])}
+    return {}
+
+
+def read_csv_events(path: str) -> Iterator[tuple[float, str, tuple]]:
+    """(time in seconds, stream, values) for a DataLoggingWindow CSV export, old or new format."""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        last_times = {}
+
+        for row in reader:
+            row_time = float(row["time(ms)"])
+            events = []
+
+            for stream, time_column, value_columns in CSV_GROUPS:
+                # Old exports only have the row time
+                t = float(row[time_column]) if time_column in row else row_time
+                if math.isnan(t) or last_times.get(stream) == t:
+                    continue
+                last_times[stream] = t
+                events.append((t / 1000, stream, tuple(float(row[c]) for c in value_columns)))
+
+            events.sort(key=lambda e: e[0])
+            yield from events
+
+
+def read_recording_events(path: str) -> Iterator[tuple[float, str, tuple]]:
+    log = FlightLog(path)
+    valid = log.valid()
+    times = log.times
+    streams = log.streams
+    values = log.values
+
+    for i in range(len(log)):
+        if valid[i]:
+            yield float(times[i]), STREAMS[streams[i]], tuple(values[i])
+
+
+def is_recording(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(FILE_MAGIC)) == FILE_MAGIC
+
+
+class ReplayModel(DroneModel):
+    """
+    Drop-in DroneModel that plays back a logger CSV export or a FlightRecorder file instead of talking
+    to an autopilot. ``speed`` is the playback rate (1.0 real time, 10.0 ten times faster, 0 as fast
+    as possible), ``repeat`` starts over at the end.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, repeat: bool = False, name: str = "Replay"):
+        super().__init__(connection_address=path, name=name)
+        if speed < 0:
+            raise ValueError("speed must be >= 0")
+
+        self.path = path
+        self.speed = speed
+        self.repeat = repeat
+        self.events_played = 0
+        self.finished = False
+
+    def _events(self) -> Iterator[tuple[float, str, tuple]]:
+        if is_recording(self.path):
+            return read_recording_events(self.path)
+        return read_csv_events(self.path)
+
+    async def _main_async(self):
+        try:
+            self._publish("connection", CHANNEL_STATUS, heartbeat=True)
+
+            while self.running:
+                await self._play_once()
+                if not self.repeat:
+                    break
+
+            self.finished = True
+        except Exception as e:
+            print(e)
+
+    async def _play_once(self):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        first_time = None
+
+        for t, stream, values in self._events():
+            if not self.running:
+                return
+
+            if first_time is None:
+                first_time = t
+
+            if self.speed > 0:
+                delay = start + (t - first_time) / self.speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif self.events_played % _YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+
+            self._replay_event(stream, values)
+
+    def _replay_event(self, stream: str, values: tuple):
+        self.events_played += 1
+
+        channel = STREAM_CHANNELS.get(stream)
+        if channel is None:
+            self._on_message(stream)
+            return
+
+        self._publish(stream, channel, **_changes_from_values(stream, values))
+
+        if stream == "position":
+            self._on_position(values[0], values[1], values[2])
+
+    # There is no vehicle to command
+
+    async def _apply_telemetry_profile(self):
+        pass
+
+    async def arm(self):
+        return False
+
+    async def disarm(self):
+        return False
+
+    async def takeoff(self, altitude):
+        return False
+
+    async def land(self):
+        return False
+
+    async def goto_location(self, pos: 'Position'):
+        return False
@@ -0,0 +1,167 @@
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from Geodesy import LocalTangentPlane
+
+# Vertical metres cost this many horizontal metres, multicopters climb and descend slower than they cruise
+VERTICAL_COST_WEIGHT = 2.0
+# Improvement passes stop after this long, nearest neighbour alone is always returned
+TIME_LIMIT_S = 0.8
+
+_EPS = 1e-7
+
+
+@dataclass
+class RouteResult:
+    order: np.ndarray        # permutation of the waypoint indexes, in flying order
+    length_before: float     # route cost in click order (m)
+    length_after: float      # route cost in the optimised order (m)
+    seconds: float
+    passes: int
+
+
+def distance_matrix(coords: np.ndarray, vertical_weight: float = VERTICAL_COST_WEIGHT,
+                    plane: 'LocalTangentPlane' = None) -> np.ndarray:
+    """Pairwise 3D cost between (latitude, longitude, altitude) rows, in metres."""
+    if plane is None:
+        plane = LocalTangentPlane(float(coords[:, 0].mean()), float(coords[:, 1].mean()))
+    east, north = plane.to_en_array(coords[:, 0], coords[:, 1])
+    up = coords[:, 2] * vertical_weight
+
+    d_east = east[:, None] - east[None, :]
+    d_north = north[:, None] - north[None, :]
+    d_up = up[:, None] - up[None, :]
+    return np.sqrt(d_east * d_east + d_north * d_north + d_up * d_up)
+
+
+def route_length(route: np.ndarray, matrix: np.ndarray) -> float:
+    return float(matrix[route[:-1], route[1:]].sum())
+
+
+def _nearest_neighbour(matrix: np.ndarray, start: int, end: int) -> np.ndarray:
+    # Greedy tour from start, the end node is pinned last
+    size = len(matrix)
+    visited = np.zeros(size, dtype=bool)
+    visited[start] = visited[end] = True
+    route = np.empty(size, dtype=np.int64)
+    route[0] = current = start
+
+    for position in range(1, size - 1):
+        row = np.where(visited, np.inf, matrix[current])
+        current = int(np.argmin(row))
+        visited[current] = True
+        route[position] = current
+
+    route[-1] = end
+    return route
+
+
+def _two_opt_pass(route: np.ndarray, matrix: np.ndarray, deadline: float) -> bool:
+    # Best reversal of route[i + 1:j + 1] for every i, both ends of the route stay put
+    improved = False
+    size = len(route)
+    for i in range(size - 3):
+        a = route[i]
+        b = route[i + 1]
+        c = route[i + 2:size - 1]
+        d = route[i + 3:size]
+        delta = np.take(matrix[a], c) + np.take(matrix[b], d) - matrix[a, b] - matrix[c, d]
+
+        k = int(np.argmin(delta))
+        if delta[k] < -_EPS:
+            j = i + 2 + k
+            route[i + 1:j + 1] = route[i + 1:j + 1][::-1].copy()
+            improved = True
+
+        if (i & 63) == 0 and time.perf_counter() > deadline:
+            break
+    return improved
+
+
+def _or_opt_pass(route: np.ndarray, matrix: np.ndarray, deadline: float) -> tuple[np.ndarray, bool]:
+    # Moves segments of 1-3 waypoints, possibly reversed, to the cheapest other edge of the route.
+    # The matrix is symmetric, so matrix[c, x] is read as the row take matrix[x][c].
+    improved = False
+    for length in (1, 2, 3):
+        # Edge e joins route[e] and route[e + 1], only rebuilt after a move
+        c, d = route[:-1], route[1:]
+        edge_cost = matrix[c, d]
+        i = 1
+        while i + length < len(route):
+            previous, first, last, following = route[i - 1], route[i], route[i + length - 1], route[i + length]
+            removal_gain = matrix[previous, first] + matrix[last, following] - matrix[previous, following]
+
+            insert = np.take(matrix[first], c) + np.take(matrix[last], d) - edge_cost
+            insert_reversed = np.take(matrix[last], c) + np.take(matrix[first], d) - edge_cost
+            # The segment cannot go next to itself
+            insert[i - 1:i + length] = np.inf
+            insert_reversed[i - 1:i + length] = np.inf
+
+            k = int(np.argmin(insert))
+            k_reversed = int(np.argmin(insert_reversed))
+            reverse = insert_reversed[k_reversed] < insert[k]
+            best, edge = (insert_reversed[k_reversed], k_reversed) if reverse else (insert[k], k)
+
+            if best - removal_gain < -_EPS:
+                segment = route[i:i + length]
+                if reverse:
+                    segment = segment[::-1]
+                rest = np.concatenate((route[:i], route[i + length:]))
+                at = edge + 1 if edge < i else edge + 1 - length
+                route = np.concatenate((rest[:at], segment, rest[at:]))
+                c, d = route[:-1], route[1:]
+                edge_cost = matrix[c, d]
+                improved = True
+            else:
+                i += 1
+
+            if (i & 63) == 0 and time.perf_counter() > deadline:
+                return route, improved
+    return route, improved
+
+
+def optimise_route(coords: np.ndarray, start: tuple[float, float, float] = None,
+                   vertical_weight: float = VERTICAL_COST_WEIGHT, time_limit: float = TIME_LIMIT_S) -> 'RouteResult':
+    """
+    Shortest open route through every (latitude, longitude, altitude) row of ``coords``.
+
+    The route starts at ``start`` (the vehicle, or the first waypoint when None) and ends wherever is
+    cheapest. Nearest neighbour builds the first route, then 2-opt and Or-opt passes improve it until
+    nothing changes or ``time_limit`` is spent.
+    """
+    started = time.perf_counter()
+    deadline = started + time_limit
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+    count = len(coords)
+    if count < 2 or (start is None and count < 3):
+        return RouteResult(np.arange(count), 0.0, 0.0, 0.0, 0)
+
+    # Node 0 is the start, nodes 1..count the waypoints, the last node a free end (zero cost to all)
+    if start is None:
+        points = coords
+        offset = 0
+    else:
+        points = np.vstack((np.asarray(start, dtype=np.float64).reshape(1, 3), coords))
+        offset = 1
+
+    size = len(points) + 1
+    matrix = np.zeros((size, size))
+    matrix[:-1, :-1] = distance_matrix(points, vertical_weight)
+    end = size - 1
+
+    click_order = np.arange(size)
+    length_before = route_length(click_order, matrix)
+
+    route = _nearest_neighbour(matrix, 0, end)
+    passes = 0
+    while time.perf_counter() < deadline:
+        passes += 1
+        improved = _two_opt_pass(route, matrix, deadline)
+        route, moved = _or_opt_pass(route, matrix, deadline)
+        if not (improved or moved):
+            break
+
+    order = route[offset:-1] - offset
+    return RouteResult(order, length_before, route_length(route, matrix), time.perf_counter() - started, passes)
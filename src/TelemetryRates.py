@@ -0,0 +1,75 @@
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, fields
+
+# MAVSDK telemetry.set_rate_* call used for each configurable stream
+RATE_SETTERS = {
+    "position": "set_rate_position",
+    "attitude": "set_rate_attitude_euler",
+    "velocity": "set_rate_velocity_ned",
+    "battery": "set_rate_battery",
+    "in_air": "set_rate_in_air",
+    "health": "set_rate_health",
+}
+
+
+@dataclass(frozen=True)
+class TelemetryProfile:
+    """Requested rate (Hz) per telemetry stream. None leaves the autopilot default."""
+    position: float | None = 10.0
+    attitude: float | None = 50.0
+    velocity: float | None = 10.0
+    battery: float | None = 1.0
+    in_air: float | None = 1.0
+    health: float | None = 1.0
+
+    def rates(self) -> dict[str, float]:
+        return {f.name: getattr(self, f.name) for f in fields(self) if getattr(self, f.name) is not None}
+
+
+TELEMETRY_PROFILES = {
+    "default": TelemetryProfile(),
+    "autopilot": TelemetryProfile(None, None, None, None, None, None),
+    "low_bandwidth": TelemetryProfile(position=2.0, attitude=5.0, velocity=2.0, battery=0.5, in_air=0.5, health=0.5),
+    "smooth": TelemetryProfile(position=20.0, attitude=100.0, velocity=20.0, battery=1.0, in_air=1.0, health=1.0),
+}
+
+
+@dataclass(frozen=True)
+class StreamRate:
+    count: int
+    rate_hz: float
+    jitter_ms: float
+
+
+class StreamRateMeter:
+    """Measured message rate and interval jitter (standard deviation) over the last ``window`` messages."""
+
+    def __init__(self, window: int = 100):
+        self._intervals = deque(maxlen=window)
+        self._last = None
+        self.count = 0
+
+    def tick(self, now: float = None):
+        if now is None:
+            now = time.monotonic()
+        if self._last is not None:
+            self._intervals.append(now - self._last)
+        self._last = now
+        self.count += 1
+
+    def reset(self):
+        self._intervals.clear()
+        self._last = None
+        self.count = 0
+
+    def measure(self) -> StreamRate:
+        intervals = tuple(self._intervals)
+        if not intervals:
+            return StreamRate(self.count, 0.0, 0.0)
+
+        mean = sum(intervals) / len(intervals)
+        variance = sum((x - mean) ** 2 for x in intervals) / len(intervals)
+
+        return StreamRate(self.count, 1.0 / mean if mean > 0 else 0.0, math.sqrt(variance) * 1000)
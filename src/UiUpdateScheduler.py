@@ -0,0 +1,149 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from PyQt5.QtCore import QObject, QTimer, Qt, pyqtSignal
+
+
+@dataclass
+class _Consumer:
+    name: str
+    callback: Callable[[frozenset], None]
+    channels: frozenset
+    min_interval: float
+    dirty: set = field(default_factory=set)
+    last_delivery: float = float("-inf")
+    delivered: int = 0
+    coalesced: int = 0
+    paused: bool = False
+
+
+class UiUpdateScheduler(QObject):
+    """
+    Change-driven, rate-limited delivery of UI updates.
+
+    Producers (any thread) call ``mark_dirty(channel)``. Each registered consumer has a set of channels
+    it cares about and a maximum refresh rate. A consumer has at most one pending update, which is just
+    the set of channels that changed since its last delivery, so a stalled GUI thread never builds up
+    a queue of stale updates. Callbacks always run on the thread that owns the scheduler and are expected
+    to read the latest state themselves.
+
+    A paused consumer (one drawing into a hidden window) still collects its dirty channels but is
+    neither delivered nor woken for, and gets everything that changed in one update when resumed.
+    """
+
+    _wakeup_signal = pyqtSignal()
+
+    def __init__(self, parent: QObject = None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._consumers: dict[str, _Consumer] = {}
+        self._wakeup_pending = False
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._flush)
+
+        self._wakeup_signal.connect(self._flush, Qt.QueuedConnection)
+
+    def register(self, name: str, callback: Callable[[frozenset], None], channels, max_rate_hz: float):
+        if max_rate_hz <= 0:
+            raise ValueError("max_rate_hz must be positive")
+
+        consumer = _Consumer(name, callback, frozenset(channels), 1.0 / max_rate_hz)
+        # Deliver the current state once on registration
+        consumer.dirty.update(consumer.channels)
+
+        with self._lock:
+            self._consumers[name] = consumer
+
+        self._request_flush()
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._consumers.pop(name, None)
+
+    def set_paused(self, name: str, paused: bool):
+        with self._lock:
+            consumer = self._consumers.get(name)
+            if consumer is None or consumer.paused == paused:
+                return
+            consumer.paused = paused
+            resumed = not paused and bool(consumer.dirty)
+
+        if resumed:
+            self._request_flush()
+
+    def mark_dirty(self, *channels: str):
+        wake = False
+        with self._lock:
+            for consumer in self._consumers.values():
+                for channel in channels:
+                    if channel not in consumer.channels:
+                        continue
+                    if consumer.dirty:
+                        consumer.coalesced += 1
+                    consumer.dirty.add(channel)
+                    wake = wake or not consumer.paused
+
+        if wake:
+            self._request_flush()
+
+    def mark_all_dirty(self, name: str):
+        with self._lock:
+            consumer = self._consumers.get(name)
+            if consumer is None:
+                return
+            consumer.dirty.update(consumer.channels)
+
+        if not consumer.paused:
+            self._request_flush()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {
+                name: {"delivered": c.delivered, "coalesced": c.coalesced, "pending": int(bool(c.dirty)),
+                       "paused": int(c.paused)}
+                for name, c in self._consumers.items()
+            }
+
+    def _request_flush(self):
+        with self._lock:
+            if self._wakeup_pending:
+                return
+            self._wakeup_pending = True
+
+        self._wakeup_signal.emit()
+
+    def _flush(self):
+        now = time.monotonic()
+        due: list[tuple['_Consumer', frozenset]] = []
+        next_deadline = None
+
+        with self._lock:
+            self._wakeup_pending = False
+
+            for consumer in self._consumers.values():
+                if not consumer.dirty or consumer.paused:
+                    continue
+
+                deadline = consumer.last_delivery + consumer.min_interval
+                if now >= deadline:
+                    due.append((consumer, frozenset(consumer.dirty)))
+                    consumer.dirty.clear()
+                    consumer.last_delivery = now
+                    consumer.delivered += 1
+                elif next_deadline is None or deadline < next_deadline:
+                    next_deadline = deadline
+
+        for consumer, channels in due:
+            try:
+                consumer.callback(channels)
+            except Exception as e:
+                print(e)
+
+        if next_deadline is not None:
+            remaining_ms = max(0, int((next_deadline - time.monotonic()) * 1000) + 1)
+            if not self._timer.isActive() or self._timer.remainingTime() > remaining_ms:
+                self._timer.start(remaining_ms)
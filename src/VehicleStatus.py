@@ -1,5 +1,6 @@
-import asyncio
-from dataclasses import dataclass
+import threading
+import time
+from dataclasses import dataclass, fields
 from enum import Enum
 
 
@@ -18,58 +19,104 @@ class FlightMode(Enum):
                 return "mission"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Position:
     latitude: float = 0.0
     longitude: float = 0.0
     altitude: float = 0.0
 
-    def __init__(self, lat, lon, alt):
-        self.latitude = lat
-        self.longitude = lon
-        self.altitude = alt
-
     # TODO: More stuff that is useful for position vectors
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Attitude:
     roll: float = 0.0
     pitch: float = 0.0
     yaw: float = 0.0
 
-    def __init__(self, roll, pitch, yaw):
-        self.roll = roll
-        self.pitch = pitch
-        self.yaw = yaw
-
     # TODO: More stuff that is useful for attitude
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Velocity:
     vx: float = 0.0
     vy: float = 0.0
     vz: float = 0.0
 
-    def __init__(self, vx, vy, vz):
-        self.vx = vx
-        self.vy = vy
-        self.vz = vz
-
 
+# Must not use slots: derive() builds each snapshot from a copy of the previous one's __dict__
+@dataclass(frozen=True)
 class VehicleStatus:
-    heartbeat: bool
+    heartbeat: bool = False
     # Vehicle State
-    armed: bool
-    in_air: bool
+    armed: bool = False
+    in_air: bool = False
     # Position (X, Y, Z)
-    position: Position
+    position: Position = Position()
     # Attitude
-    attitude: Attitude
+    attitude: Attitude = Attitude()
     # Velocity
-    velocity: Velocity
+    velocity: Velocity = Velocity()
     # Battery
-    battery_voltage: float
-    battery_percentage: float
-    flight_mode: FlightMode
+    battery_voltage: float = 0.0
+    battery_percentage: float = 0.0
+    flight_mode: FlightMode = FlightMode.MANUAL
+    # Snapshot version, bumped on every publish
+    seq: int = 0
+    # time.monotonic() of the telemetry message that produced this snapshot, and its stream
+    timestamp: float = 0.0
+    stream: str = ""
+    # time.monotonic() at which each part was last received, 0.0 if never
+    position_time: float = 0.0
+    attitude_time: float = 0.0
+    velocity_time: float = 0.0
+    battery_time: float = 0.0
+
+    def derive(self, changes: dict) -> 'VehicleStatus':
+        """
+        Copy with ``changes`` (field name -> value) applied. Unlike ``dataclasses.replace`` it does not
+        run ``__init__``, which sets every field through ``object.__setattr__``, so it is several times
+        cheaper. The names are not checked.
+        """
+        values = self.__dict__.copy()
+        values.update(changes)
+        status = object.__new__(type(self))
+        # Frozen: the fields go in as the instance dict, past the __setattr__ that refuses them
+        object.__setattr__(status, "__dict__", values)
+        return status
+
+
+_STATUS_FIELDS = frozenset(f.name for f in fields(VehicleStatus))
+
+
+class VehicleStatusPublisher:
+    """
+    Single-reference publisher for immutable VehicleStatus snapshots.
+
+    Writers build a new snapshot from the latest one and swap the reference, readers just read the
+    reference. Assigning/reading an attribute is atomic in CPython, so readers never take a lock and
+    always see a consistent snapshot. The lock only serialises writers so no update is lost.
+    """
+
+    def __init__(self, initial: VehicleStatus = None, lock=None):
+        self._snapshot = initial if initial is not None else VehicleStatus()
+        # Any context manager lock works, DroneModel passes an InstrumentedLock
+        self._write_lock = lock if lock is not None else threading.Lock()
+
+    def latest(self) -> VehicleStatus:
+        return self._snapshot
+
+    def publish(self, timestamp: float = None, **changes) -> VehicleStatus:
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if not _STATUS_FIELDS.issuperset(changes):
+            raise TypeError(f"not VehicleStatus fields: {sorted(set(changes) - _STATUS_FIELDS)}")
+        changes["timestamp"] = timestamp
+
+        with self._write_lock:
+            current = self._snapshot
+            changes["seq"] = current.seq + 1
+            snapshot = current.derive(changes)
+            self._snapshot = snapshot
+
+        return snapshot
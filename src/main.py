@@ -1,4 +1,5 @@
 import asyncio
+import os
 import sys
 import signal
 import threading
@@ -9,8 +10,12 @@ from dotenv import load_dotenv
 
 import time
 from DroneModel import DroneModel
+from FleetModel import FleetModel
+from ReplayModel import ReplayModel
+from TelemetryRates import TELEMETRY_PROFILES
 
 from MainWindow.MainWindow import MainWindow, MainWindowUI
+from MapDisplay.MapScheme import register_map_scheme, install_map_scheme, DEFAULT_TILES_FILE, DEFAULT_TILE_SOURCE
 
 # Stupid rendering bug in windows (apparently)
 # exit code -1073740771 (0xC000041D)
@@ -39,34 +44,74 @@ async def connect_to_drone(drone: "DroneModel", altitude: float):
         print("Waiting for heartbeat...")
         await asyncio.sleep(2.0)
 
-    drone.arm_sync()
+    await asyncio.wrap_future(drone.commands.arm())
 
     while not drone.get_vehicle_status().armed:
         await asyncio.sleep(1.0)
 
     await asyncio.sleep(2.0)
 
-    drone.takeoff_sync(altitude)
+    await asyncio.wrap_future(drone.commands.takeoff(altitude))
+
+
+async def connect_fleet(fleet: "FleetModel", altitude: float):
+    await asyncio.gather(*(connect_to_drone(vehicle, altitude) for vehicle in fleet.vehicles))
 
 
 if __name__ == "__main__":
     signal.signal(signal.SIGINT, sigint_handler)
     load_dotenv()
 
+    register_map_scheme()
     app = QApplication(sys.argv)
-    drone = DroneModel("udpin://0.0.0.0:14540")
+
+    # Map tiles are cached in this MBTiles file, missing ones are fetched from MAP_TILE_SOURCE
+    # (an {z}/{x}/{y} URL template, empty for fully offline use) and only kept on disk when that server
+    # allows it. Prefetching a route downloads from MAP_PREFETCH_SOURCE only, a tile server that allows
+    # bulk downloads (not OpenStreetMap's)
+    install_map_scheme(os.getenv("MAP_TILES_FILE", DEFAULT_TILES_FILE),
+                       os.getenv("MAP_TILE_SOURCE", DEFAULT_TILE_SOURCE),
+                       prefetch_source=os.getenv("MAP_PREFETCH_SOURCE"))
+    # Per-stream telemetry rates, one of TELEMETRY_PROFILES (default, autopilot, low_bandwidth, smooth)
+    telemetry_profile = TELEMETRY_PROFILES[os.getenv("TELEMETRY_PROFILE", "default")]
+    # Number of PX4 SITL instances, instance N on udp port 14540 + N
+    vehicle_count = int(os.getenv("VEHICLE_COUNT", "1"))
+
+    # Play back a logger CSV export or a flight recording instead of connecting to PX4
+    replay_file = os.getenv("REPLAY_FILE")
+    if replay_file:
+        replay = ReplayModel(replay_file, speed=float(os.getenv("REPLAY_SPEED", "1.0")),
+                             repeat=os.getenv("REPLAY_REPEAT", "0") == "1")
+
+        main_view = MainWindowUI()
+        MainWindow(view=main_view, model=replay)
+
+        replay.start()
+        main_view.show()
+
+        sys.exit(app.exec_())
+
+    fleet = FleetModel.from_sitl(vehicle_count, telemetry_profile=telemetry_profile)
+
+    # Record every telemetry message of every vehicle into this directory
+    record_dir = os.getenv("FLIGHT_RECORD_DIR")
+    if record_dir:
+        os.makedirs(record_dir, exist_ok=True)
+        session = time.strftime("%Y%m%d_%H%M%S")
+        for i, vehicle in enumerate(fleet.vehicles):
+            vehicle.start_recording(os.path.join(record_dir, f"flight_{session}_vehicle{i + 1}.t4rec"))
 
     main_view = MainWindowUI()
-    MainWindow(view=main_view, model=drone)
+    MainWindow(view=main_view, model=fleet.active_vehicle(), fleet=fleet)
 
-    drone.start()
+    fleet.start()
     main_view.show()
 
     timeout = 15
 
     connect_thread = threading.Thread(
         target=asyncio.run,
-        args=(connect_to_drone(drone, TAKEOFF_ALTITUDE),)
+        args=(connect_fleet(fleet, TAKEOFF_ALTITUDE),)
     )
 
     connect_thread.start()